@@ -3,6 +3,7 @@ from tkinter import ttk
 import os
 import sys
 import logging
+import multiprocessing
 from logging.handlers import TimedRotatingFileHandler
 from ui.main_window import MainWindow
 from ui.styles.tk_styles import configure_styles
@@ -161,4 +162,6 @@ def main():
         raise
 
 if __name__ == "__main__":
+    # 打包版本中批量创建文件会启动子进程，需要先处理子进程入口
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file
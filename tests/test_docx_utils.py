@@ -0,0 +1,43 @@
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+import zipfile
+import xml.etree.ElementTree as ET
+
+# 添加项目根目录到系统路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.docx_utils import build_docx, write_docx
+
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+class TestDocxUtils(unittest.TestCase):
+    def setUp(self):
+        # 创建临时目录用于测试
+        self.temp_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.temp_dir, 'test.docx')
+
+    def tearDown(self):
+        # 清理临时目录
+        shutil.rmtree(self.temp_dir)
+
+    def test_write_docx_paragraphs(self):
+        """测试生成 docx 段落"""
+        write_docx(self.test_file, "第一段\n\n  第二段 <&>\n   ")
+
+        with zipfile.ZipFile(self.test_file) as package:
+            self.assertIn('[Content_Types].xml', package.namelist())
+            root = ET.fromstring(package.read('word/document.xml'))
+
+        texts = [''.join(t.text for t in p.iter(W_NS + 't')) for p in root.iter(W_NS + 'p')]
+        self.assertEqual(texts, ["第一段", "  第二段 <&>"])
+
+    def test_build_docx_deterministic(self):
+        """测试相同内容生成相同的文件"""
+        self.assertEqual(build_docx(["a", "b"]), build_docx(["a", "b"]))
+        self.assertNotEqual(build_docx(["a"]), build_docx(["b"]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,11 +4,15 @@ import sys
 import tempfile
 import shutil
 import logging
+import zipfile
+from datetime import datetime
 
 # 添加项目根目录到系统路径
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.excel_utils import create_sheets, read_sheet_names, read_column_data
+import openpyxl
+
+from utils.excel_utils import create_sheets, read_package_sheet_names, append_sheets_to_workbook, _raw_copy_zip_entry, _raw_zip_copy_works, _stream_zip_entry, read_sheet_names, read_column_data, read_column_headers, XlsxTemplate, get_workbook_index, SharedStrings, read_columns, xls_support_available
 
 # 设置测试日志
 logging.basicConfig(level=logging.ERROR)
@@ -192,6 +196,239 @@ class TestExcelUtils(unittest.TestCase):
         self.assertTrue(success)
         expected_names = ["张三", "李四", "王五", "赵六", "钱七"]
         self.assertEqual(expected_names, result)
+    
+    def test_create_sheets_new_workbook_direct(self):
+        """测试新工作簿直接生成并可继续追加工作表"""
+        sheet_names = [f"表{i}" for i in range(300)]
+        result, message = create_sheets(self.test_file, sheet_names, "标题", ["ID", "数量", 3])
+        self.assertTrue(result)
+        self.assertEqual(message, "工作表创建成功: 300个成功, 0个失败")
+        
+        result, message = create_sheets(self.test_file, ["表0", "新表"], header_row=["A"])
+        self.assertTrue(result)
+        self.assertEqual(message, "工作表创建成功: 1个成功, 1个失败")
+        
+        wb = openpyxl.load_workbook(self.test_file)
+        self.assertEqual(wb.sheetnames, sheet_names + ["新表"])
+        self.assertEqual([[cell.value for cell in row] for row in wb["表299"].iter_rows()],
+                         [["标题", None, None], ["ID", "数量", 3]])
+        self.assertEqual(wb["新表"]["A1"].value, "A")
+        
+        # 工作表名称不区分大小写，批次内重复的名称只创建一次
+        case_file = os.path.join(self.temp_dir, 'case.xlsx')
+        result, message = create_sheets(case_file, ["Data", "data", "DATA "])
+        self.assertEqual(message, "工作表创建成功: 2个成功, 1个失败")
+        self.assertEqual(read_package_sheet_names(case_file), ["Data", "DATA "])
+        
+        # 没有有效的工作表时不生成文件
+        empty_file = os.path.join(self.temp_dir, 'empty.xlsx')
+        result, message = create_sheets(empty_file, ["a/b"])
+        self.assertFalse(result)
+        self.assertFalse(os.path.exists(empty_file))
+    
+    def test_create_sheets_append_existing(self):
+        """测试在现有工作簿中追加工作表时原有条目保持不变"""
+        import zipfile
+        wb = openpyxl.Workbook()
+        wb.active.title = "数据"
+        for i in range(100):
+            wb.active.append([i, f"名称{i}"])
+        wb.create_sheet("汇总")["A1"] = "=SUM(数据!A1:A100)"
+        wb.save(self.test_file)
+        with zipfile.ZipFile(self.test_file) as package:
+            before = {info.filename: package.read(info.filename) for info in package.infolist()}
+            before_crc = {info.filename: info.CRC for info in package.infolist()}
+        
+        result, message = create_sheets(self.test_file, ["数据", "新表"], "标题")
+        self.assertTrue(result)
+        self.assertEqual(message, "工作表创建成功: 1个成功, 1个失败")
+        
+        with zipfile.ZipFile(self.test_file) as package:
+            self.assertIsNone(package.testzip())
+            for name, data in before.items():
+                if name not in ('xl/workbook.xml', 'xl/_rels/workbook.xml.rels', '[Content_Types].xml'):
+                    self.assertEqual(package.getinfo(name).CRC, before_crc[name])
+                    self.assertEqual(package.read(name), data)
+        
+        wb = openpyxl.load_workbook(self.test_file)
+        self.assertEqual(wb.sheetnames, ["数据", "汇总", "新表"])
+        self.assertEqual(wb["数据"]["B100"].value, "名称99")
+        self.assertEqual(wb["汇总"]["A1"].value, "=SUM(数据!A1:A100)")
+        self.assertEqual(wb["新表"]["A1"].value, "标题")
+        
+        # 与现有工作表只有大小写不同的名称视为重名
+        result, message = create_sheets(self.test_file, ["DATA", "汇总".upper(), "新表2"])
+        self.assertEqual(message, "工作表创建成功: 2个成功, 1个失败")
+        with self.assertRaises(ValueError):
+            append_sheets_to_workbook(self.test_file, ["新表2".upper()])
+        self.assertEqual(read_package_sheet_names(self.test_file), ["数据", "汇总", "新表", "DATA", "新表2"])
+    
+    def test_copy_zip_entry_fallback(self):
+        """测试原始复制和公开接口复制得到的条目都能通过校验"""
+        self.assertTrue(_raw_zip_copy_works())
+        create_sheets(self.test_file, ["数据"], header_row=["名称"])
+        for copy_entry in (_raw_copy_zip_entry, _stream_zip_entry):
+            output = os.path.join(self.temp_dir, f'{copy_entry.__name__}.xlsx')
+            with zipfile.ZipFile(self.test_file) as source, zipfile.ZipFile(output, 'w') as package:
+                for info in source.infolist():
+                    copy_entry(source, package, info)
+                package.writestr('extra.txt', 'x')
+            with zipfile.ZipFile(output) as package, zipfile.ZipFile(self.test_file) as source:
+                self.assertIsNone(package.testzip())
+                for info in source.infolist():
+                    self.assertEqual(package.read(info.filename), source.read(info.filename))
+    
+    def test_workbook_index_cache(self):
+        """测试工作簿索引在文件未变化时复用，变化后重新读取"""
+        create_sheets(self.test_file, ["甲", "乙"], header_row=["编号", "名称"])
+        
+        index = get_workbook_index(self.test_file)
+        self.assertIs(get_workbook_index(self.test_file), index)
+        self.assertEqual(index.sheet_names, ("甲", "乙"))
+        self.assertEqual(index.dimension("乙"), (1, 2))
+        self.assertEqual(read_column_headers(self.test_file, "甲"), (True, ["编号", "名称"]))
+        
+        create_sheets(self.test_file, ["丙"])
+        self.assertIsNot(get_workbook_index(self.test_file), index)
+        self.assertEqual(read_sheet_names(self.test_file), (True, ["甲", "乙", "丙"]))
+    
+    def test_workbook_index_direct_reader(self):
+        """测试直接读取表头行与 openpyxl 结果一致，共享字符串按需读取"""
+        import datetime
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "数据"
+        ws.append(["名称", 3, 2.5, True, datetime.datetime(2024, 1, 2, 3, 4, 5), None, "=B1*2"])
+        for i in range(3000):
+            ws.append([f"值{i}"])
+        wb.save(self.test_file)
+        
+        index = get_workbook_index(self.test_file)
+        expected = next(openpyxl.load_workbook(self.test_file, read_only=True)["数据"].iter_rows(
+            min_row=1, max_row=1, values_only=True))
+        self.assertEqual(index.header_row("数据"), tuple(expected))
+        self.assertEqual(index.dimension("数据"), (3001, 7))
+        
+        strings_file = os.path.join(self.temp_dir, 'strings.xlsx')
+        with zipfile.ZipFile(strings_file, 'w') as package:
+            package.writestr('xl/sharedStrings.xml', (
+                '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                + ''.join(f'<si><t>值{i}</t></si>' for i in range(3000))
+                + '<si><r><t>富</t></r><r><t>文本</t></r></si></sst>'))
+        shared_strings = SharedStrings(strings_file, 'xl/sharedStrings.xml')
+        self.assertEqual(shared_strings[5], "值5")
+        self.assertFalse(shared_strings.complete)
+        self.assertEqual(shared_strings[2500], "值2500")
+        self.assertEqual(len(shared_strings), 3001)
+        self.assertEqual(shared_strings[3000], "富文本")
+    
+    def test_iter_column_matches_openpyxl(self):
+        """测试按列扫描的结果与 openpyxl 逐行读取一致"""
+        import datetime
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "数据"
+        ws.append(["名称", "数值", "日期", "公式"])
+        for i in range(200):
+            ws.append([f" a<&>{i} " if i % 3 else None, i * 1.5 if i % 2 else i,
+                       datetime.datetime(2024, 1, 1) + datetime.timedelta(days=i), f"=B{i + 2}*2"])
+        ws["AA5"] = "远列"
+        wb.save(self.test_file)
+        
+        index = get_workbook_index(self.test_file)
+        ws = openpyxl.load_workbook(self.test_file, read_only=True)["数据"]
+        for column in (1, 2, 3, 4, 5, 27):
+            expected = [(row[0].row, row[0].value) for row in ws.iter_rows(min_row=2, min_col=column, max_col=column)
+                        if row and row[0].value is not None]
+            self.assertEqual(list(index.iter_column("数据", column, min_row=2)), expected)
+        
+        success, data = read_column_data(self.test_file, "数据", 1)
+        self.assertTrue(success)
+        self.assertEqual(data[:2], [" a<&>1 ", " a<&>2 "])
+    
+    def test_read_columns_aligned(self):
+        """测试批量读取多个工作表的多列，同一工作表的各列按行对齐"""
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "甲"
+        ws.append(["编号", "名称", "备注"])
+        ws.append([1, "一", None])
+        ws.append([2, None, None])
+        ws.append([None, None, "末行"])
+        other = wb.create_sheet("乙")
+        other.append(["名称"])
+        other.append(["乙一"])
+        wb.save(self.test_file)
+        
+        success, result = read_columns(self.test_file, [("甲", 1), ("甲", 3), ("乙", 1), ("甲", 1)])
+        self.assertTrue(success)
+        self.assertEqual(result, {
+            ("甲", 1): [1, 2, None],
+            ("甲", 3): [None, None, "末行"],
+            ("乙", 1): ["乙一"],
+        })
+        
+        success, result = read_columns(self.test_file, [("丙", 1)])
+        self.assertFalse(success)
+    
+    def test_iter_rows(self):
+        """测试逐行读取时中间的空行生成空元组"""
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(["名称", "数量"])
+        ws["B4"] = 3
+        wb.save(self.test_file)
+        
+        index = get_workbook_index(self.test_file)
+        self.assertEqual(list(index.iter_rows(index.sheet_names[0])), [("名称", "数量"), (), (), (None, 3)])
+        self.assertEqual(list(index.iter_rows(index.sheet_names[0], 2, 3)), [(), ()])
+    
+    @unittest.skipIf(xls_support_available(), "已安装xlrd")
+    def test_read_xls_without_xlrd(self):
+        """测试未安装xlrd时读取.xls返回明确的错误信息"""
+        xls_file = os.path.join(self.temp_dir, 'old.xls')
+        with open(xls_file, 'wb') as f:
+            f.write(b'\xd0\xcf\x11\xe0')
+        success, message = read_sheet_names(xls_file)
+        self.assertFalse(success)
+        self.assertIn("xlrd", message)
+    
+    @unittest.skipUnless(xls_support_available(), "未安装xlrd")
+    def test_read_xls(self):
+        """测试读取旧版.xls文件，值的类型与xlsx一致"""
+        xls_file = os.path.join(os.path.dirname(__file__), 'data', 'sample.xls')
+        
+        index = get_workbook_index(xls_file)
+        self.assertEqual(index.sheet_names, ("名单", "Sheet2"))
+        self.assertEqual(index.dimension("名单"), (5, 5))
+        self.assertEqual(index.header_row("名单"), ("姓名", "编号", "入职日期", "在职", "分数"))
+        rows = list(index.iter_rows("名单", min_row=2))
+        self.assertEqual(rows[0], ("张三", 1, datetime(2024, 1, 2), True, 1.5))
+        self.assertEqual(rows[1], ("李四", 2, datetime(2024, 3, 4), False))
+        self.assertEqual(rows[2:], [(), ("王五", 3, None, None, 90)])
+        self.assertEqual(index.read_columns("名单", [1, 5], min_row=2),
+                         {1: ["张三", "李四", None, "王五"], 5: [1.5, None, None, 90]})
+        self.assertEqual(list(index.iter_column("名单", 2, min_row=2)), [(2, 1), (3, 2), (5, 3)])
+        self.assertEqual(read_sheet_names(xls_file), (True, ["名单", "Sheet2"]))
+    
+    def test_xlsx_template_write(self):
+        """测试基于模板包生成 xlsx 文件"""
+        template = XlsxTemplate()
+        template.write(self.test_file, ["名称", "", "=1+1", " a<b>&c "])
+        
+        ws = openpyxl.load_workbook(self.test_file).active
+        self.assertEqual([cell.value for cell in ws['A']], ["名称", None, "=1+1", " a<b>&c "])
+        
+        # 不同版本 openpyxl 生成的空工作表写法都能拆分
+        from utils.excel_utils import SHEET_DATA_SPLIT_RE, DIMENSION_SPLIT_RE
+        for sheet_data in ('<sheetData></sheetData>', '<sheetData/>', '<sheetData />', '<sheetData>\n</sheetData>'):
+            self.assertIsNotNone(SHEET_DATA_SPLIT_RE.search(f'<x>{sheet_data}</x>'))
+        for dimension in ('<dimension ref="A1:A1" />', '<dimension ref="A1"/>', "<dimension  ref='A1:A1'/>"):
+            self.assertIsNotNone(DIMENSION_SPLIT_RE.search(f'<x>{dimension}</x>'))
+        
+        blank_file = os.path.join(self.temp_dir, 'blank.xlsx')
+        template.write(blank_file)
+        self.assertIsNone(openpyxl.load_workbook(blank_file).active['A1'].value)
 
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
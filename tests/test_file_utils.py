@@ -4,11 +4,16 @@ import shutil
 import tempfile
 import sys
 import logging
+import unicodedata
+import unittest.mock
+import concurrent.futures
+import openpyxl
+from datetime import datetime
 
 # 添加项目根目录到系统路径
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.file_utils import create_files, create_dirs, rename_files, move_copy_files
+from utils.file_utils import create_files, create_dirs, rename_files, move_copy_files, rename_from_mapping, execute_rename_plan, rollback_rename_journal, RENAME_JOURNAL_DIR, RENAME_JOURNAL_KEEP, make_renamer, NamingRule, sequence_names, iter_names_from_file, parse_size, snapshot_dir_structure, plan_create, iter_hierarchy_rows, _rename_no_replace
 
 # 设置测试日志
 logging.basicConfig(level=logging.ERROR)
@@ -100,6 +105,267 @@ class TestFileUtils(unittest.TestCase):
             file_path = os.path.join(self.target_dir, expected_name)
             self.assertTrue(os.path.exists(file_path))
     
+    def test_create_files_parallel(self):
+        """测试多线程和多进程创建文件"""
+        for parallel, file_type in (("thread", ".txt"), ("process", ".xlsx")):
+            target_dir = os.path.join(self.temp_dir, parallel)
+            file_names = [f"file{i}" for i in range(8)] + ["file0"]
+            result, message = create_files(
+                names=file_names,
+                target_dir=target_dir,
+                file_type=file_type,
+                parallel=parallel,
+                max_workers=2
+            )
+            
+            self.assertTrue(result)
+            self.assertEqual(message, "创建完成。成功：8个，跳过：1个，失败：0个")
+            self.assertEqual(len(os.listdir(target_dir)), 8)
+    
+    def test_create_files_skip_existing(self):
+        """测试已存在的文件被跳过且不会被覆盖"""
+        existing_path = os.path.join(self.target_dir, "file1.txt")
+        with open(existing_path, 'w', encoding='utf-8') as f:
+            f.write("原有内容")
+        
+        result, message = create_files(
+            names=["file1", "file2"],
+            target_dir=self.target_dir,
+            file_type=".txt",
+            content_template="${NAME}"
+        )
+        
+        self.assertTrue(result)
+        self.assertEqual(message, "创建完成。成功：1个，跳过：1个，失败：0个")
+        with open(existing_path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), "原有内容")
+        with open(os.path.join(self.target_dir, "file2.txt"), encoding='utf-8') as f:
+            self.assertEqual(f.read(), "file2")
+    
+    def test_create_files_mail_merge(self):
+        """测试按数据源逐行生成文件"""
+        source_path = os.path.join(self.temp_dir, 'source.csv')
+        with open(source_path, 'w', encoding='utf-8', newline='') as f:
+            f.write("编号,姓名,部门\n")
+            f.write("A01,张三,研发\n")
+            f.write("A02,李四,销售\n")
+        
+        result, message = create_files(
+            names=None,
+            target_dir=self.target_dir,
+            file_type=".txt",
+            content_template="${COL:姓名}-${COL:部门}-${ISEQ}",
+            naming_rule="$NAME_${COL:姓名}",
+            merge_source=source_path
+        )
+        
+        self.assertTrue(result)
+        self.assertEqual(message, "创建完成。成功：2个，跳过：0个，失败：0个")
+        with open(os.path.join(self.target_dir, "A02_李四.txt"), encoding='utf-8') as f:
+            self.assertEqual(f.read(), "李四-销售-002")
+        
+        result, message = create_files(
+            names=None,
+            target_dir=self.target_dir,
+            naming_rule="${COL:不存在}",
+            merge_source=source_path
+        )
+        self.assertFalse(result)
+        
+        # 不支持的数据源类型直接报错，不会当作 CSV 读出乱码
+        binary_path = os.path.join(self.temp_dir, 'source.dat')
+        with open(binary_path, 'wb') as f:
+            f.write(b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1')
+        result, message = create_files(names=None, target_dir=self.target_dir, merge_source=binary_path)
+        self.assertFalse(result)
+        self.assertIn("不支持的文件类型", message)
+    
+    def test_create_files_parallel_duplicate_keeps_first(self):
+        """测试并行创建时跨批次重名的文件保留第一行的内容"""
+        source_path = os.path.join(self.temp_dir, 'dup.csv')
+        with open(source_path, 'w', encoding='utf-8', newline='') as f:
+            f.write("名称,内容\n")
+            f.write("dup,first\n")
+            for i in range(600):
+                f.write(f"n{i},{i}\n")
+            f.write("dup,last\n")
+        
+        result, message = create_files(
+            names=None,
+            target_dir=self.target_dir,
+            content_template="${COL:内容}",
+            merge_source=source_path,
+            parallel="thread",
+            max_workers=4
+        )
+        
+        self.assertEqual(message, "创建完成。成功：601个，跳过：1个，失败：0个")
+        with open(os.path.join(self.target_dir, "dup.txt"), encoding='utf-8') as f:
+            self.assertEqual(f.read(), "first")
+    
+    def test_create_files_parallel_broken_executor(self):
+        """测试执行器中断后，已由工作线程创建的文件仍按已创建统计"""
+        class BrokenPool(concurrent.futures.ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                # 先完成任务再报告执行器中断，模拟工作进程写完文件后退出
+                fn(*args, **kwargs)
+                future = concurrent.futures.Future()
+                future.set_exception(concurrent.futures.BrokenExecutor("worker died"))
+                return future
+        
+        with unittest.mock.patch('concurrent.futures.ThreadPoolExecutor', BrokenPool):
+            result, message = create_files(
+                names=[f"file{i}" for i in range(600)],
+                target_dir=self.target_dir,
+                parallel="thread",
+                max_workers=2
+            )
+        
+        self.assertTrue(result)
+        self.assertEqual(message, "创建完成。成功：600个，跳过：0个，失败：0个")
+        self.assertEqual(len(os.listdir(self.target_dir)), 600)
+    
+    def test_create_files_from_template_file(self):
+        """测试复制模板文件创建文件"""
+        template_path = os.path.join(self.temp_dir, 'template.bin')
+        template_data = bytes(range(256)) * 4096
+        with open(template_path, 'wb') as f:
+            f.write(template_data)
+        
+        result, message = create_files(
+            names=["copy1", "copy2", "copy3"],
+            target_dir=self.target_dir,
+            file_type=".bin",
+            content_template="被忽略的内容",
+            template_file=template_path
+        )
+        
+        self.assertTrue(result)
+        self.assertEqual(message, "创建完成。成功：3个，跳过：0个，失败：0个")
+        for name in ["copy1", "copy2", "copy3"]:
+            with open(os.path.join(self.target_dir, name + ".bin"), 'rb') as f:
+                self.assertEqual(f.read(), template_data)
+        
+        # 多个批次并行时共用同一份已打开的模板
+        for parallel in ("thread", "process"):
+            target_dir = os.path.join(self.temp_dir, parallel)
+            names = [f"copy{i}" for i in range(600)]
+            result, message = create_files(
+                names=names,
+                target_dir=target_dir,
+                file_type=".bin",
+                template_file=template_path,
+                parallel=parallel,
+                max_workers=2
+            )
+            self.assertEqual(message, "创建完成。成功：600个，跳过：0个，失败：0个")
+            for name in (names[0], names[-1]):
+                with open(os.path.join(target_dir, name + ".bin"), 'rb') as f:
+                    self.assertEqual(f.read(), template_data)
+        
+        result, message = create_files(
+            names=["missing"],
+            target_dir=self.target_dir,
+            template_file=os.path.join(self.temp_dir, 'missing.bin')
+        )
+        self.assertFalse(result)
+    
+    def test_create_files_with_size(self):
+        """测试按固定大小和按数据源列指定大小生成文件"""
+        self.assertEqual(parse_size("1.5K"), 1536)
+        self.assertEqual(parse_size("2MiB"), 2 * 1024 * 1024)
+        self.assertRaises(ValueError, parse_size, "abc")
+        
+        result, message = create_files(
+            names=["sparse1", "sparse2"],
+            target_dir=self.target_dir,
+            file_type=".dat",
+            file_size="1GB"
+        )
+        self.assertTrue(result)
+        self.assertEqual(message, "创建完成。成功：2个，跳过：0个，失败：0个")
+        self.assertEqual(os.path.getsize(os.path.join(self.target_dir, "sparse1.dat")), 1024 ** 3)
+        
+        source_path = os.path.join(self.temp_dir, 'sizes.csv')
+        with open(source_path, 'w', encoding='utf-8', newline='') as f:
+            f.write("名称,大小\nsmall,10\nlarge,3000\ndefault,\nbad,x\n")
+        result, message = create_files(
+            names=None,
+            target_dir=self.target_dir,
+            file_type=".bin",
+            merge_source=source_path,
+            file_size=5,
+            size_column="大小",
+            allocation="pattern"
+        )
+        self.assertTrue(result)
+        self.assertEqual(message, "创建完成。成功：3个，跳过：0个，失败：1个，失败文件：bad")
+        with open(os.path.join(self.target_dir, "large.bin"), 'rb') as f:
+            self.assertEqual(f.read(), (bytes(range(256)) * 12)[:3000])
+        self.assertEqual(os.path.getsize(os.path.join(self.target_dir, "default.bin")), 5)
+    
+    def test_create_from_sequence_names(self):
+        """测试按序号惰性生成名称创建文件和目录"""
+        self.assertEqual(list(sequence_names(3, start_value=10, step=5)), ["10", "15", "20"])
+        
+        result, message = create_files(
+            names=sequence_names(100, start_value=1, step=2),
+            target_dir=self.target_dir,
+            naming_rule="file_$ISEQ4",
+            start_value=1,
+            step=2
+        )
+        self.assertTrue(result)
+        self.assertEqual(message, "创建完成。成功：100个，跳过：0个，失败：0个")
+        self.assertTrue(os.path.exists(os.path.join(self.target_dir, "file_0199.txt")))
+        
+        dirs_parent = os.path.join(self.temp_dir, 'dirs')
+        result, message = create_dirs(
+            dir_names=sequence_names(5),
+            parent_dir=dirs_parent,
+            naming_rule="dir_$ISEQ2"
+        )
+        self.assertTrue(result)
+        self.assertEqual(sorted(os.listdir(dirs_parent)), ["dir_01", "dir_02", "dir_03", "dir_04", "dir_05"])
+    
+    def test_iter_names_from_file(self):
+        """测试流式读取名称文件"""
+        csv_path = os.path.join(self.temp_dir, 'names.csv')
+        with open(csv_path, 'w', encoding='gbk', newline='') as f:
+            f.write("编号,名称\n1,甲\n2,\n3,丙\n")
+        self.assertEqual(list(iter_names_from_file(csv_path, column_index=1, skip_header=True)), ["甲", "丙"])
+        
+        xlsx_path = os.path.join(self.temp_dir, 'names.xlsx')
+        wb = openpyxl.Workbook()
+        for row in [["名称"], [1.0], [None], ["乙"]]:
+            wb.active.append(row)
+        wb.save(xlsx_path)
+        self.assertEqual(list(iter_names_from_file(xlsx_path, skip_header=True)), ["1", "乙"])
+    
+    def test_create_files_progress(self):
+        """测试批量创建时的进度回调"""
+        reports = []
+        result, message = create_files(
+            names=(f"file{i}" for i in range(2500)),
+            target_dir=self.target_dir,
+            progress_callback=lambda progress: reports.append(progress.processed)
+        )
+        
+        self.assertTrue(result)
+        self.assertEqual(message, "创建完成。成功：2500个，跳过：0个，失败：0个")
+        self.assertEqual(reports, [1000, 2000])
+    
+    def test_naming_rule(self):
+        """测试预编译命名规则"""
+        rule = NamingRule("{$NAME}_$ISEQ_$ISEQ5_$YYYY$MM$DD", digits=3, now=datetime(2024, 1, 2))
+        
+        self.assertEqual(rule.render("a", 7), "{a}_007_00007_20240102")
+        self.assertEqual(
+            list(rule.iter_names(["a", "b"], start_value=10, step=5)),
+            ["{a}_010_00010_20240102", "{b}_015_00015_20240102"]
+        )
+        self.assertEqual(NamingRule("$NAME-$ISEQ").render("x", 7), "x-7")
+    
     def test_create_dirs_basic(self):
         """测试基本目录创建功能"""
         dir_names = ["dir1", "dir2", "dir3"]
@@ -145,6 +411,152 @@ class TestFileUtils(unittest.TestCase):
         self.assertTrue(os.path.exists(os.path.join(self.target_dir, "parent2")))
         self.assertTrue(os.path.exists(os.path.join(self.target_dir, "parent2", "child2_1")))
     
+    def test_create_dirs_tree(self):
+        """测试解析层级目录树并并行创建"""
+        lines = []
+        for i in range(20):
+            lines.append(f"p{i}")
+            for j in range(5):
+                lines.append(f"    c{j}")
+                lines.append("            deep")
+        lines.append("p0")
+        lines.append("    c0")
+        os.makedirs(os.path.join(self.target_dir, "p1", "c1"))
+        
+        result, message = create_dirs(
+            dir_names=lines,
+            parent_dir=self.target_dir,
+            structure=["src/main", "docs"],
+            enable_hierarchy=True,
+            indent_spaces=4,
+            parallel="thread",
+            max_workers=4
+        )
+        
+        self.assertTrue(result)
+        # 220 个目录中 p1、p1/c1 已存在，末尾两行与已有节点重名
+        self.assertEqual(message, "创建完成。成功：218个，跳过：4个，失败：0个")
+        self.assertTrue(os.path.isdir(os.path.join(self.target_dir, "p19", "c4", "deep", "src", "main")))
+        self.assertTrue(os.path.isdir(os.path.join(self.target_dir, "p1", "c1", "docs")))
+        self.assertEqual(sorted(os.listdir(os.path.join(self.target_dir, "p0"))),
+                         ["c0", "c1", "c2", "c3", "c4", "docs", "src"])
+    
+    def test_create_dirs_deep_tree(self):
+        """测试层级超过递归深度的目录树也能完整创建"""
+        depth = sys.getrecursionlimit() + 100
+        lines = [" " * level + "d" for level in range(depth)]
+        
+        result, message = create_dirs(
+            dir_names=lines,
+            parent_dir=self.target_dir,
+            enable_hierarchy=True,
+            indent_spaces=1,
+            parallel="serial"
+        )
+        
+        self.assertTrue(result)
+        self.assertEqual(message, f"创建完成。成功：{depth}个，跳过：0个，失败：0个")
+        deepest = os.path.join(self.target_dir, *["d"] * depth)
+        self.assertTrue(os.path.isdir(deepest))
+        # shutil.rmtree 按层递归，先逐级删除这条目录链
+        os.removedirs(deepest)
+    
+    def test_create_dirs_from_structure_template(self):
+        """测试记录已有目录结构并在每个新目录下重建"""
+        source_dir = os.path.join(self.temp_dir, 'skeleton')
+        os.makedirs(os.path.join(source_dir, "src", "main"))
+        os.makedirs(os.path.join(source_dir, "docs"))
+        with open(os.path.join(source_dir, "src", "readme.txt"), 'w') as f:
+            f.write("文件不会被记录")
+        
+        self.assertEqual(snapshot_dir_structure(source_dir),
+                         ["docs", "src", os.path.join("src", "main")])
+        
+        result, message = create_dirs(
+            dir_names=["proj1", "proj2", "proj1"],
+            parent_dir=self.target_dir,
+            structure=["build"],
+            structure_source=source_dir
+        )
+        
+        self.assertTrue(result)
+        self.assertEqual(message, "创建完成。成功：2个，跳过：1个，失败：0个")
+        for name in ["proj1", "proj2"]:
+            self.assertTrue(os.path.isdir(os.path.join(self.target_dir, name, "src", "main")))
+            self.assertEqual(sorted(os.listdir(os.path.join(self.target_dir, name))), ["build", "docs", "src"])
+        self.assertEqual(os.listdir(os.path.join(self.target_dir, "proj1", "src")), ["main"])
+    
+    def test_iter_names_from_file_late_gbk(self):
+        """测试开头全是 ASCII、后面才出现 GBK 字符的文件也能完整读取"""
+        names_path = os.path.join(self.temp_dir, 'names.txt')
+        ascii_names = [f"name{i:05d}" for i in range(10000)]
+        with open(names_path, 'w', encoding='gbk') as f:
+            f.write("\n".join(ascii_names + ["张三", "李四"]))
+        
+        self.assertEqual(list(iter_names_from_file(names_path)), ascii_names + ["张三", "李四"])
+    
+    def test_create_dirs_from_hierarchy_source(self):
+        """测试按列分级的表格生成层级目录"""
+        source_path = os.path.join(self.temp_dir, 'levels.csv')
+        with open(source_path, 'w', encoding='utf-8', newline='') as f:
+            f.write("项目,阶段,类别,备注\n"
+                    "A,设计,图纸,x\n"
+                    ",,模型,\n"
+                    ",施工,,\n"
+                    "A,设计,图纸,\n"
+                    "B,,,\n"
+                    ",,,\n"
+                    "C,a/b,,\n")
+        
+        result, message = create_dirs(
+            dir_names=None,
+            parent_dir=self.target_dir,
+            hierarchy_source=source_path,
+            level_columns=["项目", "阶段", "类别"]
+        )
+        
+        self.assertTrue(result)
+        # A、A/设计、A/设计/图纸、A/设计/模型、A/施工、B，重复的一行跳过，含分隔符的一行失败
+        self.assertEqual(message, "创建完成。成功：6个，跳过：1个，失败：1个，失败目录：C/a/b")
+        self.assertTrue(os.path.isdir(os.path.join(self.target_dir, "A", "设计", "模型")))
+        self.assertTrue(os.path.isdir(os.path.join(self.target_dir, "A", "施工")))
+        self.assertTrue(os.path.isdir(os.path.join(self.target_dir, "B")))
+        self.assertFalse(os.path.exists(os.path.join(self.target_dir, "C")))
+    
+    def test_iter_hierarchy_rows_different_parents(self):
+        """测试不同上级目录的行不会沿用上一行的下级名称"""
+        source_path = os.path.join(self.temp_dir, 'levels.csv')
+        with open(source_path, 'w', encoding='utf-8', newline='') as f:
+            f.write("项目,阶段,类别\n"
+                    "A,设计,图纸\n"
+                    "B,,模型\n"
+                    ",施工,\n")
+        
+        self.assertEqual(list(iter_hierarchy_rows(source_path)),
+                         [("A", "设计", "图纸"), ("B", "", "模型"), ("B", "施工")])
+        
+        result, message = create_dirs(dir_names=None, parent_dir=self.target_dir, hierarchy_source=source_path)
+        
+        self.assertFalse(os.path.exists(os.path.join(self.target_dir, "B", "设计")))
+        self.assertTrue(os.path.isdir(os.path.join(self.target_dir, "B", "施工")))
+        self.assertIn("失败：1个", message)
+    
+    def test_plan_create(self):
+        """测试试运行标注新建、已存在和冲突"""
+        with open(os.path.join(self.target_dir, "a.txt"), 'w') as f:
+            f.write("")
+        os.makedirs(os.path.join(self.target_dir, "b.txt"))
+        
+        paths = [os.path.join(self.target_dir, name) for name in ["a.txt", "b.txt", "c.txt", "c.txt"]]
+        paths.append(os.path.join(self.temp_dir, "missing", "d.txt"))
+        plan = plan_create(paths, kind="file")
+        
+        self.assertEqual([status for _, status in plan.entries], ["exists", "conflict", "new", "conflict", "new"])
+        self.assertEqual(plan.summary(), "新建：2个，已存在：1个，冲突：2个")
+        
+        plan = plan_create([os.path.join(self.target_dir, "b.txt")], kind="dir")
+        self.assertEqual(plan.entries[0][1], "exists")
+    
     def test_rename_files(self):
         """测试文件重命名"""
         # 复制测试文件到目标目录
@@ -163,7 +575,8 @@ class TestFileUtils(unittest.TestCase):
             case_sensitive=True,
             whole_word=False,
             use_regex=False,
-            rename_scope="both"
+            rename_scope="both",
+            journal_dir=None
         )
         
         self.assertEqual(success_count, len(target_files))
@@ -178,6 +591,15 @@ class TestFileUtils(unittest.TestCase):
             self.assertFalse(os.path.exists(old_path))
             self.assertTrue(os.path.exists(new_path))
     
+    def test_rename_files_missing_path(self):
+        """测试不存在的路径被跳过"""
+        missing_path = os.path.join(self.temp_dir, "missing", "x.txt")
+        
+        renamed_count = rename_files([missing_path, self.test_files[0]], "test_file", "renamed", journal_dir=None)
+        
+        self.assertEqual(renamed_count, 1)
+        self.assertTrue(os.path.exists(os.path.join(self.source_dir, "renamed_0.txt")))
+    
     def test_move_copy_files(self):
         """测试移动/复制文件"""
         # 创建副本目录
@@ -203,6 +625,122 @@ class TestFileUtils(unittest.TestCase):
             
             self.assertTrue(os.path.exists(source_path))  # 源文件仍存在
             self.assertTrue(os.path.exists(copy_path))    # 副本已创建
+    
+    def test_rename_from_mapping(self):
+        """测试按映射文件重命名"""
+        mapping_path = os.path.join(self.temp_dir, 'mapping.csv')
+        with open(mapping_path, 'w', encoding='utf-8', newline='') as f:
+            f.write("old_name,new_name\n")
+            f.write("test_file_0.txt,mapped_0.txt\n")
+            f.write("test_file_1.txt,mapped_1.txt\n")
+            f.write("missing.txt,whatever.txt\n")
+        
+        result, message = rename_from_mapping(mapping_path, self.source_dir, skip_header=True, journal_dir=None)
+        
+        self.assertTrue(result)
+        self.assertIn("未匹配：1行", message)
+        self.assertTrue(os.path.exists(os.path.join(self.source_dir, "mapped_0.txt")))
+        self.assertTrue(os.path.exists(os.path.join(self.source_dir, "mapped_1.txt")))
+        self.assertFalse(os.path.exists(os.path.join(self.source_dir, "test_file_0.txt")))
+    
+    def test_execute_rename_plan_swap(self):
+        """测试计划内互换名称"""
+        plan = [
+            (self.source_dir, "test_file_0.txt", "test_file_1.txt"),
+            (self.source_dir, "test_file_1.txt", "test_file_0.txt"),
+            (self.source_dir, "test_file_2.txt", "test_file_3.txt"),  # 目标已存在，跳过
+        ]
+        
+        result = execute_rename_plan(plan)
+        
+        self.assertEqual(result["renamed"], 2)
+        self.assertEqual(result["skipped"], 1)
+        with open(os.path.join(self.source_dir, "test_file_0.txt"), encoding='utf-8') as f:
+            self.assertEqual(f.read(), "测试内容 1")
+        with open(os.path.join(self.source_dir, "test_file_1.txt"), encoding='utf-8') as f:
+            self.assertEqual(f.read(), "测试内容 0")
+
+    def test_execute_rename_plan_case_only(self):
+        """测试仅大小写或 Unicode 规范化形式不同的重命名"""
+        nfd_name = unicodedata.normalize('NFD', "café.txt")
+        with open(os.path.join(self.source_dir, nfd_name), 'w', encoding='utf-8') as f:
+            f.write("规范化")
+        plan = [
+            (self.source_dir, "test_file_0.txt", "Test_File_0.txt"),
+            (self.source_dir, nfd_name, unicodedata.normalize('NFC', "café.txt")),
+        ]
+
+        result = execute_rename_plan(plan)
+
+        self.assertEqual(result["renamed"], 2)
+        self.assertEqual(result["skipped"], 0)
+        names = set(os.listdir(self.source_dir))
+        self.assertIn("Test_File_0.txt", names)
+        self.assertIn(unicodedata.normalize('NFC', "café.txt"), names)
+        self.assertFalse(any(name.startswith(".~rename_") for name in names))
+
+    def test_rename_no_replace(self):
+        """测试最终重命名不会覆盖列举目录后才出现的目标"""
+        sub_dir = os.path.join(self.source_dir, "sub")
+        os.makedirs(sub_dir)
+        for src in (self.test_files[0], sub_dir):
+            with self.assertRaises(FileExistsError):
+                _rename_no_replace(src, self.test_files[1])
+            self.assertTrue(os.path.exists(src))
+        with open(self.test_files[1], encoding='utf-8') as f:
+            self.assertEqual(f.read(), "测试内容 1")
+        
+        new_path = os.path.join(self.source_dir, "renamed.txt")
+        _rename_no_replace(self.test_files[0], new_path)
+        self.assertFalse(os.path.exists(self.test_files[0]))
+        with open(new_path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), "测试内容 0")
+
+    def test_rollback_rename_journal(self):
+        """测试按撤销日志回滚重命名"""
+        journal_dir = os.path.join(self.temp_dir, 'journal')
+        
+        renamed_count = rename_files(
+            file_paths=self.test_files,
+            find_text="test_file",
+            replace_text="renamed",
+            journal_dir=journal_dir
+        )
+        self.assertEqual(renamed_count, len(self.test_files))
+        
+        result, message = rollback_rename_journal(journal_dir=journal_dir)
+        
+        self.assertTrue(result)
+        for file_path in self.test_files:
+            self.assertTrue(os.path.exists(file_path))
+        self.assertEqual(os.listdir(journal_dir), [])
+    
+    def test_rename_journal_retention(self):
+        """测试撤销日志只保留最近的若干份，且未执行任何重命名时不删除旧日志"""
+        journal_dir = os.path.join(self.temp_dir, 'journal')
+        os.makedirs(journal_dir)
+        old_journals = [f"rename_2024{i:04d}_000000_000000.jsonl" for i in range(RENAME_JOURNAL_KEEP + 2)]
+        for name in old_journals:
+            with open(os.path.join(journal_dir, name), 'w') as f:
+                f.write("")
+        
+        rename_files(self.test_files, "不存在的文本", "x", journal_dir=journal_dir)
+        self.assertEqual(sorted(os.listdir(journal_dir)), old_journals)
+        
+        rename_files(self.test_files, "test_file", "renamed", journal_dir=journal_dir)
+        journals = sorted(os.listdir(journal_dir))
+        self.assertEqual(len(journals), RENAME_JOURNAL_KEEP)
+        self.assertEqual(journals[:-1], old_journals[-(RENAME_JOURNAL_KEEP - 1):])
+        self.assertTrue(os.path.isabs(RENAME_JOURNAL_DIR))
+    
+    def test_make_renamer_scopes(self):
+        """测试重命名规则在不同范围下的计算结果"""
+        name_only = make_renamer("txt", "md", rename_scope="name_only")
+        ext_only = make_renamer("TXT", "md", case_sensitive=False, rename_scope="ext_only")
+        
+        self.assertEqual(name_only("txt_note.txt", False), "md_note.txt")
+        self.assertEqual(ext_only("txt_note.txt", False), "txt_note.md")
+        self.assertIsNone(ext_only("folder.txt", True))
 
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
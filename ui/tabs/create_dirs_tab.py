@@ -1,13 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from utils.file_utils import create_dirs
+from utils.file_utils import create_dirs, DryRunPlan, NamingRule, sequence_names, iter_names_from_file, iter_hierarchy_rows
+from utils.excel_utils import get_workbook_index, xls_support_available
 import os
+import itertools
 from tkinter import scrolledtext
 import logging
-from datetime import datetime
-import re
 
 class CreateDirsTab(ttk.Frame):
+    # 序号生成和从文件导入时预览显示的最大行数
+    PREVIEW_LIMIT = 200
+    
     def __init__(self, parent):
         super().__init__(parent)
         # 初始化日志
@@ -58,6 +61,7 @@ class CreateDirsTab(ttk.Frame):
         preview_frame = ttk.LabelFrame(main_frame, text="预览", height=150)
         preview_frame.pack(fill=tk.X, expand=False)
         preview_frame.pack_propagate(False)  # 防止子组件改变frame高度
+        self.preview_frame = preview_frame
         
         self.setup_preview_area(preview_frame)
         
@@ -85,6 +89,8 @@ class CreateDirsTab(ttk.Frame):
         ttk.Radiobutton(method_frame, text="直接输入", variable=self.input_method, value="direct", 
                        command=self.toggle_input_method).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Radiobutton(method_frame, text="从文件导入", variable=self.input_method, value="file", 
+                       command=self.toggle_input_method).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Radiobutton(method_frame, text="序号生成", variable=self.input_method, value="sequence", 
                        command=self.toggle_input_method).pack(side=tk.LEFT, padx=0)
         
         # 直接输入框架
@@ -102,6 +108,19 @@ class CreateDirsTab(ttk.Frame):
         ttk.Button(button_frame, text="从剪贴板粘贴", style="Auxiliary.TButton", command=self.paste_from_clipboard).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(button_frame, text="清空", style="Auxiliary.TButton", command=self.clear_input).pack(side=tk.LEFT, padx=0)
         
+        # 序号生成框架，名称按序号逐个生成，不经过文本框
+        self.sequence_input_frame = ttk.Frame(input_frame)
+        
+        count_frame = ttk.Frame(self.sequence_input_frame)
+        count_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(count_frame, text="生成数量:").pack(side=tk.LEFT)
+        self.sequence_count = tk.StringVar(value="100")
+        ttk.Entry(count_frame, textvariable=self.sequence_count, width=10).pack(side=tk.LEFT, padx=(5, 0))
+        
+        ttk.Label(self.sequence_input_frame, text="起始值和步长使用命名规则中的序号设置，$NAME 为序号本身",
+                 foreground="gray").pack(anchor=tk.W, pady=(0, 5))
+        
         # 从文件导入框架
         self.file_input_frame = ttk.Frame(input_frame)
         
@@ -144,6 +163,11 @@ class CreateDirsTab(ttk.Frame):
         column_entry.bind("<FocusOut>", lambda e: self.refresh_file_preview())
         self.column_index.trace_add("write", lambda *args: self.refresh_file_preview())
         
+        # 按列分级，表格的每行是一个目录路径，各列依次为各级目录
+        self.hierarchy_by_columns = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.file_input_frame, text="按列生成层级目录（第一行为表头，各列依次为各级目录，仅 CSV/XLSX）",
+                        variable=self.hierarchy_by_columns).pack(anchor=tk.W, pady=(0, 5))
+        
         # 文件预览区域
         ttk.Label(self.file_input_frame, text="文件内容预览:").pack(anchor=tk.W, pady=(5, 0))
         
@@ -221,6 +245,18 @@ class CreateDirsTab(ttk.Frame):
         
         browse_btn = ttk.Button(path_frame, text="浏览", command=self.browse_target_path, style="Auxiliary.TButton")
         browse_btn.pack(side=tk.LEFT, padx=0)
+        
+        # 结构模板，设置后在每个新建的目录下重建该目录中的子目录
+        structure_frame = ttk.Frame(output_frame)
+        structure_frame.pack(fill=tk.X, padx=10, pady=8)
+        
+        ttk.Label(structure_frame, text="结构模板:").pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.structure_source = tk.StringVar()
+        ttk.Entry(structure_frame, textvariable=self.structure_source, width=30).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
+        
+        ttk.Button(structure_frame, text="浏览", command=self.browse_structure_source, style="Auxiliary.TButton").pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(structure_frame, text="清除", command=lambda: self.structure_source.set(""), style="Auxiliary.TButton").pack(side=tk.LEFT, padx=0)
     
     def setup_preview_area(self, parent):
         """设置预览区域"""
@@ -229,8 +265,10 @@ class CreateDirsTab(ttk.Frame):
         preview_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # 预览表格
-        columns = ("序号", "原始输入", "生成目录名", "完整路径")
+        columns = ("序号", "原始输入", "生成目录名", "状态", "完整路径")
         self.preview_tree = ttk.Treeview(preview_container, columns=columns, show="headings", height=5)
+        self.preview_tree.tag_configure("conflict", foreground="red")
+        self.preview_tree.tag_configure("exists", foreground="gray")
         
         # 设置列标题
         for col in columns:
@@ -241,6 +279,8 @@ class CreateDirsTab(ttk.Frame):
                 self.preview_tree.column(col, width=150)
             elif col == "生成目录名":
                 self.preview_tree.column(col, width=180)
+            elif col == "状态":
+                self.preview_tree.column(col, width=60, stretch=False)
             else:  # 完整路径
                 self.preview_tree.column(col, width=350, stretch=True)
         
@@ -263,13 +303,29 @@ class CreateDirsTab(ttk.Frame):
     
     def toggle_input_method(self):
         """切换输入方式"""
-        if self.input_method.get() == "direct":
+        method = self.input_method.get()
+        self.direct_input_frame.pack_forget()
+        self.file_input_frame.pack_forget()
+        self.sequence_input_frame.pack_forget()
+        if method == "direct":
             self.direct_input_frame.pack(fill=tk.X, padx=5, pady=5)
-            self.file_input_frame.pack_forget()
+        elif method == "sequence":
+            self.sequence_input_frame.pack(fill=tk.X, padx=5, pady=5)
         else:
-            self.direct_input_frame.pack_forget()
             self.file_input_frame.pack(fill=tk.X, padx=5, pady=5)
     
+    def get_sequence_count(self):
+        """获取序号生成模式的数量，无效时提示并返回 None"""
+        try:
+            count = int(self.sequence_count.get())
+        except ValueError:
+            count = 0
+        if count <= 0:
+            self.logger.error("生成数量无效")
+            messagebox.showerror("错误", "生成数量必须是正整数")
+            return None
+        return count
+    
     def toggle_naming_rule(self):
         """切换命名规则"""
         if self.naming_rule.get() == "direct":
@@ -332,6 +388,14 @@ class CreateDirsTab(ttk.Frame):
             self.target_path.set(path)
             self.logger.info(f"已选择目标路径: {path}")
     
+    def browse_structure_source(self):
+        """浏览结构模板目录"""
+        self.logger.info("浏览结构模板目录")
+        path = filedialog.askdirectory()
+        if path:
+            self.structure_source.set(path)
+            self.logger.info(f"已选择结构模板目录: {path}")
+    
     def preview(self):
         """预览生成结果"""
         self.logger.info("开始预览生成结果")
@@ -340,12 +404,33 @@ class CreateDirsTab(ttk.Frame):
             for item in self.preview_tree.get_children():
                 self.preview_tree.delete(item)
             
-            # 获取输入内容
-            dir_names = self.get_input_names()
-            if not dir_names:
-                self.logger.warning("没有输入目录名称")
-                messagebox.showerror("错误", "请输入目录名称")
-                return
+            # 获取输入内容，序号生成模式在获取序号设置后生成
+            sequence_count = None
+            hierarchy_source = self.get_hierarchy_source()
+            if hierarchy_source:
+                # 按列分级时预览前若干行对应的目录路径，读完后立即关闭数据源，避免文件被占用
+                rows = iter_hierarchy_rows(hierarchy_source)
+                try:
+                    dir_names = [os.path.join(*parts) for parts in itertools.islice(rows, self.PREVIEW_LIMIT)]
+                finally:
+                    rows.close()
+                if not dir_names:
+                    self.logger.warning("层级数据源中没有数据行")
+                    messagebox.showerror("错误", "数据源中没有数据行")
+                    return
+            elif self.input_method.get() == "sequence":
+                sequence_count = self.get_sequence_count()
+                if sequence_count is None:
+                    return
+            else:
+                # 从文件导入时只预览前若干个名称
+                dir_names = self.get_input_names(lazy=True)
+                if not isinstance(dir_names, list):
+                    dir_names = list(itertools.islice(dir_names, self.PREVIEW_LIMIT))
+                if not dir_names:
+                    self.logger.warning("没有输入目录名称")
+                    messagebox.showerror("错误", "请输入目录名称")
+                    return
             
             # 获取目标路径
             target_path = self.target_path.get()
@@ -372,45 +457,32 @@ class CreateDirsTab(ttk.Frame):
                 messagebox.showerror("错误", "起始值和步长必须是整数")
                 return
             
+            # 序号生成模式只预览前若干个
+            if sequence_count is not None:
+                dir_names = list(sequence_names(min(sequence_count, self.PREVIEW_LIMIT), start_value, step))
+            
             # 禁用层级结构设置
             enable_hierarchy = False
             
-            # 获取日期信息
-            now = datetime.now()
+            # 普通预览，不处理层级，与执行时使用同一套命名规则；按列分级时不使用命名规则
+            rule = NamingRule(naming_rule, digits=3) if naming_rule and not hierarchy_source else None
+            new_names = rule.iter_names(dir_names, start_value, step) if rule else dir_names
             
-            # 普通预览，不处理层级
-            for i, name in enumerate(dir_names):
-                seq = start_value + i * step
-                seq_str = str(seq).zfill(3)
-                
-                if naming_rule:
-                    new_name = naming_rule.replace('$NAME', name)
-                    
-                    # 处理序号，支持指定位数
-                    seq_matches = re.findall(r'\$ISEQ(\d*)', new_name)
-                    for seq_match in seq_matches:
-                        if seq_match:
-                            seq_digits = int(seq_match)
-                            seq_formatted = str(seq).zfill(seq_digits)
-                            new_name = new_name.replace(f'$ISEQ{seq_match}', seq_formatted)
-                        else:
-                            new_name = new_name.replace('$ISEQ', seq_str)
-                    
-                    # 处理日期变量
-                    new_name = new_name.replace('$YYYY', now.strftime('%Y'))
-                    new_name = new_name.replace('$MM', now.strftime('%m'))
-                    new_name = new_name.replace('$DD', now.strftime('%d'))
-                else:
-                    new_name = name
-                
+            # 试运行，标注每个目录是新建、已存在还是冲突
+            plan = DryRunPlan("dir")
+            for i, (name, new_name) in enumerate(zip(dir_names, new_names)):
                 # 生成完整路径
                 full_path = os.path.join(target_path, new_name)
+                status = plan.add(full_path)
                 
-                # 添加到预览表格，使用斑马条纹
+                # 添加到预览表格，使用斑马条纹，已存在和冲突的项单独标色
                 tags = ("oddrow",) if i % 2 == 1 else ()
-                self.preview_tree.insert("", tk.END, values=(i+1, name, new_name, full_path), tags=tags)
+                if status != "new":
+                    tags += (status,)
+                self.preview_tree.insert("", tk.END, values=(i+1, name, new_name, plan.label(status), full_path), tags=tags)
             
-            self.logger.info(f"预览完成，显示了{len(dir_names)}个目录")
+            self.preview_frame.configure(text=f"预览（{plan.summary()}）")
+            self.logger.info(f"预览完成，显示了{len(dir_names)}个目录，{plan.summary()}")
         
         except Exception as e:
             self.logger.error(f"预览失败: {str(e)}")
@@ -420,12 +492,23 @@ class CreateDirsTab(ttk.Frame):
         """执行创建操作"""
         self.logger.info("开始执行创建目录")
         try:
-            # 获取输入内容
-            dir_names = self.get_input_names()
-            if not dir_names:
-                self.logger.warning("没有输入目录名称")
-                messagebox.showerror("错误", "请输入目录名称")
-                return
+            # 获取输入内容，序号生成模式在获取序号设置后生成
+            sequence_count = None
+            hierarchy_source = self.get_hierarchy_source()
+            if hierarchy_source:
+                # 按列分级时由 create_dirs 逐行读取数据源
+                dir_names = None
+            elif self.input_method.get() == "sequence":
+                sequence_count = self.get_sequence_count()
+                if sequence_count is None:
+                    return
+            else:
+                # 从文件导入时按需读取，由 create_dirs 逐个处理
+                dir_names = self.get_input_names(lazy=True)
+                if not dir_names:
+                    self.logger.warning("没有输入目录名称")
+                    messagebox.showerror("错误", "请输入目录名称")
+                    return
             
             # 获取目标路径
             target_path = self.target_path.get()
@@ -452,21 +535,30 @@ class CreateDirsTab(ttk.Frame):
                 messagebox.showerror("错误", "起始值和步长必须是整数")
                 return
             
+            # 序号生成模式按需生成名称
+            if sequence_count is not None:
+                dir_names = sequence_names(sequence_count, start_value, step)
+                dir_count = sequence_count
+            else:
+                dir_count = len(dir_names) if isinstance(dir_names, list) else "按需读取"
+            
             # 禁用层级结构
             enable_hierarchy = False
             indent_spaces = 4  # 默认值
             
             # 调用create_dirs函数创建目录
-            self.logger.info(f"开始创建目录，共{len(dir_names)}个，目标路径: {target_path}")
+            self.logger.info(f"开始创建目录，共{dir_count}个，目标路径: {target_path}")
             
             # 记录详细参数
             params = {
-                "目录数量": len(dir_names),
+                "目录数量": dir_count,
                 "目标路径": target_path,
-                "启用层级": False,
+                "启用层级": bool(hierarchy_source),
                 "命名规则": naming_rule if naming_rule else "直接命名",
                 "起始序号": start_value,
-                "序号步长": step
+                "序号步长": step,
+                "结构模板": self.structure_source.get().strip() or None,
+                "层级数据源": hierarchy_source
             }
             self.logger.info(f"创建目录参数: {params}")
             
@@ -479,7 +571,9 @@ class CreateDirsTab(ttk.Frame):
                 step=step,
                 digits=3,  # 使用默认值3
                 enable_hierarchy=False,
-                indent_spaces=4
+                indent_spaces=4,
+                structure_source=self.structure_source.get().strip() or None,
+                hierarchy_source=hierarchy_source
             )
             
             if success:
@@ -579,18 +673,17 @@ class CreateDirsTab(ttk.Frame):
             
             elif ext == '.xls':
                 try:
-                    import xlrd
-                    wb = xlrd.open_workbook(file_path)
-                    ws = wb.sheet_by_index(0)  # 获取第一个工作表
+                    # 工作簿由 excel_utils 读取并缓存，重复预览不再重新打开
+                    index = get_workbook_index(file_path)
                     
-                    # 读取前5行
-                    preview_rows = []
-                    start_row = 0
+                    # 读取第一个工作表的前5行
+                    start_row = 1
                     if skip_header:  # 如果需要跳过表头
-                        start_row = 1
+                        start_row = 2
                     
-                    for i in range(start_row, min(start_row + 5, ws.nrows)):
-                        cells = [ws.cell_value(i, j) for j in range(ws.ncols)]
+                    preview_rows = []
+                    for row in index.iter_rows(index.sheet_names[0], start_row, start_row + 4):
+                        cells = [value if value is not None else '' for value in row]
                         preview_rows.append(','.join(self._format_cell_value(c) for c in cells))
                     
                     preview_text = '\n'.join(preview_rows)
@@ -612,8 +705,12 @@ class CreateDirsTab(ttk.Frame):
             self.file_preview.insert(1.0, f"无法预览文件内容: {str(e)}")
             self.file_preview.config(state="disabled")
     
-    def get_input_names(self):
-        """获取输入的名称列表"""
+    def get_input_names(self, lazy=False):
+        """
+        获取输入的名称列表
+        
+        lazy 为 True 时从文件导入的名称以迭代器形式按需读取，不预先载入全部名称
+        """
         self.logger.info("获取输入名称列表")
         if self.input_method.get() == "direct":
             # 从文本输入获取
@@ -628,121 +725,51 @@ class CreateDirsTab(ttk.Frame):
                 self.logger.warning("未选择文件")
                 messagebox.showerror("错误", "请选择一个文件")
                 return []
+            if not os.path.isfile(file_path):
+                self.logger.warning(f"文件不存在: {file_path}")
+                messagebox.showerror("错误", "文件不存在")
+                return []
             
             # 获取文件导入类型
             import_type = self.file_import_type.get()
-            names = []
+            if import_type == '.xls' and not xls_support_available():
+                self.logger.error("未安装xlrd库，无法读取旧版Excel文件")
+                messagebox.showerror("错误", "读取.xls格式Excel文件需要安装xlrd库")
+                return []
             
             try:
                 # 从UI获取列索引和表头设置
                 column_idx = int(self.column_index.get()) - 1  # 转换为0基索引
                 has_header = self.file_has_header.get()
-                self.logger.info(f"从文件导入，文件类型: {import_type}, 列索引: {column_idx+1}, 跳过表头: {has_header}")
                 
-                if import_type == '.txt':
-                    # 尝试不同编码读取文件
-                    for encoding in ['utf-8', 'gbk', 'gb2312', 'latin-1']:
-                        try:
-                            with open(file_path, 'r', encoding=encoding) as f:
-                                lines = f.readlines()
-                                if has_header and lines:
-                                    lines = lines[1:]  # 跳过表头
-                                names = [line.strip() for line in lines if line.strip()]
-                            # 成功读取，跳出循环
-                            break
-                        except UnicodeDecodeError:
-                            continue
-                        except Exception as e:
-                            self.logger.error(f"使用{encoding}编码读取TXT文件失败: {str(e)}")
-                    
-                    if not names:
-                        self.logger.error("无法读取文件，可能是编码问题")
-                        messagebox.showerror("错误", "无法读取文件，请检查文件编码")
-                        return []
-                
-                elif import_type == '.csv':
-                    # 尝试不同编码读取CSV
-                    import csv
-                    for encoding in ['utf-8', 'gbk', 'gb2312', 'latin-1']:
-                        try:
-                            with open(file_path, 'r', encoding=encoding) as f:
-                                reader = csv.reader(f)
-                                rows = list(reader)  # 将所有行读入内存
-                                
-                                if has_header and rows:
-                                    rows = rows[1:]  # 跳过表头
-                                
-                                for row in rows:
-                                    if row and len(row) > column_idx:
-                                        name = row[column_idx].strip()
-                                        if name:
-                                            names.append(name)
-                            # 成功读取，跳出循环
-                            break
-                        except UnicodeDecodeError:
-                            continue
-                        except Exception as e:
-                            self.logger.error(f"使用{encoding}编码读取CSV文件失败: {str(e)}")
-                    
-                    if not names:
-                        self.logger.error("无法读取CSV文件")
-                        messagebox.showerror("错误", "无法读取CSV文件，请检查文件编码")
-                        return []
-                
-                elif import_type == '.xlsx':
-                    try:
-                        import openpyxl
-                        wb = openpyxl.load_workbook(file_path, read_only=True)
-                        ws = wb.active
-                        start_row = 2 if has_header else 1  # 如果有表头，从第2行开始
-                        for row in ws.iter_rows(min_row=start_row):
-                            if len(row) > column_idx:
-                                cell_value = row[column_idx].value
-                                if cell_value is not None:
-                                    formatted_value = self._format_cell_value(cell_value)
-                                    if formatted_value.strip():
-                                        names.append(formatted_value)
-                        wb.close()
-                    except ImportError:
-                        self.logger.error("未安装openpyxl库，无法读取Excel文件")
-                        messagebox.showerror("错误", "读取Excel文件需要安装openpyxl库")
-                        return []
-                    except Exception as e:
-                        self.logger.error(f"读取Excel文件失败: {str(e)}")
-                        messagebox.showerror("错误", f"读取Excel文件出错: {str(e)}")
-                        return []
-                
-                elif import_type == '.xls':
-                    try:
-                        import xlrd
-                        wb = xlrd.open_workbook(file_path)
-                        ws = wb.sheet_by_index(0)  # 获取第一个工作表
-                        
-                        start_row = 1 if has_header else 0  # 如果有表头，从第2行开始
-                        for i in range(start_row, ws.nrows):
-                            if ws.ncols > column_idx:
-                                cell_value = ws.cell_value(i, column_idx)
-                                if cell_value is not None:
-                                    formatted_value = self._format_cell_value(cell_value)
-                                    if formatted_value.strip():
-                                        names.append(formatted_value)
-                    except ImportError:
-                        self.logger.error("未安装xlrd库，无法读取旧版Excel文件")
-                        messagebox.showerror("错误", "读取.xls格式Excel文件需要安装xlrd库")
-                        return []
-                    except Exception as e:
-                        self.logger.error(f"读取Excel文件失败: {str(e)}")
-                        messagebox.showerror("错误", f"读取Excel文件出错: {str(e)}")
+                names = iter_names_from_file(file_path, import_type, column_idx, has_header)
+                if lazy:
+                    # 生成器总是为真，先取出第一个名称判断文件中是否有名称
+                    first = next(names, None)
+                    if first is None:
+                        self.logger.info(f"文件{import_type}中没有名称")
                         return []
+                    self.logger.info(f"从文件{import_type}中按需读取名称")
+                    return itertools.chain([first], names)
                 
+                names = list(names)
                 self.logger.info(f"从文件{import_type}中读取了{len(names)}个名称")
                 return names
                 
             except Exception as e:
                 self.logger.error(f"从文件获取名称失败: {str(e)}")
                 messagebox.showerror("错误", f"读取文件失败: {str(e)}")
-                return [] 
-
+                return []
+    
+    def get_hierarchy_source(self):
+        """按列生成层级目录时返回数据源路径，否则返回 None"""
+        if self.input_method.get() != "file" or not self.hierarchy_by_columns.get():
+            return None
+        file_path = self.file_path.get()
+        if os.path.splitext(file_path)[1].lower() not in ('.csv', '.xlsx', '.xlsm'):
+            return None
+        return file_path
+    
     def refresh_file_preview(self):
         """刷新文件预览"""
         self.logger.info("刷新文件预览")
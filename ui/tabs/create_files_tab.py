@@ -1,11 +1,19 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-from utils.file_utils import create_files
+from utils.file_utils import create_files, DryRunPlan, NamingRule, iter_table_rows, bind_columns, sequence_names, iter_names_from_file
+from utils.excel_utils import get_workbook_index, xls_support_available
 import os
-import csv
+import itertools
 import logging
+import re
+
+# 文件大小的分配方式：(界面显示, create_files 参数)
+ALLOCATION_LABELS = [("稀疏文件", "sparse"), ("预分配空间", "fallocate"), ("填充数据", "pattern")]
 
 class CreateFilesTab(ttk.Frame):
+    # 数据源合并、序号生成和从文件导入时预览显示的最大行数
+    PREVIEW_LIMIT = 200
+    
     def __init__(self, parent, dnd_available=True):
         super().__init__(parent)
         self.logger = logging.getLogger("create_files_tab")
@@ -63,6 +71,7 @@ class CreateFilesTab(ttk.Frame):
         preview_frame = ttk.LabelFrame(main_frame, text="预览", height=150)
         preview_frame.pack(fill=tk.X, expand=False)
         preview_frame.pack_propagate(False)  # 防止子组件改变frame高度
+        self.preview_frame = preview_frame
         
         self.setup_preview_area(preview_frame)
     
@@ -81,6 +90,10 @@ class CreateFilesTab(ttk.Frame):
         ttk.Radiobutton(method_frame, text="直接输入", variable=self.input_method, value="direct", 
                        command=self.toggle_input_method).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Radiobutton(method_frame, text="从文件导入", variable=self.input_method, value="file", 
+                       command=self.toggle_input_method).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Radiobutton(method_frame, text="数据源合并", variable=self.input_method, value="merge", 
+                       command=self.toggle_input_method).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Radiobutton(method_frame, text="序号生成", variable=self.input_method, value="sequence", 
                        command=self.toggle_input_method).pack(side=tk.LEFT, padx=0)
         
         # 直接输入框架
@@ -94,6 +107,19 @@ class CreateFilesTab(ttk.Frame):
         # 设置右键菜单
         self.setup_context_menu()
         
+        # 序号生成框架，名称按序号逐个生成，不经过文本框
+        self.sequence_input_frame = ttk.Frame(input_frame)
+        
+        count_frame = ttk.Frame(self.sequence_input_frame)
+        count_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(count_frame, text="生成数量:").pack(side=tk.LEFT)
+        self.sequence_count = tk.StringVar(value="100")
+        ttk.Entry(count_frame, textvariable=self.sequence_count, width=10).pack(side=tk.LEFT, padx=(5, 0))
+        
+        ttk.Label(self.sequence_input_frame, text="起始值和步长使用命名规则中的序号设置，$NAME 为序号本身",
+                 foreground="gray").pack(anchor=tk.W, pady=(0, 5))
+        
         # 从文件导入框架
         self.file_input_frame = ttk.Frame(input_frame)
         
@@ -183,7 +209,7 @@ class CreateFilesTab(ttk.Frame):
         self.rule_entry.insert(0, "prefix_$NAME_$ISEQ3")
         
         # 使用更紧凑的规则说明
-        tip_text = "$NAME=原名 $ISEQ=序号 $ISEQ3=固定位序号(001) $YYYY=年 $MM=月 $DD=日"
+        tip_text = "$NAME=原名 $ISEQ=序号 $ISEQ3=固定位序号(001) $YYYY=年 $MM=月 $DD=日 ${COL:列名}=数据源列"
         ttk.Label(rule_frame, text=tip_text, foreground="gray", font=("", 9)).grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=(2, 5))
         
         # 序号设置 - 全部放在一行，更紧凑
@@ -229,6 +255,37 @@ class CreateFilesTab(ttk.Frame):
         file_type_combo['values'] = ('.txt', '.md', '.html', '.css', '.js', '.py', '.json', '.xlsx', '.csv')
         file_type_combo.pack(side=tk.LEFT, padx=(0, 0))
         
+        # 模板文件，设置后每个文件都复制自该模板
+        clone_frame = ttk.Frame(output_frame)
+        clone_frame.pack(fill=tk.X, padx=10, pady=8)
+        
+        ttk.Label(clone_frame, text="模板文件:").pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.template_file = tk.StringVar()
+        ttk.Entry(clone_frame, textvariable=self.template_file, width=40).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
+        
+        ttk.Button(clone_frame, text="浏览", command=self.browse_template_file, style="Auxiliary.TButton").pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(clone_frame, text="清除", command=lambda: self.template_file.set(""), style="Auxiliary.TButton").pack(side=tk.LEFT, padx=0)
+        
+        # 文件大小，设置后按大小生成文件，可使用 ${COL:列名} 按数据源各行指定
+        size_frame = ttk.Frame(output_frame)
+        size_frame.pack(fill=tk.X, padx=10, pady=8)
+        
+        ttk.Label(size_frame, text="文件大小:").pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.file_size = tk.StringVar()
+        ttk.Entry(size_frame, textvariable=self.file_size, width=15).pack(side=tk.LEFT, padx=(0, 10))
+        
+        ttk.Label(size_frame, text="分配方式:").pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.allocation = tk.StringVar(value=ALLOCATION_LABELS[0][0])
+        allocation_combo = ttk.Combobox(size_frame, textvariable=self.allocation, width=10, state="readonly")
+        allocation_combo['values'] = [label for label, _ in ALLOCATION_LABELS]
+        allocation_combo.pack(side=tk.LEFT, padx=0)
+        
+        ttk.Label(output_frame, text="如 10MB、1.5G，数据源合并时可填 ${COL:列名}，留空则按内容生成",
+                 foreground="gray", font=("", 9)).pack(anchor=tk.W, padx=10, pady=(0, 5))
+        
         # 内容模板 - 使用分隔线增强视觉层次
         separator = ttk.Separator(output_frame, orient="horizontal")
         separator.pack(fill=tk.X, padx=5, pady=5)
@@ -250,8 +307,10 @@ class CreateFilesTab(ttk.Frame):
         preview_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # 预览表格
-        columns = ("序号", "原始名称", "文件名", "完整路径")
+        columns = ("序号", "原始名称", "文件名", "状态", "完整路径")
         self.preview_tree = ttk.Treeview(preview_container, columns=columns, show="headings", height=5)
+        self.preview_tree.tag_configure("conflict", foreground="red")
+        self.preview_tree.tag_configure("exists", foreground="gray")
         
         # 设置列标题
         for col in columns:
@@ -262,6 +321,8 @@ class CreateFilesTab(ttk.Frame):
                 self.preview_tree.column(col, width=150)
             elif col == "文件名":
                 self.preview_tree.column(col, width=200)
+            elif col == "状态":
+                self.preview_tree.column(col, width=60, stretch=False)
             else:
                 self.preview_tree.column(col, width=350)
         
@@ -369,11 +430,15 @@ class CreateFilesTab(ttk.Frame):
     def toggle_input_method(self):
         """切换输入方式"""
         self.logger.debug(f"切换输入方式: {self.input_method.get()}")
-        if self.input_method.get() == "direct":
+        method = self.input_method.get()
+        self.direct_input_frame.pack_forget()
+        self.file_input_frame.pack_forget()
+        self.sequence_input_frame.pack_forget()
+        if method == "direct":
             self.direct_input_frame.pack(fill=tk.X, padx=5, pady=5)
-            self.file_input_frame.pack_forget()
+        elif method == "sequence":
+            self.sequence_input_frame.pack(fill=tk.X, padx=5, pady=5)
         else:
-            self.direct_input_frame.pack_forget()
             self.file_input_frame.pack(fill=tk.X, padx=5, pady=5)
     
     def toggle_naming_rule(self):
@@ -547,18 +612,17 @@ class CreateFilesTab(ttk.Frame):
             
             elif ext == '.xls':
                 try:
-                    import xlrd
-                    wb = xlrd.open_workbook(file_path)
-                    ws = wb.sheet_by_index(0)  # 获取第一个工作表
+                    # 工作簿由 excel_utils 读取并缓存，重复预览不再重新打开
+                    index = get_workbook_index(file_path)
                     
-                    # 读取前5行
-                    preview_rows = []
-                    start_row = 0
+                    # 读取第一个工作表的前5行
+                    start_row = 1
                     if skip_header:  # 如果需要跳过表头
-                        start_row = 1
+                        start_row = 2
                     
-                    for i in range(start_row, min(start_row + 5, ws.nrows)):
-                        cells = [ws.cell_value(i, j) for j in range(ws.ncols)]
+                    preview_rows = []
+                    for row in index.iter_rows(index.sheet_names[0], start_row, start_row + 4):
+                        cells = [value if value is not None else '' for value in row]
                         preview_rows.append(','.join(self._format_cell_value(c) for c in cells))
                     
                     preview_text = '\n'.join(preview_rows)
@@ -586,8 +650,23 @@ class CreateFilesTab(ttk.Frame):
             self.target_path.set(path)
             self.logger.info(f"已选择目标路径: {path}")
     
-    def get_input_names(self):
-        """获取输入的名称列表"""
+    def browse_template_file(self):
+        """选择模板文件，文件类型随模板扩展名设置"""
+        self.logger.info("浏览模板文件")
+        path = filedialog.askopenfilename()
+        if path:
+            self.template_file.set(path)
+            ext = os.path.splitext(path)[1]
+            if ext:
+                self.file_type.set(ext)
+            self.logger.info(f"已选择模板文件: {path}")
+    
+    def get_input_names(self, lazy=False):
+        """
+        获取输入的名称列表
+        
+        lazy 为 True 时从文件导入的名称以迭代器形式按需读取，不预先载入全部名称
+        """
         self.logger.info("获取输入名称列表")
         if self.input_method.get() == "direct":
             # 从文本输入获取
@@ -602,105 +681,34 @@ class CreateFilesTab(ttk.Frame):
                 self.logger.warning("未选择文件")
                 messagebox.showerror("错误", "请选择一个文件")
                 return []
+            if not os.path.isfile(file_path):
+                self.logger.warning(f"文件不存在: {file_path}")
+                messagebox.showerror("错误", "文件不存在")
+                return []
             
             # 获取文件导入类型
             import_type = self.file_import_type.get()
-            names = []
+            if import_type == '.xls' and not xls_support_available():
+                self.logger.error("未安装xlrd库，无法读取旧版Excel文件")
+                messagebox.showerror("错误", "读取.xls格式Excel文件需要安装xlrd库")
+                return []
             
             try:
                 # 从UI获取列索引和表头设置
                 column_idx = int(self.column_index.get()) - 1  # 转换为0基索引
                 has_header = self.file_has_header.get()
                 
-                if import_type == '.txt':
-                    # 尝试不同编码读取文件
-                    for encoding in ['utf-8', 'gbk', 'gb2312', 'latin-1']:
-                        try:
-                            with open(file_path, 'r', encoding=encoding) as f:
-                                lines = f.readlines()
-                                if has_header and lines:
-                                    lines = lines[1:]  # 跳过表头
-                                names = [line.strip() for line in lines if line.strip()]
-                            # 成功读取，跳出循环
-                            self.logger.info(f"使用{encoding}编码成功读取TXT文件")
-                            break
-                        except UnicodeDecodeError:
-                            continue
-                        except Exception as e:
-                            self.logger.error(f"使用{encoding}编码读取TXT文件失败: {str(e)}")
-                    
-                    if not names:
-                        self.logger.error("无法以任何支持的编码方式读取TXT文件")
-                        messagebox.showerror("错误", "无法读取文件，请检查文件编码")
-                        return []
-                
-                elif import_type == '.csv':
-                    # 尝试不同编码读取CSV
-                    for encoding in ['utf-8', 'gbk', 'gb2312', 'latin-1']:
-                        try:
-                            with open(file_path, 'r', encoding=encoding) as f:
-                                reader = csv.reader(f)
-                                rows = list(reader)  # 将所有行读入内存
-                                
-                                if has_header and rows:
-                                    rows = rows[1:]  # 跳过表头
-                                
-                                for row in rows:
-                                    if row and len(row) > column_idx:
-                                        name = row[column_idx].strip()
-                                        if name:
-                                            names.append(name)
-                            # 成功读取，跳出循环
-                            self.logger.info(f"使用{encoding}编码成功读取CSV文件")
-                            break
-                        except UnicodeDecodeError:
-                            continue
-                        except Exception as e:
-                            self.logger.error(f"使用{encoding}编码读取CSV文件失败: {str(e)}")
-                    
-                    if not names:
-                        self.logger.error("无法以任何支持的编码方式读取CSV文件")
-                        messagebox.showerror("错误", "无法读取CSV文件，请检查文件编码")
-                        return []
-                
-                elif import_type == '.xlsx':
-                    try:
-                        import openpyxl
-                        wb = openpyxl.load_workbook(file_path, read_only=True)
-                        ws = wb.active
-                        start_row = 2 if has_header else 1  # 如果有表头，从第2行开始
-                        for row in ws.iter_rows(min_row=start_row):
-                            if len(row) > column_idx:
-                                cell_value = row[column_idx].value
-                                if cell_value is not None:
-                                    formatted_value = self._format_cell_value(cell_value)
-                                    if formatted_value.strip():
-                                        names.append(formatted_value)
-                        wb.close()
-                    except ImportError:
-                        self.logger.error("未安装openpyxl库，无法读取Excel文件")
-                        messagebox.showerror("错误", "读取Excel文件需要安装openpyxl库")
-                        return []
-                
-                elif import_type == '.xls':
-                    try:
-                        import xlrd
-                        wb = xlrd.open_workbook(file_path)
-                        ws = wb.sheet_by_index(0)  # 获取第一个工作表
-                        
-                        start_row = 1 if has_header else 0  # 如果有表头，从第2行开始
-                        for i in range(start_row, ws.nrows):
-                            if ws.ncols > column_idx:
-                                cell_value = ws.cell_value(i, column_idx)
-                                if cell_value is not None:
-                                    formatted_value = self._format_cell_value(cell_value)
-                                    if formatted_value.strip():
-                                        names.append(formatted_value)
-                    except ImportError:
-                        self.logger.error("未安装xlrd库，无法读取旧版Excel文件")
-                        messagebox.showerror("错误", "读取.xls格式Excel文件需要安装xlrd库")
+                names = iter_names_from_file(file_path, import_type, column_idx, has_header)
+                if lazy:
+                    # 生成器总是为真，先取出第一个名称判断文件中是否有名称
+                    first = next(names, None)
+                    if first is None:
+                        self.logger.info(f"文件{import_type}中没有名称")
                         return []
+                    self.logger.info(f"从文件{import_type}中按需读取名称")
+                    return itertools.chain([first], names)
                 
+                names = list(names)
                 self.logger.info(f"从文件{import_type}中读取了{len(names)}个名称")
                 return names
                 
@@ -717,12 +725,29 @@ class CreateFilesTab(ttk.Frame):
             for item in self.preview_tree.get_children():
                 self.preview_tree.delete(item)
             
-            # 获取输入名称
-            names = self.get_input_names()
-            if not names:
-                self.logger.warning("没有输入名称")
-                messagebox.showerror("错误", "请输入至少一个名称")
-                return
+            # 获取输入名称，数据源合并和序号生成模式在生成预览时读取
+            merge_mode = self.input_method.get() == "merge"
+            sequence_mode = self.input_method.get() == "sequence"
+            if merge_mode:
+                names = None
+                if not self.file_path.get():
+                    self.logger.warning("未选择数据源")
+                    messagebox.showerror("错误", "请选择数据源文件")
+                    return
+            elif sequence_mode:
+                names = None
+                sequence_count = self.get_sequence_count()
+                if sequence_count is None:
+                    return
+            else:
+                # 从文件导入时只预览前若干个名称
+                names = self.get_input_names(lazy=True)
+                if not isinstance(names, list):
+                    names = list(itertools.islice(names, self.PREVIEW_LIMIT))
+                if not names:
+                    self.logger.warning("没有输入名称")
+                    messagebox.showerror("错误", "请输入至少一个名称")
+                    return
             
             # 获取目标路径
             target_path = self.target_path.get()
@@ -749,59 +774,106 @@ class CreateFilesTab(ttk.Frame):
                 messagebox.showerror("错误", "序号设置必须是整数")
                 return
             
-            # 生成预览
-            from datetime import datetime
-            import re
+            # 生成预览，与执行时使用同一套命名规则
+            rule = NamingRule(naming_rule, digits=3) if naming_rule else None
+            if merge_mode:
+                names, new_names = self._merge_preview_names(rule, start_value, step)
+                if not names:
+                    messagebox.showerror("错误", "数据源中没有数据行")
+                    return
+            elif sequence_mode:
+                names = list(sequence_names(min(sequence_count, self.PREVIEW_LIMIT), start_value, step))
+                new_names = rule.iter_names(names, start_value, step) if rule else names
+            else:
+                new_names = rule.iter_names(names, start_value, step) if rule else names
             
-            for i, name in enumerate(names):
-                seq = start_value + i * step
-                seq_str = str(seq).zfill(3)
-                
-                if naming_rule:
-                    new_name = naming_rule.replace('$NAME', name)
-                    
-                    # 处理序号，支持指定位数
-                    seq_matches = re.findall(r'\$ISEQ(\d*)', new_name)
-                    for seq_match in seq_matches:
-                        if seq_match:
-                            seq_digits = int(seq_match)
-                            seq_formatted = str(seq).zfill(seq_digits)
-                            new_name = new_name.replace(f'$ISEQ{seq_match}', seq_formatted)
-                        else:
-                            new_name = new_name.replace('$ISEQ', seq_str)
-                    
-                    # 处理日期变量
-                    now = datetime.now()
-                    new_name = new_name.replace('$YYYY', now.strftime('%Y'))
-                    new_name = new_name.replace('$MM', now.strftime('%m'))
-                    new_name = new_name.replace('$DD', now.strftime('%d'))
-                else:
-                    new_name = name
-                
-                # 添加文件类型扩展名
-                filename = new_name + file_type
+            # 试运行，标注每个文件是新建、已存在还是冲突
+            plan = DryRunPlan("file")
+            for i, (name, new_name) in enumerate(zip(names, new_names)):
+                # 添加文件类型扩展名，与执行时一致
+                filename = new_name if new_name.endswith(file_type) else new_name + file_type
                 full_path = os.path.join(target_path, filename)
+                status = plan.add(full_path)
                 
-                # 添加到预览表格，使用斑马条纹
+                # 添加到预览表格，使用斑马条纹，已存在和冲突的项单独标色
                 tags = ("oddrow",) if i % 2 == 1 else ()
-                self.preview_tree.insert("", tk.END, values=(i+1, name, filename, full_path), tags=tags)
+                if status != "new":
+                    tags += (status,)
+                self.preview_tree.insert("", tk.END, values=(i+1, name, filename, plan.label(status), full_path), tags=tags)
             
-            self.logger.info(f"预览完成，显示了{len(names)}个文件")
+            self.preview_frame.configure(text=f"预览（{plan.summary()}）")
+            self.logger.info(f"预览完成，显示了{len(names)}个文件，{plan.summary()}")
         except Exception as e:
             self.logger.error(f"预览失败: {str(e)}")
             messagebox.showerror("错误", f"预览失败: {str(e)}")
     
+    def get_sequence_count(self):
+        """获取序号生成模式的数量，无效时提示并返回 None"""
+        try:
+            count = int(self.sequence_count.get())
+        except ValueError:
+            count = 0
+        if count <= 0:
+            self.logger.error("生成数量无效")
+            messagebox.showerror("错误", "生成数量必须是正整数")
+            return None
+        return count
+    
+    def _merge_preview_names(self, rule, start_value, step):
+        """读取数据源的前若干行，返回 (名称列表, 生成的文件名列表)"""
+        rows = iter_table_rows(self.file_path.get())
+        try:
+            headers = next(rows, None)
+            if not headers:
+                return [], []
+            get_columns = bind_columns(rule.columns, headers) if rule else (lambda row: ())
+            entries = list(itertools.islice(rows, self.PREVIEW_LIMIT))
+        finally:
+            rows.close()
+        
+        names = [row[0] if row else "" for row in entries]
+        if not rule:
+            return names, names
+        new_names = [rule.render(name, start_value + i * step, get_columns(row))
+                     for i, (name, row) in enumerate(zip(names, entries))]
+        self.logger.info(f"数据源合并预览，显示前{len(names)}行")
+        return names, new_names
+    
     def execute(self):
         """执行创建文件"""
         self.logger.info("开始执行创建文件")
         try:
-            # 获取输入名称
-            names = self.get_input_names()
-            if not names:
-                self.logger.warning("没有输入名称")
-                messagebox.showerror("错误", "请输入至少一个名称")
+            # 模板文件与文件大小不能同时使用，在读取名称之前检查
+            template_file = self.template_file.get().strip() or None
+            size_text = self.file_size.get().strip()
+            if template_file and size_text:
+                self.logger.warning("模板文件与文件大小同时设置")
+                messagebox.showerror("错误", "模板文件不能与文件大小同时使用，请清除其中一项")
                 return
             
+            # 获取输入名称，数据源合并模式由 create_files 逐行读取数据源，
+            # 序号生成模式在获取序号设置后生成
+            merge_source = None
+            sequence_count = None
+            if self.input_method.get() == "merge":
+                names = None
+                merge_source = self.file_path.get()
+                if not merge_source:
+                    self.logger.warning("未选择数据源")
+                    messagebox.showerror("错误", "请选择数据源文件")
+                    return
+            elif self.input_method.get() == "sequence":
+                sequence_count = self.get_sequence_count()
+                if sequence_count is None:
+                    return
+            else:
+                # 从文件导入时按需读取，由 create_files 逐个处理
+                names = self.get_input_names(lazy=True)
+                if not names:
+                    self.logger.warning("没有输入名称")
+                    messagebox.showerror("错误", "请输入至少一个名称")
+                    return
+            
             # 获取目标路径
             target_path = self.target_path.get()
             if not target_path:
@@ -830,23 +902,51 @@ class CreateFilesTab(ttk.Frame):
                 messagebox.showerror("错误", "序号设置必须是整数")
                 return
             
-            # 获取内容模板
+            if sequence_count is not None:
+                names = sequence_names(sequence_count, start_value, step)
+            
+            # 获取内容模板，使用模板文件或指定文件大小时忽略
             content_template = self.content_template.get(1.0, tk.END)
-            if content_template.strip():
+            if template_file:
+                content_mode = "模板文件"
+                self.logger.info(f"使用模板文件: {template_file}")
+            elif size_text:
+                content_mode = "指定大小"
+            elif content_template.strip():
+                content_mode = "内容模板"
                 self.logger.info(f"使用内容模板，长度: {len(content_template)}")
+            else:
+                content_mode = "空文件"
+            
+            # 获取文件大小，${COL:列名} 表示按数据源各行指定
+            file_size = size_column = None
+            column_match = re.fullmatch(r'\$\{COL:([^}]*)\}', size_text)
+            if column_match:
+                size_column = column_match.group(1)
+            elif size_text:
+                file_size = size_text
+            allocation = dict(ALLOCATION_LABELS)[self.allocation.get()]
             
             # 调用创建文件函数
-            self.logger.info(f"开始创建文件，共{len(names)}个，目标路径: {target_path}")
+            if sequence_count is not None:
+                file_count = sequence_count
+            else:
+                file_count = len(names) if isinstance(names, list) else "按需读取"
+            self.logger.info(f"开始创建文件，共{file_count}个，目标路径: {target_path}")
             
             # 记录详细参数
             params = {
-                "文件数量": len(names),
+                "文件数量": file_count,
+                "数据源": merge_source,
                 "目标路径": target_path,
                 "文件类型": file_type,
                 "命名规则": naming_rule if naming_rule else "直接命名",
                 "起始序号": start_value,
                 "序号步长": step,
-                "使用模板": bool(content_template.strip())
+                "文件内容": content_mode,
+                "模板文件": template_file,
+                "文件大小": size_text or None,
+                "分配方式": self.allocation.get()
             }
             self.logger.info(f"创建文件参数: {params}")
             
@@ -858,7 +958,12 @@ class CreateFilesTab(ttk.Frame):
                 naming_rule=naming_rule,
                 start_value=start_value,
                 step=step,
-                digits=3  # 使用默认值3
+                digits=3,  # 使用默认值3
+                merge_source=merge_source,
+                template_file=template_file,
+                file_size=file_size,
+                size_column=size_column,
+                allocation=allocation
             )
             
             if success:
@@ -1,19 +1,44 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from utils.file_utils import rename_files
+from utils.file_utils import rename_files, rename_from_mapping, rollback_rename_journal, make_renamer
 import os
+import re
+import time
+import queue
+import bisect
+import threading
 import logging
 
 class RenameTab(ttk.Frame):
+    PREVIEW_DEBOUNCE_MS = 300   # 输入停止多久后刷新预览
+    PREVIEW_POLL_MS = 50        # 轮询后台结果的间隔
+    PREVIEW_BATCH_SIZE = 500    # 每批推送到界面的行数
+    
     def __init__(self, parent):
         super().__init__(parent)
         self.parent = parent
         self.files_to_rename = []  # 存储选中的文件路径列表
+        self._is_dir_cache = {}    # 路径 -> 是否为文件夹，避免每次预览都访问磁盘
+        
+        # 后台预览状态
+        self._preview_queue = queue.Queue()
+        self._preview_generation = 0
+        self._preview_after_id = None
+        self._preview_polling = False
+        self._preview_busy = False
+        self._preview_explicit = False
+        self._preview_rows = {}    # 序号 -> 当前显示的行内容
+        self._preview_order = []   # 当前显示的序号（有序）
         
         self.logger = logging.getLogger("rename_tab")
         self.logger.debug("初始化重命名标签页")
         self.setup_ui()
         
+        # 规则变化时自动刷新预览
+        for var in (self.find_text, self.replace_text, self.case_sensitive,
+                    self.whole_word, self.use_regex, self.rename_scope):
+            var.trace_add("write", self._schedule_live_preview)
+        
     def setup_ui(self):
         """设置UI布局"""
         # 主框架
@@ -70,7 +95,15 @@ class RenameTab(ttk.Frame):
         
         # 清空选择按钮
         clear_btn = ttk.Button(btn_container, text="清空选择", command=self.clear_selection, style="Auxiliary.TButton")
-        clear_btn.pack(side=tk.LEFT, padx=0)
+        clear_btn.pack(side=tk.LEFT, padx=(0, 5))
+        
+        # 按映射文件重命名按钮
+        mapping_btn = ttk.Button(btn_container, text="映射文件重命名", command=self.rename_by_mapping, style="Auxiliary.TButton")
+        mapping_btn.pack(side=tk.LEFT, padx=(0, 5))
+        
+        # 撤销上次重命名按钮
+        undo_btn = ttk.Button(btn_container, text="撤销上次重命名", command=self.undo_last_rename, style="Auxiliary.TButton")
+        undo_btn.pack(side=tk.LEFT, padx=0)
         
         # 添加提示标签
         tip_label = ttk.Label(button_frame, text="提示: 可反复点击添加文件/文件夹按钮添加多个项目", foreground="gray", font=("", 8))
@@ -258,6 +291,8 @@ class RenameTab(ttk.Frame):
         
         # 添加到文件列表
         self.files_to_rename.append(filepath)
+        self._is_dir_cache[filepath] = False
+        self._schedule_live_preview()
     
     def _add_folder_to_tree(self, folder_path):
         """添加文件夹到文件列表"""
@@ -283,11 +318,15 @@ class RenameTab(ttk.Frame):
         
         # 添加到文件列表
         self.files_to_rename.append(folder_path)
+        self._is_dir_cache[folder_path] = True
+        self._schedule_live_preview()
     
     def clear_selection(self):
         """清空选择按钮回调"""
         self.files_tree.delete(*self.files_tree.get_children())
         self.files_to_rename = []
+        self._is_dir_cache = {}
+        self._clear_preview()
         self.logger.info("已清空所有选择的文件")
     
     def show_context_menu(self, event):
@@ -338,196 +377,219 @@ class RenameTab(ttk.Frame):
         
         item_type = "项目" if removed_count > 0 else "文件或文件夹"
         self.logger.info(f"已移除 {removed_count} 个{item_type}")
+        self._schedule_live_preview()
     
     def preview(self):
-        """预览重命名操作"""
+        """预览重命名操作（立即在后台重新计算）"""
         if not self.files_to_rename:
             messagebox.showinfo("提示", "请先选择要重命名的文件或文件夹")
             return
         
-        find_text = self.find_text.get()
-        if not find_text:
+        if not self.find_text.get():
             messagebox.showinfo("提示", "请输入要查找的文本")
             return
         
-        # 获取重命名参数
-        replace_text = self.replace_text.get()
-        case_sensitive = self.case_sensitive.get()
-        whole_word = self.whole_word.get()
-        use_regex = self.use_regex.get()
-        rename_scope = self.rename_scope.get()
+        self.logger.info(f"开始预览重命名，查找文本：'{self.find_text.get()}'，替换为：'{self.replace_text.get()}'，范围：{self.rename_scope.get()}")
+        self.logger.info(f"参数：区分大小写={self.case_sensitive.get()}，全词匹配={self.whole_word.get()}，使用正则={self.use_regex.get()}")
         
-        self.logger.info(f"开始预览重命名，查找文本：'{find_text}'，替换为：'{replace_text}'，范围：{rename_scope}")
-        self.logger.info(f"参数：区分大小写={case_sensitive}，全词匹配={whole_word}，使用正则={use_regex}")
+        self._start_preview_worker(explicit=True)
+    
+    def _schedule_live_preview(self, *args):
+        """规则或文件列表变化时，防抖后在后台刷新预览"""
+        if self._preview_after_id is not None:
+            self.after_cancel(self._preview_after_id)
+        self._preview_after_id = self.after(self.PREVIEW_DEBOUNCE_MS, self._start_preview_worker)
+    
+    def _start_preview_worker(self, explicit=False):
+        """启动后台预览计算，旧的计算会因代数变化自动放弃"""
+        if self._preview_after_id is not None:
+            self.after_cancel(self._preview_after_id)
+            self._preview_after_id = None
         
-        # 清空预览表格
-        self.preview_tree.delete(*self.preview_tree.get_children())
+        self._preview_generation += 1
+        generation = self._preview_generation
         
-        try:
-            # 获取所有重命名预览信息
-            for i, file_path in enumerate(self.files_to_rename, 1):
-                # 判断是文件还是文件夹
-                is_dir = os.path.isdir(file_path)
-                dirname = os.path.dirname(file_path)
-                filename = os.path.basename(file_path)
-                
-                if is_dir:
-                    # 如果是文件夹，且选择了只修改扩展名，则跳过
-                    if rename_scope == "ext_only":
-                        self.logger.debug(f"文件夹不支持仅修改扩展名，跳过：{file_path}")
-                        continue
-                        
-                    # 处理文件夹名称
-                    if not use_regex:
-                        if case_sensitive:
-                            if whole_word:
-                                import re
-                                folder_pattern = r'\b' + re.escape(find_text) + r'\b'
-                                new_name = re.sub(folder_pattern, replace_text, filename)
-                            else:
-                                new_name = filename.replace(find_text, replace_text)
-                        else:
-                            if whole_word:
-                                import re
-                                folder_pattern = r'\b' + re.escape(find_text) + r'\b'
-                                new_name = re.sub(folder_pattern, replace_text, filename, flags=re.IGNORECASE)
-                            else:
-                                new_name = self._replace_case_insensitive(filename, find_text, replace_text)
-                    else:
-                        # 使用正则表达式
-                        import re
-                        flags = 0 if case_sensitive else re.IGNORECASE
-                        new_name = re.sub(find_text, replace_text, filename, flags=flags)
-                    
-                    # 如果文件夹名称没有变化，则跳过
-                    if new_name == filename:
-                        continue
-                    
-                    # 添加到预览表格
-                    self.preview_tree.insert("", tk.END, values=(i, filename, new_name, dirname))
-                    self.logger.debug(f"添加文件夹重命名预览：{filename} -> {new_name}")
+        renamer = self._make_preview_renamer(explicit)
+        if renamer is None:
+            return
+        
+        # 在Tk线程中取快照，后台线程只读写这些副本
+        paths = list(self.files_to_rename)
+        shown_rows = dict(self._preview_rows)
+        is_dir_cache = dict(self._is_dir_cache)
+        self._preview_explicit = explicit
+        self._preview_busy = True
+        
+        threading.Thread(
+            target=self._preview_worker,
+            args=(generation, paths, renamer, shown_rows, is_dir_cache),
+            daemon=True
+        ).start()
+        
+        if not self._preview_polling:
+            self._preview_polling = True
+            self.after(self.PREVIEW_POLL_MS, self._drain_preview_queue)
+    
+    def _make_preview_renamer(self, explicit):
+        """按当前规则生成重命名函数；没有可预览的内容或规则无效时返回 None"""
+        find_text = self.find_text.get()
+        if not self.files_to_rename or not find_text:
+            self._clear_preview()
+            # 实时预览时规则尚未填写完整属正常情况，仅显式预览时提示
+            if explicit:
+                if not self.files_to_rename:
+                    messagebox.showinfo("提示", "请先选择要重命名的文件或文件夹")
                 else:
-                    # 处理文件
-                    # 分离文件名和扩展名
-                    name_part, ext_part = os.path.splitext(filename)
-                    
-                    # 根据应用范围确定要替换的部分
-                    if rename_scope == "name_only":
-                        # 只替换文件名部分
-                        if not use_regex:
-                            if case_sensitive:
-                                if whole_word:
-                                    # 全词匹配需要考虑边界
-                                    import re
-                                    name_pattern = r'\b' + re.escape(find_text) + r'\b'
-                                    new_name = re.sub(name_pattern, replace_text, name_part)
-                                else:
-                                    new_name = name_part.replace(find_text, replace_text)
-                            else:
-                                if whole_word:
-                                    import re
-                                    name_pattern = r'\b' + re.escape(find_text) + r'\b'
-                                    new_name = re.sub(name_pattern, replace_text, name_part, flags=re.IGNORECASE)
-                                else:
-                                    new_name = self._replace_case_insensitive(name_part, find_text, replace_text)
-                        else:
-                            # 使用正则表达式
-                            import re
-                            flags = 0 if case_sensitive else re.IGNORECASE
-                            new_name = re.sub(find_text, replace_text, name_part, flags=flags)
-                        
-                        new_filename = new_name + ext_part
-                    
-                    elif rename_scope == "ext_only":
-                        # 只替换扩展名部分（不包括点）
-                        ext_to_replace = ext_part[1:] if ext_part else ""
-                        
-                        if not use_regex:
-                            if case_sensitive:
-                                if whole_word:
-                                    import re
-                                    ext_pattern = r'\b' + re.escape(find_text) + r'\b'
-                                    new_ext = re.sub(ext_pattern, replace_text, ext_to_replace)
-                                else:
-                                    new_ext = ext_to_replace.replace(find_text, replace_text)
-                            else:
-                                if whole_word:
-                                    import re
-                                    ext_pattern = r'\b' + re.escape(find_text) + r'\b'
-                                    new_ext = re.sub(ext_pattern, replace_text, ext_to_replace, flags=re.IGNORECASE)
-                                else:
-                                    new_ext = self._replace_case_insensitive(ext_to_replace, find_text, replace_text)
-                        else:
-                            # 使用正则表达式
-                            import re
-                            flags = 0 if case_sensitive else re.IGNORECASE
-                            new_ext = re.sub(find_text, replace_text, ext_to_replace, flags=flags)
-                        
-                        new_filename = name_part + ("." + new_ext if new_ext else "")
-                    
-                    else:  # "both"
-                        # 替换整个文件名
-                        if not use_regex:
-                            if case_sensitive:
-                                if whole_word:
-                                    import re
-                                    filename_pattern = r'\b' + re.escape(find_text) + r'\b'
-                                    new_filename = re.sub(filename_pattern, replace_text, filename)
-                                else:
-                                    new_filename = filename.replace(find_text, replace_text)
-                            else:
-                                if whole_word:
-                                    import re
-                                    filename_pattern = r'\b' + re.escape(find_text) + r'\b'
-                                    new_filename = re.sub(filename_pattern, replace_text, filename, flags=re.IGNORECASE)
-                                else:
-                                    new_filename = self._replace_case_insensitive(filename, find_text, replace_text)
-                        else:
-                            # 使用正则表达式
-                            import re
-                            flags = 0 if case_sensitive else re.IGNORECASE
-                            new_filename = re.sub(find_text, replace_text, filename, flags=flags)
-                    
-                    if new_filename == filename:
-                        continue
-                    
-                    # 添加到预览表格
-                    self.preview_tree.insert("", tk.END, values=(i, filename, new_filename, dirname))
-                
-            if not self.preview_tree.get_children():
-                messagebox.showinfo("提示", "没有文件或文件夹需要重命名，请检查您的查找条件")
-            else:
-                self.logger.info(f"已预览 {len(self.preview_tree.get_children())} 个项目的重命名操作")
+                    messagebox.showinfo("提示", "请输入要查找的文本")
+            return None
         
+        try:
+            return make_renamer(
+                find_text,
+                self.replace_text.get(),
+                self.case_sensitive.get(),
+                self.whole_word.get(),
+                self.use_regex.get(),
+                self.rename_scope.get()
+            )
+        except re.error as e:
+            # 正则表达式尚未输入完整时不打扰用户，仅显式预览时提示
+            self.logger.debug(f"正则表达式无效：{str(e)}")
+            self._preview_busy = False
+            if explicit:
+                messagebox.showerror("错误", f"正则表达式无效: {str(e)}")
+            return None
+    
+    def _compute_preview_changes(self, generation, paths, renamer, shown_rows, is_dir_cache):
+        """计算新名称，并与当前显示内容比较，返回变化的行；计算已过期时返回 None"""
+        rows = {}
+        for i, file_path in enumerate(paths, 1):
+            if i % 1000 == 0 and generation != self._preview_generation:
+                return None  # 用户继续输入，本次计算已过期
+            
+            is_dir = is_dir_cache.get(file_path)
+            if is_dir is None:
+                is_dir = os.path.isdir(file_path)
+                is_dir_cache[file_path] = is_dir
+            
+            filename = os.path.basename(file_path)
+            new_name = renamer(filename, is_dir)
+            if new_name is None or new_name == filename:
+                continue
+            rows[i] = (i, filename, new_name, os.path.dirname(file_path))
+        
+        changes = [(index, values) for index, values in rows.items() if shown_rows.get(index) != values]
+        changes.extend((index, None) for index in shown_rows if index not in rows)
+        return changes
+    
+    def _preview_worker(self, generation, paths, renamer, shown_rows, is_dir_cache):
+        """后台线程：计算变化的行并分批推送，最后推送更新后的文件夹缓存"""
+        try:
+            changes = self._compute_preview_changes(generation, paths, renamer, shown_rows, is_dir_cache)
+            if changes is None:
+                return
+            
+            for start in range(0, len(changes), self.PREVIEW_BATCH_SIZE):
+                if generation != self._preview_generation:
+                    return
+                self._preview_queue.put((generation, changes[start:start + self.PREVIEW_BATCH_SIZE]))
+            self._preview_queue.put((generation, is_dir_cache))
         except Exception as e:
             self.logger.error(f"预览重命名操作时出错: {str(e)}")
-            messagebox.showerror("错误", f"预览重命名操作时出错: {str(e)}")
+            self._preview_queue.put((generation, e))
+    
+    def _preview_now(self):
+        """在Tk线程中立即计算预览，用于执行前刷新尚未开始的防抖预览"""
+        self.after_cancel(self._preview_after_id)
+        self._preview_after_id = None
+        self._preview_generation += 1
+        
+        renamer = self._make_preview_renamer(explicit=True)
+        if renamer is None:
+            return False
+        
+        changes = self._compute_preview_changes(
+            self._preview_generation, list(self.files_to_rename), renamer,
+            dict(self._preview_rows), self._is_dir_cache
+        )
+        self._apply_preview_changes(changes)
+        return True
     
-    def _replace_case_insensitive(self, text, find, replace):
-        """不区分大小写的文本替换"""
-        index = 0
-        result = ""
-        find_lower = find.lower()
-        text_lower = text.lower()
-        
-        while index < len(text):
-            match_index = text_lower.find(find_lower, index)
-            if match_index == -1:
-                # 没有更多匹配
-                result += text[index:]
+    def _drain_preview_queue(self):
+        """Tk线程：分批把后台结果应用到预览表格"""
+        deadline = time.monotonic() + 0.03  # 每次最多占用约30ms，保持界面响应
+        while time.monotonic() < deadline:
+            try:
+                generation, batch = self._preview_queue.get_nowait()
+            except queue.Empty:
                 break
             
-            # 添加匹配前的文本
-            result += text[index:match_index]
-            # 添加替换文本
-            result += replace
-            # 更新索引
-            index = match_index + len(find)
-        
-        return result
+            if generation != self._preview_generation:
+                continue  # 丢弃过期结果
+            
+            if isinstance(batch, dict):
+                # 完成标记附带后台线程更新过的文件夹缓存，在Tk线程中合并
+                self._is_dir_cache.update(batch)
+                self._finish_preview()
+            elif isinstance(batch, Exception):
+                self._preview_busy = False
+                if self._preview_explicit:
+                    messagebox.showerror("错误", f"预览重命名操作时出错: {str(batch)}")
+            else:
+                self._apply_preview_changes(batch)
+        
+        if self._preview_busy or not self._preview_queue.empty():
+            self.after(self.PREVIEW_POLL_MS, self._drain_preview_queue)
+        else:
+            self._preview_polling = False
+    
+    def _apply_preview_changes(self, changes):
+        """按序号更新、插入或删除预览行"""
+        for index, values in changes:
+            iid = str(index)
+            if values is None:
+                if index in self._preview_rows:
+                    del self._preview_rows[index]
+                    del self._preview_order[bisect.bisect_left(self._preview_order, index)]
+                    self.preview_tree.delete(iid)
+            elif index in self._preview_rows:
+                self._preview_rows[index] = values
+                self.preview_tree.item(iid, values=values)
+            else:
+                position = bisect.bisect_left(self._preview_order, index)
+                self._preview_order.insert(position, index)
+                self._preview_rows[index] = values
+                self.preview_tree.insert("", position, iid=iid, values=values)
+    
+    def _finish_preview(self):
+        """后台预览完成"""
+        self._preview_busy = False
+        if not self._preview_rows:
+            if self._preview_explicit:
+                messagebox.showinfo("提示", "没有文件或文件夹需要重命名，请检查您的查找条件")
+        else:
+            self.logger.info(f"已预览 {len(self._preview_rows)} 个项目的重命名操作")
+        self._preview_explicit = False
+    
+    def _clear_preview(self):
+        """清空预览表格及其状态"""
+        self._preview_generation += 1
+        self._preview_busy = False
+        self._preview_rows = {}
+        self._preview_order = []
+        self.preview_tree.delete(*self.preview_tree.get_children())
     
     def execute(self):
         """执行重命名操作"""
+        if self._preview_busy:
+            messagebox.showinfo("提示", "预览正在计算中，请稍候再执行")
+            return
+        
+        # 规则刚修改、防抖预览尚未开始时，先按当前规则刷新预览，避免按旧预览执行；
+        # 规则不完整或无效时 _preview_now 已提示原因
+        if self._preview_after_id is not None and not self._preview_now():
+            return
+        
         # 获取预览中的项目
         preview_items = self.preview_tree.get_children()
         if not preview_items:
@@ -580,12 +642,64 @@ class RenameTab(ttk.Frame):
             self.refresh_file_list()
         
             # 清空预览
-            self.preview_tree.delete(*self.preview_tree.get_children())
+            self._clear_preview()
             
         except Exception as e:
             self.logger.error(f"执行重命名操作时出错: {str(e)}")
             messagebox.showerror("错误", f"执行重命名操作时出错: {str(e)}")
     
+    def rename_by_mapping(self):
+        """按映射文件(原名称,新名称)批量重命名目录中的项目"""
+        try:
+            mapping_path = filedialog.askopenfilename(
+                title="选择映射文件",
+                filetypes=[("映射文件", "*.csv *.xlsx"), ("CSV文件", "*.csv"), ("Excel文件", "*.xlsx"), ("所有文件", "*.*")]
+            )
+            if not mapping_path:
+                return
+            
+            target_dir = filedialog.askdirectory(title="选择要重命名的项目所在文件夹")
+            if not target_dir:
+                return
+            
+            skip_header = messagebox.askyesno("表头", "映射文件第一行是否为表头行？")
+            if not messagebox.askyesno("确认", f"确定要按映射文件重命名以下文件夹中的项目吗？\n{target_dir}"):
+                return
+            
+            self.logger.info(f"按映射文件重命名：{mapping_path}，目标文件夹：{target_dir}")
+            success, message = rename_from_mapping(mapping_path, target_dir, skip_header=skip_header)
+            
+            if success:
+                messagebox.showinfo("完成", message)
+            else:
+                messagebox.showerror("错误", message)
+            
+            # 刷新文件列表
+            self.refresh_file_list()
+        except Exception as e:
+            self.logger.error(f"按映射文件重命名时出错: {str(e)}")
+            messagebox.showerror("错误", f"按映射文件重命名时出错: {str(e)}")
+    
+    def undo_last_rename(self):
+        """按最近一次的撤销日志回滚重命名"""
+        if not messagebox.askyesno("确认", "确定要撤销最近一次批量重命名吗？"):
+            return
+        
+        try:
+            success, message = rollback_rename_journal()
+            
+            if success:
+                messagebox.showinfo("完成", message)
+                self.logger.info(f"撤销重命名完成：{message}")
+            else:
+                messagebox.showinfo("提示", message)
+            
+            # 清空列表和预览，原路径可能已经变化
+            self.clear_selection()
+        except Exception as e:
+            self.logger.error(f"撤销重命名时出错: {str(e)}")
+            messagebox.showerror("错误", f"撤销重命名时出错: {str(e)}")
+    
     def refresh_file_list(self):
         """刷新文件列表，移除不存在的文件和文件夹"""
         # 清空现有列表
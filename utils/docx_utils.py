@@ -0,0 +1,105 @@
+import io
+import zipfile
+from xml.sax.saxutils import escape as xml_escape
+from .excel_utils import ILLEGAL_XML_CHARS_RE
+
+# 包内所有条目使用固定时间，保证相同内容在任何机器上生成相同的文件
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+
+ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+DOCUMENT_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+)
+
+DOCUMENT_TAIL = (
+    '<w:sectPr><w:pgSz w:w="11906" w:h="16838"/>'
+    '<w:pgMar w:top="1440" w:right="1800" w:bottom="1440" w:left="1800" '
+    'w:header="851" w:footer="992" w:gutter="0"/></w:sectPr>'
+    '</w:body></w:document>'
+)
+
+DOCUMENT_PATH = 'word/document.xml'
+
+def _zip_info(name):
+    info = zipfile.ZipInfo(name, ZIP_DATE_TIME)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.external_attr = 0o644 << 16
+    return info
+
+def _build_base_package():
+    """预先生成只缺正文的基础包，每个文档只需追加 document.xml"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as package:
+        package.writestr(_zip_info('[Content_Types].xml'), CONTENT_TYPES_XML)
+        package.writestr(_zip_info('_rels/.rels'), ROOT_RELS_XML)
+    return buffer.getvalue()
+
+_BASE_PACKAGE = _build_base_package()
+
+def paragraph_xml(text):
+    """生成单个段落的 XML"""
+    if ILLEGAL_XML_CHARS_RE.search(text):
+        raise ValueError(f"段落包含非法字符：{text!r}")
+    if not text:
+        return '<w:p/>'
+    space = ' xml:space="preserve"' if text != text.strip() else ''
+    return f'<w:p><w:r><w:t{space}>{xml_escape(text)}</w:t></w:r></w:p>'
+
+def render_document_xml(paragraphs):
+    """
+    生成 document.xml 内容
+
+    参数:
+    - paragraphs: 段落文本列表
+    """
+    body = ''.join(paragraph_xml(text) for text in paragraphs)
+    return DOCUMENT_HEAD + body + DOCUMENT_TAIL
+
+def build_docx(paragraphs):
+    """
+    生成 docx 文件内容
+
+    参数:
+    - paragraphs: 段落文本列表
+
+    返回 docx 文件的字节内容，相同输入总是得到相同输出
+    """
+    buffer = io.BytesIO(_BASE_PACKAGE)
+    with zipfile.ZipFile(buffer, 'a') as package:
+        package.writestr(_zip_info(DOCUMENT_PATH), render_document_xml(paragraphs).encode('utf-8'))
+    return buffer.getvalue()
+
+def text_to_paragraphs(content):
+    """将文本内容拆分为段落，每个非空行一个段落"""
+    return [line for line in content.split('\n') if line.strip()] if content else []
+
+def write_docx(file_path, content=""):
+    """
+    写入 docx 文件
+
+    参数:
+    - file_path: 文件路径
+    - content: 文本内容，每个非空行生成一个段落
+    """
+    data = build_docx(text_to_paragraphs(content))
+    with open(file_path, 'wb') as f:
+        f.write(data)
@@ -1,6 +1,23 @@
 import os
+import io
+import re
+import html
+import copy
+import functools
+import importlib.util
+import shutil
+import struct
+import tempfile
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
 import openpyxl
 from datetime import datetime
+from xml.sax.saxutils import escape as xml_escape, quoteattr
+from openpyxl.utils import get_column_letter, column_index_from_string
+from openpyxl.utils.cell import range_boundaries
+from openpyxl.utils.datetime import from_excel, CALENDAR_WINDOWS_1900, CALENDAR_MAC_1904
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
 from utils.log_utils import setup_logger, log_exception, log_operation_start, log_operation_end, log_file_operation, log_validation_result
 
 # 使用统一的日志工具创建logger
@@ -15,6 +32,9 @@ def create_sheets(workbook_path, sheet_names, title_row=None, header_row=None):
         sheet_names: 工作表名称列表
         title_row: 标题行内容
         header_row: 表头行内容
+
+    不经过 openpyxl 对象模型，由 XlsxBookWriter 直接生成 xlsx 包，各工作表依次写入文件，
+    内存占用不随工作表数量增长；目标文件已存在时只追加新的工作表条目，原有条目原样复制
     """
     log_operation_start(logger, "创建工作表", {
         "workbook_path": workbook_path,
@@ -29,20 +49,21 @@ def create_sheets(workbook_path, sheet_names, title_row=None, header_row=None):
     try:
         # 检查文件是否存在
         if os.path.exists(workbook_path):
-            # 打开现有工作簿
-            wb = openpyxl.load_workbook(workbook_path)
+            # 现有工作簿只读取工作表名称，Excel 比较工作表名称时不区分大小写
+            exists = True
+            existing_names = {name.casefold() for name in read_package_sheet_names(workbook_path)}
             logger.info(f"打开现有工作簿: {workbook_path}")
         else:
-            # 创建新工作簿
-            wb = openpyxl.Workbook()
-            # 删除默认创建的工作表
-            wb.remove(wb.active)
+            exists = False
+            existing_names = set()
             logger.info(f"创建新工作簿: {workbook_path}")
-            # 记录文件创建操作
-            log_file_operation(logger, "创建", workbook_path)
         
         # 记录现有工作表
-        logger.debug(f"当前工作簿中的工作表: {wb.sheetnames}")
+        logger.debug(f"当前工作簿中的工作表: {sorted(existing_names)}")
+        
+        # 每个工作表写入相同的标题行和表头行
+        rows = sheet_header_rows(title_row, header_row)
+        new_sheets = []
         
         # 处理每个工作表名称
         for sheet_name in sheet_names:
@@ -67,31 +88,26 @@ def create_sheets(workbook_path, sheet_names, title_row=None, header_row=None):
                 fail_count += 1
                 continue
             
-            # 检查工作表是否已存在
-            if sheet_name in wb.sheetnames:
+            # 检查工作表是否已存在（不区分大小写）
+            if sheet_name.casefold() in existing_names:
                 logger.warning(f"工作表已存在: {sheet_name}")
                 fail_count += 1
                 continue
+            existing_names.add(sheet_name.casefold())
+            new_sheets.append(sheet_name)
             
-            # 创建工作表
-            ws = wb.create_sheet(sheet_name)
             logger.info(f"创建工作表: {sheet_name}")
             
-            # 添加标题行
-            if title_row:
-                ws['A1'] = title_row
-                logger.debug(f"为工作表 {sheet_name} 添加标题行: {title_row}")
-            
-            # 添加表头行
-            if header_row:
-                for col, value in enumerate(header_row, 1):
-                    ws.cell(row=2 if title_row else 1, column=col, value=value)
-                logger.debug(f"为工作表 {sheet_name} 添加表头行: {header_row}")
-            
             success_count += 1
         
-        # 保存工作簿
-        wb.save(workbook_path)
+        # 保存工作簿，在确定全部工作表后一次写出
+        if exists:
+            if new_sheets:
+                append_sheets_to_workbook(workbook_path, new_sheets, rows)
+        else:
+            write_new_workbook(workbook_path, new_sheets, rows)
+            # 记录文件创建操作
+            log_file_operation(logger, "创建", workbook_path)
         logger.info(f"保存工作簿: {workbook_path}")
         
         log_operation_end(logger, "创建工作表", "成功", success_count, fail_count)
@@ -102,6 +118,566 @@ def create_sheets(workbook_path, sheet_names, title_row=None, header_row=None):
         log_operation_end(logger, "创建工作表", "失败", success_count, fail_count)
         return False, f"创建工作表失败: {str(e)}"
 
+def sheet_header_rows(title_row=None, header_row=None):
+    """
+    生成新工作表开头的行
+
+    Args:
+        title_row: 标题行内容，写入 A1
+        header_row: 表头行内容，紧接标题行之后
+
+    Returns:
+        行列表，每行为单元格值列表
+    """
+    rows = []
+    if title_row:
+        rows.append([title_row])
+    if header_row:
+        rows.append(list(header_row))
+    return rows
+
+def write_new_workbook(workbook_path, sheet_names, rows=()):
+    """
+    直接生成包含指定工作表的新工作簿
+
+    Args:
+        workbook_path: 目标文件路径
+        sheet_names: 工作表名称列表，至少一个
+        rows: 每个工作表开头写入的行
+    """
+    if not sheet_names:
+        raise ValueError("工作簿中至少需要一个工作表")
+    try:
+        with XlsxBookWriter(workbook_path) as writer:
+            for sheet_name in sheet_names:
+                writer.add_sheet(sheet_name, rows)
+    except Exception:
+        # 不留下不完整的文件
+        if os.path.exists(workbook_path):
+            os.remove(workbook_path)
+        raise
+
+def read_package_sheet_names(file_path):
+    """
+    只解析 xlsx 包中的 workbook.xml 读取工作表名称
+
+    Args:
+        file_path: Excel文件路径
+    """
+    with zipfile.ZipFile(file_path) as package:
+        return _parse_sheet_names(package.read(_find_book_paths(package)[0]))
+
+# 缓存的工作簿索引数量
+WORKBOOK_CACHE_SIZE = 8
+
+# 通过 xlrd 读取的旧版 Excel 文件扩展名
+XLS_EXTENSIONS = ('.xls',)
+
+# 识别 <dimension> 时读取的工作表 XML 开头的长度
+DIMENSION_SCAN_SIZE = 64 * 1024
+DIMENSION_RE = re.compile(rb'<(?:[\w.-]+:)?dimension\s+ref="([^"]+)"')
+
+# 扫描列数据时每次读取的解压后字节数
+COLUMN_SCAN_CHUNK_SIZE = 1024 * 1024
+SHEET_DATA_RE = re.compile(rb'<([\w.-]+:)?sheetData[\s/>]')
+CELL_REF_RE = re.compile(rb'\sr=')
+CELL_REF_FIRST_RE = re.compile(rb'\s*r=')
+CELL_TYPE_RE = re.compile(rb'\st=["\']([^"\']*)["\']')
+CELL_STYLE_RE = re.compile(rb'\ss=["\'](\d+)["\']')
+
+def _local_name(tag):
+    """去掉命名空间后的元素名"""
+    return tag.rpartition('}')[2]
+
+def _parse_relationships(rels_xml, part_path):
+    """
+    解析关系条目
+
+    Args:
+        rels_xml: 关系条目的内容
+        part_path: 关系所属条目的路径，相对目标以其所在目录为基准
+
+    Returns:
+        {关系 Id: (关系类型, 目标条目路径)}
+    """
+    base_dir = posixpath.dirname(part_path)
+    relationships = {}
+    for element in ET.fromstring(rels_xml):
+        target = element.get('Target', '')
+        if element.get('TargetMode') == 'External':
+            continue
+        if target.startswith('/'):
+            target = target.lstrip('/')
+        else:
+            target = posixpath.normpath(posixpath.join(base_dir, target))
+        relationships[element.get('Id')] = (element.get('Type', ''), target)
+    return relationships
+
+def _text_content(element):
+    """富文本或内联字符串的文本，忽略注音 (rPh)"""
+    parts = []
+    for child in element:
+        name = _local_name(child.tag)
+        if name == 't':
+            parts.append(child.text or '')
+        elif name == 'r':
+            parts.extend(t.text or '' for t in child if _local_name(t.tag) == 't')
+    return ''.join(parts)
+
+def _xml_text(raw):
+    """将 XML 文本内容的原始字节解码为字符串"""
+    text = raw.decode('utf-8')
+    return html.unescape(text) if '&' in text else text
+
+class SharedStrings:
+    """
+    按需读取的共享字符串表
+
+    只解析到所需的序号为止，需要更多时按倍数扩展后重新解析，不长期持有文件
+    """
+
+    def __init__(self, file_path, part_path=None):
+        self.file_path = file_path
+        self.part_path = part_path
+        self.strings = []
+        self.complete = part_path is None
+
+    def __getitem__(self, index):
+        if index >= len(self.strings) and not self.complete:
+            self._load(max(index + 1, len(self.strings) * 2, 1024))
+        return self.strings[index]
+
+    def __len__(self):
+        self.load_all()
+        return len(self.strings)
+
+    def load_all(self):
+        """读取全部共享字符串"""
+        if not self.complete:
+            self._load(None)
+
+    def _load(self, count):
+        strings = []
+        with zipfile.ZipFile(self.file_path) as package, package.open(self.part_path) as stream:
+            context = ET.iterparse(stream, events=('start', 'end'))
+            _, root = next(context)
+            for event, element in context:
+                if event == 'end' and _local_name(element.tag) == 'si':
+                    strings.append(_text_content(element))
+                    root.clear()
+                    if count is not None and len(strings) >= count:
+                        break
+            else:
+                self.complete = True
+        self.strings = strings
+
+
+def _date_style_ids(styles_xml):
+    """返回使用日期格式的单元格样式序号集合"""
+    root = ET.fromstring(styles_xml)
+    custom_formats = {}
+    cell_formats = []
+    for element in root:
+        name = _local_name(element.tag)
+        if name == 'numFmts':
+            for fmt in element:
+                custom_formats[int(fmt.get('numFmtId'))] = fmt.get('formatCode', '')
+        elif name == 'cellXfs':
+            cell_formats = [int(xf.get('numFmtId', 0)) for xf in element]
+    date_ids = set()
+    for style_id, fmt_id in enumerate(cell_formats):
+        code = custom_formats.get(fmt_id, BUILTIN_FORMATS.get(fmt_id))
+        if code and is_date_format(code):
+            date_ids.add(style_id)
+    return date_ids
+
+class WorkbookIndex:
+    """
+    工作簿索引：工作表名称、各工作表的尺寸和表头行、共享字符串
+
+    直接读取 xlsx 包：创建时只解析 workbook.xml 和工作簿关系，各工作表的尺寸和表头行
+    在首次用到时读取工作表 XML 的开头部分，共享字符串和样式同样按需读取；
+    不长期持有文件，由 get_workbook_index 按 (路径, 大小, 修改时间) 缓存
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        # 工作表名称 -> (尺寸, 表头行)
+        self._sheet_info = {}
+        self.sheet_names = tuple(self._open_book())
+
+    def _open_book(self):
+        """读取工作簿结构，返回按顺序排列的工作表名称"""
+        with zipfile.ZipFile(self.file_path) as package:
+            workbook_path, rels_path, _ = _find_book_paths(package)
+            workbook = ET.fromstring(package.read(workbook_path))
+            relationships = _parse_relationships(package.read(rels_path), workbook_path)
+
+        names = []
+        # 工作表名称 -> 工作表条目路径
+        self.sheet_parts = {}
+        self.date1904 = False
+        for element in workbook.iter():
+            name = _local_name(element.tag)
+            if name == 'sheet':
+                rel_id = next((value for key, value in element.attrib.items() if _local_name(key) == 'id'), None)
+                names.append(element.get('name'))
+                self.sheet_parts[element.get('name')] = relationships.get(rel_id, ('', None))[1]
+            elif name == 'workbookPr':
+                self.date1904 = element.get('date1904') in ('1', 'true')
+
+        parts_by_type = {rel_type.rpartition('/')[2]: target for rel_type, target in relationships.values()}
+        self.shared_strings = SharedStrings(self.file_path, parts_by_type.get('sharedStrings'))
+        self.styles_part = parts_by_type.get('styles')
+        self._date_styles = None
+        return names
+
+    @property
+    def date_styles(self):
+        """使用日期格式的单元格样式序号"""
+        if self._date_styles is None:
+            self._date_styles = set()
+            if self.styles_part:
+                with zipfile.ZipFile(self.file_path) as package:
+                    self._date_styles = _date_style_ids(package.read(self.styles_part))
+        return self._date_styles
+
+    def dimension(self, sheet_name):
+        """返回工作表的 (最大行号, 最大列号)，工作表未记录尺寸时为 (0, 0)"""
+        return self._load_sheet_info(sheet_name)[0]
+
+    def header_row(self, sheet_name):
+        """返回工作表第一行的单元格值，缺少的单元格为 None"""
+        return self._load_sheet_info(sheet_name)[1]
+
+    def _load_sheet_info(self, sheet_name):
+        info = self._sheet_info.get(sheet_name)
+        if info is None:
+            part_path = self.sheet_parts[sheet_name]
+            dimension = (0, 0)
+            header = ()
+            if part_path:
+                with zipfile.ZipFile(self.file_path) as package:
+                    with package.open(part_path) as stream:
+                        match = DIMENSION_RE.search(stream.read(DIMENSION_SCAN_SIZE))
+                    if match:
+                        min_col, min_row, max_col, max_row = range_boundaries(match.group(1).decode('ascii'))
+                        dimension = (max_row or 0, max_col or 0)
+                    with package.open(part_path) as stream:
+                        for row_number, cells in _iter_sheet_rows(stream):
+                            if row_number == 1:
+                                header = self._row_values(cells)
+                            break
+            info = self._sheet_info[sheet_name] = (dimension, header)
+        return info
+
+    def _row_values(self, cells):
+        """将 (列号, 单元格元素) 列表转换为从 A 列开始的值元组"""
+        if not cells:
+            return ()
+        values = [None] * cells[-1][0]
+        for column, cell in cells:
+            values[column - 1] = self.cell_value(cell)
+        return tuple(values)
+
+    def cell_value(self, cell):
+        """
+        解码单元格元素的值，与 openpyxl 只读模式的结果一致
+
+        共享字符串按需读取，带日期格式的数值转换为 datetime
+        """
+        data_type = cell.get('t', 'n')
+        if data_type == 'inlineStr':
+            inline = next((child for child in cell if _local_name(child.tag) == 'is'), None)
+            return _text_content(inline) if inline is not None else None
+        value = formula = None
+        for child in cell:
+            name = _local_name(child.tag)
+            if name == 'v':
+                value = child.text
+            elif name == 'f':
+                formula = child.text
+        return self._convert_value(data_type, cell.get('s'), value, formula)
+
+    def _convert_value(self, data_type, style, value, formula):
+        """按单元格类型和样式转换 <v> 中的原始文本"""
+        if formula:
+            # 与 openpyxl 默认的只读模式一致，公式单元格返回公式文本
+            return '=' + formula
+        if value is None:
+            return None
+        if data_type == 's':
+            return self.shared_strings[int(value)]
+        if data_type == 'b':
+            return value in ('1', 'true')
+        if data_type in ('str', 'e', 'd'):
+            return value
+        number = float(value) if '.' in value or 'E' in value or 'e' in value else int(value)
+        if style and int(style) in self.date_styles:
+            return from_excel(number, CALENDAR_MAC_1904 if self.date1904 else CALENDAR_WINDOWS_1900)
+        return number
+
+    def iter_rows(self, sheet_name, min_row=1, max_row=None):
+        """
+        逐行生成工作表中各行的值元组，缺少的单元格为 None，中间的空行生成空元组
+
+        Args:
+            sheet_name: 工作表名称
+            min_row: 从该行开始生成
+            max_row: 到该行为止，默认到最后一行
+        """
+        part_path = self.sheet_parts[sheet_name]
+        if not part_path:
+            return
+        next_row = min_row
+        with zipfile.ZipFile(self.file_path) as package, package.open(part_path) as stream:
+            for row_number, cells in _iter_sheet_rows(stream):
+                if row_number < min_row:
+                    continue
+                for _ in range(next_row, row_number if max_row is None else min(row_number, max_row + 1)):
+                    yield ()
+                if max_row is not None and row_number > max_row:
+                    break
+                yield self._row_values(cells)
+                next_row = row_number + 1
+
+    def iter_column(self, sheet_name, column_index, min_row=1):
+        """
+        逐个生成工作表中指定列的 (行号, 值)，空单元格不生成
+
+        Args:
+            sheet_name: 工作表名称
+            column_index: 列索引（从1开始）
+            min_row: 从该行开始生成
+        """
+        for row_number, _, value in self.iter_cells(sheet_name, (column_index,), min_row):
+            yield row_number, value
+
+    def read_columns(self, sheet_name, column_indexes, min_row=1):
+        """
+        一次扫描读取工作表中的多列，返回按行对齐的各列数据
+
+        Args:
+            sheet_name: 工作表名称
+            column_indexes: 列索引列表（从1开始）
+            min_row: 从该行开始读取
+
+        Returns:
+            {列索引: 值列表}，各列表长度相同，第 i 项对应第 min_row + i 行，空单元格为 None
+        """
+        columns = {column: [] for column in column_indexes}
+        for row_number, column, value in self.iter_cells(sheet_name, columns, min_row):
+            values = columns[column]
+            offset = row_number - min_row
+            if offset >= len(values):
+                values.extend([None] * (offset + 1 - len(values)))
+            values[offset] = value
+        length = max((len(values) for values in columns.values()), default=0)
+        for values in columns.values():
+            values.extend([None] * (length - len(values)))
+        return columns
+
+    def iter_cells(self, sheet_name, column_indexes, min_row=1):
+        """
+        逐个生成工作表中指定各列的 (行号, 列索引, 值)，空单元格不生成
+
+        直接扫描工作表 XML 的原始内容，只解码所需列的单元格，其余单元格不建立元素；
+        单元格缺少 r 属性的工作表退回到逐行解析
+
+        Args:
+            sheet_name: 工作表名称
+            column_indexes: 列索引列表（从1开始）
+            min_row: 从该行开始生成
+        """
+        part_path = self.sheet_parts[sheet_name]
+        wanted = set(column_indexes)
+        if not part_path or not wanted:
+            return
+        with zipfile.ZipFile(self.file_path) as package, package.open(part_path) as stream:
+            head = stream.read(COLUMN_SCAN_CHUNK_SIZE)
+            match = SHEET_DATA_RE.search(head)
+            if not match:
+                return
+            prefix = match.group(1) or b''
+            first_cell = re.compile(rb'<' + re.escape(prefix) + rb'c[\s/>][^>]*').search(head, match.end())
+            if first_cell and not CELL_REF_RE.search(first_cell.group(0)):
+                stream.seek(0)
+                for row_number, cells in _iter_sheet_rows(stream):
+                    if row_number < min_row:
+                        continue
+                    for column, cell in cells:
+                        if column in wanted:
+                            value = self.cell_value(cell)
+                            if value is not None:
+                                yield row_number, column, value
+                return
+            # Excel 等常见程序总把 r 写成第一个属性，此时可用更快的匹配方式
+            ref_first = not first_cell or CELL_REF_FIRST_RE.match(first_cell.group(0), len(prefix) + 2)
+            letters = {get_column_letter(column).encode('ascii'): column for column in wanted}
+            for row_number, letter, value in self._scan_cells(stream, head, prefix, letters, min_row, ref_first):
+                yield row_number, letters[letter], value
+
+    def _scan_cells(self, stream, buffer, prefix, letters, min_row, ref_first):
+        tag = re.escape(prefix)
+        ref = rb'r=["\'](' + b'|'.join(letters) + rb')(\d+)["\']'
+        cell_start = rb'\s+' + ref if ref_first else rb'(?=\s[^>]*?\b' + ref + rb')'
+        cell_pattern = re.compile(
+            rb'<' + tag + rb'c' + cell_start + rb'([^>]*?)(?:/>|>(.*?)</' + tag + rb'c>)', re.S)
+        value_pattern = re.compile(rb'<' + tag + rb'v(?:\s[^>]*)?>(.*?)</' + tag + rb'v>', re.S)
+        formula_pattern = re.compile(rb'<' + tag + rb'f(?:\s[^>]*)?>(.*?)</' + tag + rb'f>', re.S)
+        phonetic_pattern = re.compile(rb'<' + tag + rb'rPh[\s>].*?</' + tag + rb'rPh>', re.S)
+        text_pattern = re.compile(rb'<' + tag + rb't(?:\s[^>]*)?>(.*?)</' + tag + rb't>', re.S)
+        row_end = b'</' + prefix + b'row>'
+
+        while buffer:
+            # 只处理到最后一个完整的行，剩余部分与下一块拼接
+            chunk = stream.read(COLUMN_SCAN_CHUNK_SIZE)
+            end = len(buffer) if not chunk else buffer.rfind(row_end) + len(row_end)
+            if chunk and end < len(row_end):
+                buffer += chunk
+                continue
+            for match in cell_pattern.finditer(buffer, 0, end):
+                row_number = int(match.group(2))
+                if row_number < min_row:
+                    continue
+                attributes, body = match.group(3), match.group(4)
+                if not body:
+                    continue
+                type_match = CELL_TYPE_RE.search(attributes)
+                data_type = type_match.group(1).decode('ascii') if type_match else 'n'
+                if data_type == 'inlineStr':
+                    texts = text_pattern.findall(phonetic_pattern.sub(b'', body))
+                    value = ''.join(_xml_text(text) for text in texts)
+                else:
+                    value_match = value_pattern.search(body)
+                    formula_match = formula_pattern.search(body)
+                    style_match = CELL_STYLE_RE.search(attributes)
+                    value = self._convert_value(
+                        data_type,
+                        style_match.group(1).decode('ascii') if style_match else None,
+                        _xml_text(value_match.group(1)) if value_match else None,
+                        _xml_text(formula_match.group(1)) if formula_match else None)
+                if value is not None:
+                    yield row_number, match.group(1), value
+            buffer = buffer[end:] + chunk
+
+def _iter_sheet_rows(stream):
+    """
+    增量解析工作表 XML，逐行生成 (行号, [(列号, 单元格元素), ...])
+
+    已处理的行随即从树中清除，内存占用与行数无关
+    """
+    context = ET.iterparse(stream, events=('start', 'end'))
+    sheet_data = None
+    row_number = 0
+    for event, element in context:
+        name = _local_name(element.tag)
+        if event == 'start':
+            if name == 'sheetData':
+                sheet_data = element
+            continue
+        if name != 'row':
+            continue
+        ref = element.get('r')
+        row_number = int(ref) if ref else row_number + 1
+        cells = []
+        column = 0
+        for cell in element:
+            ref = cell.get('r')
+            column = column_index_from_string(ref.rstrip('0123456789')) if ref else column + 1
+            cells.append((column, cell))
+        yield row_number, cells
+        if sheet_data is not None:
+            sheet_data.clear()
+
+class XlsWorkbookIndex(WorkbookIndex):
+    """
+    旧版 .xls 工作簿索引，接口与 WorkbookIndex 相同
+
+    文件内容一次读入内存后交给 xlrd 按需解析工作表，不持有文件句柄；
+    解析过的工作表留在 book 中，与 xlsx 共用 get_workbook_index 的缓存。
+    数值、日期和布尔值的转换与 xlsx 一致：整数值为 int，日期为 datetime
+    """
+
+    def _open_book(self):
+        try:
+            import xlrd
+        except ImportError:
+            raise ImportError("读取.xls格式Excel文件需要安装xlrd库")
+        with open(self.file_path, 'rb') as f:
+            self.book = xlrd.open_workbook(file_contents=f.read(), on_demand=True)
+        datemode = self.book.datemode
+        # 单元格类型 -> 转换函数，文本单元格不在其中，原样返回
+        self._converters = {
+            xlrd.XL_CELL_EMPTY: lambda value: None,
+            xlrd.XL_CELL_BLANK: lambda value: None,
+            xlrd.XL_CELL_NUMBER: lambda value: int(value) if value.is_integer() else value,
+            xlrd.XL_CELL_DATE: lambda value: xlrd.xldate.xldate_as_datetime(value, datemode),
+            xlrd.XL_CELL_BOOLEAN: bool,
+            xlrd.XL_CELL_ERROR: lambda value: xlrd.error_text_from_code.get(value, value),
+        }
+        return self.book.sheet_names()
+
+    def dimension(self, sheet_name):
+        sheet = self.book.sheet_by_name(sheet_name)
+        return sheet.nrows, sheet.ncols
+
+    def header_row(self, sheet_name):
+        return next(self.iter_rows(sheet_name, max_row=1), ())
+
+    def iter_rows(self, sheet_name, min_row=1, max_row=None):
+        sheet = self.book.sheet_by_name(sheet_name)
+        end = sheet.nrows if max_row is None else min(max_row, sheet.nrows)
+        for rowx in range(min_row - 1, end):
+            values = [self._convert_cell(cell_type, value)
+                      for cell_type, value in zip(sheet.row_types(rowx), sheet.row_values(rowx))]
+            while values and values[-1] is None:
+                values.pop()
+            yield tuple(values)
+
+    def iter_cells(self, sheet_name, column_indexes, min_row=1):
+        """按列整体读取 (col_types/col_values)，逐列生成 (行号, 列索引, 值)，空单元格不生成"""
+        sheet = self.book.sheet_by_name(sheet_name)
+        for column in dict.fromkeys(column_indexes):
+            if not 1 <= column <= sheet.ncols or min_row > sheet.nrows:
+                continue
+            types = sheet.col_types(column - 1, min_row - 1)
+            values = sheet.col_values(column - 1, min_row - 1)
+            for row_number, (cell_type, value) in enumerate(zip(types, values), min_row):
+                value = self._convert_cell(cell_type, value)
+                if value is not None:
+                    yield row_number, column, value
+
+    def _convert_cell(self, cell_type, value):
+        """将 xlrd 单元格值转换为与 xlsx 读取结果一致的值"""
+        convert = self._converters.get(cell_type)
+        return convert(value) if convert else value
+
+def xls_support_available():
+    """是否可以读取旧版 .xls 文件（需要安装 xlrd）"""
+    return importlib.util.find_spec("xlrd") is not None
+
+@functools.lru_cache(maxsize=WORKBOOK_CACHE_SIZE)
+def _load_workbook_index(file_path, size, mtime_ns):
+    if os.path.splitext(file_path)[1].lower() in XLS_EXTENSIONS:
+        return XlsWorkbookIndex(file_path)
+    return WorkbookIndex(file_path)
+
+def get_workbook_index(file_path):
+    """
+    返回工作簿索引，文件路径、大小和修改时间都未变化时直接使用缓存
+
+    Args:
+        file_path: Excel文件路径
+    """
+    file_path = os.path.abspath(file_path)
+    stat = os.stat(file_path)
+    return _load_workbook_index(file_path, stat.st_size, stat.st_mtime_ns)
+
+def clear_workbook_cache():
+    """清空工作簿索引缓存"""
+    _load_workbook_index.cache_clear()
+
 def read_sheet_names(file_path):
     """
     从Excel文件读取工作表名称
@@ -120,7 +696,7 @@ def read_sheet_names(file_path):
         
         # 验证文件类型
         _, ext = os.path.splitext(file_path)
-        valid_extensions = ['.xlsx', '.xlsm', '.xltx', '.xltm']
+        valid_extensions = ['.xlsx', '.xlsm', '.xltx', '.xltm', '.xls']
         
         is_valid = ext.lower() in valid_extensions
         log_validation_result(
@@ -132,12 +708,12 @@ def read_sheet_names(file_path):
             log_operation_end(logger, "读取工作表名称", "失败 - 不支持的文件类型")
             return False, f"不支持的文件类型，仅支持: {', '.join(valid_extensions)}"
         
-        # 打开工作簿
-        wb = openpyxl.load_workbook(file_path, read_only=True)
+        # 读取工作簿索引，文件未变化时直接使用缓存
+        index = get_workbook_index(file_path)
         logger.info(f"打开工作簿: {file_path}")
         
         # 获取工作表名称
-        sheet_names = wb.sheetnames
+        sheet_names = list(index.sheet_names)
         logger.info(f"读取到 {len(sheet_names)} 个工作表名称")
         logger.debug(f"工作表名称列表: {sheet_names}")
         
@@ -173,22 +749,18 @@ def read_column_data(file_path, sheet_name, column_index, skip_header=True):
             log_operation_end(logger, "读取列数据", "失败 - 文件不存在")
             return False, "文件不存在"
         
-        # 打开工作簿
-        wb = openpyxl.load_workbook(file_path, read_only=True)
+        # 读取工作簿索引，文件未变化时直接使用缓存
+        index = get_workbook_index(file_path)
         logger.info(f"打开工作簿: {file_path}")
         
         # 检查工作表是否存在
-        if sheet_name not in wb.sheetnames:
+        if sheet_name not in index.sheet_names:
             logger.error(f"工作表不存在: {sheet_name}")
             log_operation_end(logger, "读取列数据", "失败 - 工作表不存在")
             return False, "工作表不存在"
         
-        # 获取工作表
-        ws = wb[sheet_name]
-        logger.debug(f"获取工作表: {sheet_name}")
-        
         # 验证列索引
-        max_column = ws.max_column
+        max_column = index.dimension(sheet_name)[1]
         is_valid = 1 <= column_index <= max_column
         log_validation_result(
             logger, "列索引", column_index, 
@@ -204,9 +776,9 @@ def read_column_data(file_path, sheet_name, column_index, skip_header=True):
         # 从第2行开始（跳过表头）或第1行开始（包含表头）
         start_row = 2 if skip_header else 1
         
-        for row in ws.iter_rows(min_row=start_row, min_col=column_index, max_col=column_index):
-            if row[0].value is not None:
-                data.append(str(row[0].value))
+        # 只扫描该列的单元格，不解析整行
+        for _, value in index.iter_column(sheet_name, column_index, min_row=start_row):
+            data.append(str(value))
         
         logger.info(f"从 {sheet_name} 工作表读取了 {len(data)} 行数据，跳过表头: {skip_header}")
         logger.debug(f"读取的数据: {data[:10]}{'...' if len(data) > 10 else ''}")
@@ -219,6 +791,66 @@ def read_column_data(file_path, sheet_name, column_index, skip_header=True):
         log_operation_end(logger, "读取列数据", "失败")
         return False, f"读取列数据失败: {str(e)}"
 
+def read_columns(file_path, requests, skip_header=True):
+    """
+    从Excel文件一次读取多个工作表的多列数据，每个工作表只扫描一次
+    
+    Args:
+        file_path: Excel文件路径
+        requests: (工作表名称, 列索引) 列表，列索引从1开始
+        skip_header: 是否跳过第一行表头
+    
+    Returns:
+        (success, result): 成功时result为 {(工作表名称, 列索引): 值列表}，
+        同一工作表的各列按行对齐、长度相同，空单元格为 None；失败时result为错误信息
+    """
+    requests = list(dict.fromkeys(requests))
+    log_operation_start(logger, "批量读取列数据", {
+        "file_path": file_path,
+        "requests": requests,
+        "skip_header": skip_header
+    })
+    
+    try:
+        # 检查文件是否存在
+        if not os.path.exists(file_path):
+            logger.error(f"文件不存在: {file_path}")
+            log_operation_end(logger, "批量读取列数据", "失败 - 文件不存在")
+            return False, "文件不存在"
+        
+        # 读取工作簿索引，文件未变化时直接使用缓存
+        index = get_workbook_index(file_path)
+        logger.info(f"打开工作簿: {file_path}")
+        
+        # 按工作表分组，检查工作表和列索引
+        sheets = {}
+        for sheet_name, column_index in requests:
+            if sheet_name not in index.sheet_names:
+                logger.error(f"工作表不存在: {sheet_name}")
+                log_operation_end(logger, "批量读取列数据", "失败 - 工作表不存在")
+                return False, f"工作表不存在: {sheet_name}"
+            if column_index < 1:
+                log_operation_end(logger, "批量读取列数据", "失败 - 列索引无效")
+                return False, f"列索引无效: {column_index}"
+            sheets.setdefault(sheet_name, []).append(column_index)
+        
+        start_row = 2 if skip_header else 1
+        result = {}
+        for sheet_name, column_indexes in sheets.items():
+            columns = index.read_columns(sheet_name, column_indexes, min_row=start_row)
+            for column_index, values in columns.items():
+                result[(sheet_name, column_index)] = values
+            logger.info(f"从 {sheet_name} 工作表读取了 {len(column_indexes)} 列，"
+                        f"共 {len(next(iter(columns.values())))} 行，跳过表头: {skip_header}")
+        
+        log_operation_end(logger, "批量读取列数据", "成功", len(result))
+        return True, result
+    
+    except Exception as e:
+        log_exception(logger, e, "批量读取列数据")
+        log_operation_end(logger, "批量读取列数据", "失败")
+        return False, f"批量读取列数据失败: {str(e)}"
+
 def read_column_headers(file_path, sheet_name):
     """
     从Excel文件的指定工作表读取所有列名
@@ -244,7 +876,7 @@ def read_column_headers(file_path, sheet_name):
         
         # 验证文件类型
         _, ext = os.path.splitext(file_path)
-        valid_extensions = ['.xlsx', '.xlsm', '.xltx', '.xltm']
+        valid_extensions = ['.xlsx', '.xlsm', '.xltx', '.xltm', '.xls']
         
         is_valid = ext.lower() in valid_extensions
         log_validation_result(
@@ -256,25 +888,18 @@ def read_column_headers(file_path, sheet_name):
             log_operation_end(logger, "读取列名", "失败 - 不支持的文件类型")
             return False, f"不支持的文件类型，仅支持: {', '.join(valid_extensions)}"
         
-        # 打开工作簿
-        wb = openpyxl.load_workbook(file_path, read_only=True)
+        # 读取工作簿索引，文件未变化时直接使用缓存
+        index = get_workbook_index(file_path)
         logger.info(f"打开工作簿: {file_path}")
         
         # 检查工作表是否存在
-        if sheet_name not in wb.sheetnames:
+        if sheet_name not in index.sheet_names:
             logger.error(f"工作表不存在: {sheet_name}")
             log_operation_end(logger, "读取列名", "失败 - 工作表不存在")
             return False, "工作表不存在"
         
-        # 获取工作表
-        ws = wb[sheet_name]
-        logger.debug(f"获取工作表: {sheet_name}")
-        
         # 读取第一行作为列名
-        headers = []
-        for cell in ws[1]:
-            if cell.value is not None:
-                headers.append(str(cell.value))
+        headers = [str(value) for value in index.header_row(sheet_name) if value is not None]
         
         # 记录列名数量
         logger.info(f"从 {sheet_name} 工作表读取了 {len(headers)} 个列名")
@@ -286,4 +911,468 @@ def read_column_headers(file_path, sheet_name):
     except Exception as e:
         log_exception(logger, e, "读取列名")
         log_operation_end(logger, "读取列名", "失败")
-        return False, f"读取列名失败: {str(e)}" 
\ No newline at end of file
+        return False, f"读取列名失败: {str(e)}" 
+# 单元格和 docx 段落中不允许出现的控制字符（与 openpyxl 的检查一致）
+ILLEGAL_XML_CHARS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
+
+def cell_xml(ref, value):
+    """
+    生成单个单元格的 XML，写法与 openpyxl 保持一致
+
+    Args:
+        ref: 单元格引用，如 "B2"
+        value: 单元格值，文本使用内联字符串，以 "=" 开头的文本作为公式
+    """
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}" t="n"><v>{value!r}</v></c>'
+    value = str(value)
+    if ILLEGAL_XML_CHARS_RE.search(value):
+        raise ValueError(f"单元格 {ref} 包含非法字符")
+    if not value:
+        return f'<c r="{ref}" t="inlineStr" />'
+    if value.startswith('=') and len(value) > 1:
+        return f'<c r="{ref}"><f>{xml_escape(value[1:])}</f><v /></c>'
+    space = ' xml:space="preserve"' if value != value.strip() else ''
+    return f'<c r="{ref}" t="inlineStr"><is><t{space}>{xml_escape(value)}</t></is></c>'
+
+def row_xml(row, values):
+    """生成一行单元格的 XML，values 从 A 列开始"""
+    cells = ''.join(cell_xml(f'{get_column_letter(column)}{row}', value) for column, value in enumerate(values, 1))
+    return f'<row r="{row}">{cells}</row>'
+
+WORKBOOK_PATH = 'xl/workbook.xml'
+WORKBOOK_RELS_PATH = 'xl/_rels/workbook.xml.rels'
+CONTENT_TYPES_PATH = '[Content_Types].xml'
+WORKSHEET_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml'
+WORKSHEET_REL_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet'
+RELATIONSHIPS_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+def _next_number(pattern, text):
+    """返回文本中与 pattern 匹配的最大编号加一"""
+    return max((int(number) for number in re.findall(pattern, text)), default=0) + 1
+
+def _insert_children(xml, tag, build):
+    """
+    在 XML 的 tag 元素末尾插入子元素
+
+    Args:
+        xml: XML 文本
+        tag: 元素名，不含命名空间前缀
+        build: 接收元素的命名空间前缀（如 "x:" 或 ""），返回要插入的 XML 文本
+    """
+    match = re.search(r'<((?:[\w.-]+:)?)%s(\s[^>]*?)?(/?)>' % tag, xml)
+    if not match:
+        raise ValueError(f"缺少 {tag} 元素")
+    prefix = match.group(1)
+    children = build(prefix)
+    if match.group(3):
+        # 空元素 <tag/> 展开后插入
+        return f'{xml[:match.start()]}<{prefix}{tag}{match.group(2) or ""}>{children}</{prefix}{tag}>{xml[match.end():]}'
+    closing = xml.index(f'</{prefix}{tag}>', match.end())
+    return xml[:closing] + children + xml[closing:]
+
+def register_sheets(workbook_xml, rels_xml, content_types_xml, sheets):
+    """
+    在工作簿、工作簿关系和内容类型中登记新的工作表
+
+    Args:
+        workbook_xml: workbook.xml 的内容
+        rels_xml: 工作簿关系条目的内容
+        content_types_xml: [Content_Types].xml 的内容
+        sheets: (工作表名称, 工作表条目路径) 列表，条目路径相对于包根目录
+
+    Returns:
+        更新后的 (workbook_xml, rels_xml, content_types_xml)，原有内容保持不变，
+        新工作表的 sheetId 和关系 Id 接在已有的最大编号之后
+    """
+    sheet_id = _next_number(r'\bsheetId="(\d+)"', workbook_xml)
+    rel_id = _next_number(r'\bId="rId(\d+)"', rels_xml)
+    rel_ids = [f'rId{rel_id + offset}' for offset in range(len(sheets))]
+
+    # 沿用 workbook.xml 中关系命名空间的前缀，没有声明时在元素上声明
+    ns_match = re.search(r'xmlns:([\w.-]+)="%s"' % re.escape(RELATIONSHIPS_NS), workbook_xml)
+    r_prefix = ns_match.group(1) if ns_match else 'r'
+    r_declare = '' if ns_match else f' xmlns:r="{RELATIONSHIPS_NS}"'
+
+    def sheet_entries(prefix):
+        return ''.join(
+            f'<{prefix}sheet name={quoteattr(name)} sheetId="{sheet_id + offset}" state="visible" '
+            f'{r_prefix}:id="{rel_ids[offset]}"{r_declare} />'
+            for offset, (name, _) in enumerate(sheets))
+
+    def rel_entries(prefix):
+        return ''.join(
+            f'<{prefix}Relationship Type="{WORKSHEET_REL_TYPE}" Target="/{part_path}" Id="{rel_ids[offset]}" />'
+            for offset, (_, part_path) in enumerate(sheets))
+
+    def type_entries(prefix):
+        return ''.join(
+            f'<{prefix}Override PartName="/{part_path}" ContentType="{WORKSHEET_CONTENT_TYPE}" />'
+            for _, part_path in sheets)
+
+    return (_insert_children(workbook_xml, 'sheets', sheet_entries),
+            _insert_children(rels_xml, 'Relationships', rel_entries),
+            _insert_children(content_types_xml, 'Types', type_entries))
+
+# 模板工作表 XML 中的空 <sheetData> 和 <dimension>，兼容自闭合、属性和空白的不同写法
+SHEET_DATA_SPLIT_RE = re.compile(r'<sheetData\b[^>]*?(?:/>|>\s*</sheetData>)')
+DIMENSION_SPLIT_RE = re.compile(r'<dimension\b[^>]*?/>|<dimension\b[^>]*>\s*</dimension>')
+MINIMAL_SHEET_XML = (
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<dimension ref="A1:A1"/><sheetData/></worksheet>'
+)
+
+class XlsxTemplate:
+    """
+    基于模板包的 xlsx 快速生成器
+
+    模板包只用 openpyxl 渲染一次，之后每个文件只重新生成工作表 XML，
+    其余条目直接复用模板中的内容。单元格写法与 openpyxl 保持一致：
+    文本使用内联字符串，以 "=" 开头的内容作为公式
+    """
+
+    SHEET_PATH = 'xl/worksheets/sheet1.xml'
+
+    def __init__(self):
+        buffer = io.BytesIO()
+        openpyxl.Workbook().save(buffer)
+
+        self.blank_bytes = buffer.getvalue()
+        self.date_time = datetime.now().timetuple()[:6]
+
+        # 除工作表外的条目预先压缩为一个基础包，每个文件只追加工作表条目
+        base = io.BytesIO()
+        self.parts = {}
+        with zipfile.ZipFile(buffer) as package, zipfile.ZipFile(base, 'w', zipfile.ZIP_DEFLATED) as base_package:
+            for info in package.infolist():
+                data = package.read(info.filename)
+                if info.filename == self.SHEET_PATH:
+                    sheet_xml = data.decode('utf-8')
+                else:
+                    self.parts[info.filename] = data
+                    base_package.writestr(zipfile.ZipInfo(info.filename, self.date_time), data, zipfile.ZIP_DEFLATED)
+        self.base_bytes = base.getvalue()
+
+        # 去掉默认工作表后的工作簿条目，作为 XlsxBookWriter 生成新工作簿的基础
+        sheet_part = '/' + self.SHEET_PATH
+        self.empty_book_parts = dict(self.parts)
+        self.empty_book_parts[WORKBOOK_PATH] = re.sub(
+            r'<sheet [^>]*/>', '', self.parts[WORKBOOK_PATH].decode('utf-8')).encode('utf-8')
+        self.empty_book_parts[WORKBOOK_RELS_PATH] = re.sub(
+            r'<Relationship [^>]*Target="%s"[^>]*/>' % re.escape(sheet_part), '',
+            self.parts[WORKBOOK_RELS_PATH].decode('utf-8')).encode('utf-8')
+        self.empty_book_parts[CONTENT_TYPES_PATH] = re.sub(
+            r'<Override PartName="%s"[^>]*/>' % re.escape(sheet_part), '',
+            self.parts[CONTENT_TYPES_PATH].decode('utf-8')).encode('utf-8')
+
+        # 拆分工作表 XML，单元格数据插入到 <sheetData> 中；
+        # openpyxl 版本不同时写法可能变化，找不到 <sheetData> 时改用最小的工作表 XML
+        match = SHEET_DATA_SPLIT_RE.search(sheet_xml)
+        if not match:
+            sheet_xml = MINIMAL_SHEET_XML
+            match = SHEET_DATA_SPLIT_RE.search(sheet_xml)
+        head, self.sheet_tail = sheet_xml[:match.start()], sheet_xml[match.end():]
+        # <dimension> 是可选元素，模板中没有时生成的工作表也不写
+        match = DIMENSION_SPLIT_RE.search(head)
+        if match:
+            self.sheet_head, self.dimension_tail = head[:match.start()], head[match.end():]
+        else:
+            self.sheet_head, self.dimension_tail = head, None
+
+    @staticmethod
+    def _cell_xml(row, value):
+        """生成 A 列单个单元格的 XML"""
+        return f'<row r="{row}">{cell_xml(f"A{row}", value)}</row>'
+
+    def render_sheet(self, lines):
+        """
+        生成包含指定内容的工作表 XML
+
+        Args:
+            lines: A 列从第 1 行开始依次写入的文本列表
+        """
+        rows = ''.join(self._cell_xml(row, line) for row, line in enumerate(lines, 1))
+        return self._render(f'A1:A{max(len(lines), 1)}', rows)
+
+    def render_rows(self, rows):
+        """
+        生成包含多列数据的工作表 XML
+
+        Args:
+            rows: 从第 1 行开始依次写入的行，每行为单元格值列表，None 表示空单元格
+        """
+        body = ''.join(row_xml(index, values) for index, values in enumerate(rows, 1))
+        last_column = max((len(values) for values in rows), default=1) or 1
+        return self._render(f'A1:{get_column_letter(last_column)}{max(len(rows), 1)}', body)
+
+    def _render(self, ref, body):
+        sheet_data = f'<sheetData>{body}</sheetData>'
+        if self.dimension_tail is None:
+            return f'{self.sheet_head}{sheet_data}{self.sheet_tail}'
+        return f'{self.sheet_head}<dimension ref="{ref}" />{self.dimension_tail}{sheet_data}{self.sheet_tail}'
+
+    def build(self, lines=()):
+        """
+        生成 xlsx 文件内容
+
+        Args:
+            lines: A 列内容，每项一行，为空时生成空白工作簿
+
+        Returns:
+            xlsx 文件的字节内容
+        """
+        lines = list(lines)
+        if not lines:
+            return self.blank_bytes
+
+        sheet_bytes = self.render_sheet(lines).encode('utf-8')
+        buffer = io.BytesIO(self.base_bytes)
+        with zipfile.ZipFile(buffer, 'a') as package:
+            package.writestr(zipfile.ZipInfo(self.SHEET_PATH, self.date_time), sheet_bytes, zipfile.ZIP_DEFLATED)
+        return buffer.getvalue()
+
+    def write(self, file_path, lines=()):
+        """
+        写入一个 xlsx 文件
+
+        Args:
+            file_path: 目标文件路径
+            lines: A 列内容，每项一行，为空时生成空白工作簿
+        """
+        data = self.build(lines)
+        with open(file_path, 'wb') as f:
+            f.write(data)
+
+_xlsx_template = None
+
+def get_xlsx_template():
+    """返回当前进程共用的 xlsx 模板，首次调用时创建"""
+    global _xlsx_template
+    if _xlsx_template is None:
+        _xlsx_template = XlsxTemplate()
+    return _xlsx_template
+
+class XlsxBookWriter:
+    """
+    直接写出 xlsx 包的工作簿生成器
+
+    每个工作表添加时即写入 zip，内存中只保留工作表名称和条目路径；
+    关闭时再登记到 workbook.xml、工作簿关系和内容类型中。
+    不指定 source 时生成新工作簿，其余条目复用模板包中的内容；
+    指定 source 时在现有工作簿的基础上追加工作表，其余条目按压缩后的原始数据复制，不解压也不解析
+    """
+
+    def __init__(self, file_path, source=None):
+        """
+        Args:
+            file_path: 目标文件路径，不能与 source 相同
+            source: 现有工作簿路径 (可选)
+        """
+        self.template = get_xlsx_template()
+        self.source = None
+        if source:
+            self.source = zipfile.ZipFile(source)
+            try:
+                self.book_paths = _find_book_paths(self.source)
+                self.book_xml = [self.source.read(path).decode('utf-8') for path in self.book_paths]
+            except Exception:
+                self.source.close()
+                raise
+            part_names = set(self.source.namelist())
+        else:
+            self.book_paths = (WORKBOOK_PATH, WORKBOOK_RELS_PATH, CONTENT_TYPES_PATH)
+            self.book_xml = [self.template.empty_book_parts[path].decode('utf-8') for path in self.book_paths]
+            part_names = set(self.template.empty_book_parts)
+        self.sheet_dir = posixpath.join(posixpath.dirname(self.book_paths[0]), 'worksheets')
+        self.part_names = part_names
+        self.folded_names = {name.casefold() for name in _parse_sheet_names(self.book_xml[0])}
+        self.sheets = []
+        self.package = zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED)
+
+    @property
+    def sheet_names(self):
+        """工作簿中已有的工作表名称"""
+        return _parse_sheet_names(self.book_xml[0])
+
+    def _zip_info(self, name):
+        return zipfile.ZipInfo(name, self.template.date_time)
+
+    def _new_part_path(self):
+        index = len(self.sheets) + 1
+        while f'{self.sheet_dir}/sheet{index}.xml' in self.part_names:
+            index += 1
+        part_path = f'{self.sheet_dir}/sheet{index}.xml'
+        self.part_names.add(part_path)
+        return part_path
+
+    def add_sheet(self, sheet_name, rows=()):
+        """
+        添加一个工作表
+
+        Args:
+            sheet_name: 工作表名称
+            rows: 从第 1 行开始写入的行，每行为单元格值列表
+        """
+        # Excel 比较工作表名称时不区分大小写，重名会使工作簿损坏
+        if sheet_name.casefold() in self.folded_names:
+            raise ValueError(f"工作表已存在: {sheet_name}")
+        self.folded_names.add(sheet_name.casefold())
+        part_path = self._new_part_path()
+        sheet_xml = self.template.render_rows(list(rows))
+        self.package.writestr(self._zip_info(part_path), sheet_xml.encode('utf-8'), zipfile.ZIP_DEFLATED)
+        self.sheets.append((sheet_name, part_path))
+
+    def close(self):
+        """登记所有工作表并写入其余条目"""
+        if self.package.fp is None:
+            return
+        try:
+            book_xml = register_sheets(*self.book_xml, self.sheets)
+            for name, data in zip(self.book_paths, book_xml):
+                self.package.writestr(self._zip_info(name), data.encode('utf-8'), zipfile.ZIP_DEFLATED)
+            if self.source:
+                for info in self.source.infolist():
+                    if info.filename not in self.book_paths:
+                        _copy_zip_entry(self.source, self.package, info)
+            else:
+                for name, data in self.template.empty_book_parts.items():
+                    if name not in self.book_paths:
+                        self.package.writestr(self._zip_info(name), data, zipfile.ZIP_DEFLATED)
+        finally:
+            self._close_files()
+
+    def _close_files(self):
+        self.package.close()
+        if self.source:
+            self.source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self._close_files()
+        else:
+            self.close()
+
+def _find_book_paths(package):
+    """返回包中 (workbook.xml, 工作簿关系, 内容类型) 的条目路径"""
+    rels = package.read('_rels/.rels').decode('utf-8')
+    match = re.search(r'<(?:[\w.-]+:)?Relationship\b[^>]*Type="[^"]*/officeDocument"[^>]*>', rels)
+    target = re.search(r'\bTarget="([^"]*)"', match.group(0)).group(1) if match else WORKBOOK_PATH
+    workbook_path = posixpath.normpath(target.lstrip('/'))
+    rels_path = posixpath.join(posixpath.dirname(workbook_path), '_rels', posixpath.basename(workbook_path) + '.rels')
+    return workbook_path, rels_path, CONTENT_TYPES_PATH
+
+def _parse_sheet_names(workbook_xml):
+    """从 workbook.xml 中解析工作表名称"""
+    root = ET.fromstring(workbook_xml)
+    return [element.get('name') for element in root.iter() if element.tag.rpartition('}')[2] == 'sheet']
+
+# zip 本地文件头的固定部分
+ZIP_LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+
+def _copy_zip_entry(source, package, info):
+    """
+    将 source 中的一个条目复制到 package
+
+    当前 Python 版本通过 _raw_zip_copy_works 的自检时按压缩后的原始数据复制，
+    否则通过公开接口解压后重新压缩 (_stream_zip_entry)
+    """
+    if _raw_zip_copy_works():
+        _raw_copy_zip_entry(source, package, info)
+    else:
+        _stream_zip_entry(source, package, info)
+
+@functools.lru_cache(maxsize=None)
+def _raw_zip_copy_works():
+    """
+    检查原始复制在当前 Python 版本上能否得到正确的 zip 包
+
+    原始复制依赖 ZipFile 的内部属性和 ZipInfo.FileHeader 的行为，首次复制前在内存中
+    复制一个小包并用 zipfile 读回，CRC 和内容都一致时才使用，结果在进程内缓存
+    """
+    try:
+        source_buffer = io.BytesIO()
+        with zipfile.ZipFile(source_buffer, 'w') as source:
+            source.writestr('deflated.xml', b'<row/>' * 256, zipfile.ZIP_DEFLATED)
+            source.writestr('stored.bin', bytes(range(256)), zipfile.ZIP_STORED)
+        package_buffer = io.BytesIO()
+        with zipfile.ZipFile(source_buffer) as source, zipfile.ZipFile(package_buffer, 'w') as package:
+            for info in source.infolist():
+                _raw_copy_zip_entry(source, package, info)
+            package.writestr('written.txt', b'written', zipfile.ZIP_DEFLATED)
+        with zipfile.ZipFile(source_buffer) as source, zipfile.ZipFile(package_buffer) as package:
+            if package.testzip() is not None or package.read('written.txt') != b'written':
+                return False
+            return all(package.getinfo(info.filename).CRC == info.CRC
+                       and package.read(info.filename) == source.read(info.filename)
+                       for info in source.infolist())
+    except Exception as e:
+        logger.warning(f"当前 Python 版本不支持 zip 条目原始复制，改为解压后重新压缩：{str(e)}")
+        return False
+
+def _raw_copy_zip_entry(source, package, info):
+    """
+    将 source 中的一个条目按压缩后的原始数据复制到 package
+
+    zipfile 没有公开的原始复制接口，这里按 zip 格式读取本地文件头之后的压缩数据，
+    写入新的本地文件头后原样复制，并登记到目标包的中央目录
+    """
+    source.fp.seek(info.header_offset)
+    header = ZIP_LOCAL_HEADER.unpack(source.fp.read(ZIP_LOCAL_HEADER.size))
+    source.fp.seek(header[-2] + header[-1], os.SEEK_CUR)
+
+    entry = copy.copy(info)
+    # 大小和 CRC 已知，不再使用数据描述符
+    entry.flag_bits &= ~0x08
+    entry.header_offset = package.fp.tell()
+    package.fp.write(entry.FileHeader())
+    remaining = info.compress_size
+    while remaining:
+        chunk = source.fp.read(min(remaining, 1024 * 1024))
+        if not chunk:
+            raise zipfile.BadZipFile(f"条目数据不完整: {info.filename}")
+        package.fp.write(chunk)
+        remaining -= len(chunk)
+    package.start_dir = package.fp.tell()
+    package.filelist.append(entry)
+    package.NameToInfo[entry.filename] = entry
+    package._didModify = True
+
+def _stream_zip_entry(source, package, info):
+    """通过 zipfile 的公开接口逐块解压并重新压缩复制一个条目"""
+    entry = zipfile.ZipInfo(info.filename, info.date_time)
+    entry.compress_type = info.compress_type
+    entry.external_attr = info.external_attr
+    entry.comment = info.comment
+    with source.open(info) as src, package.open(entry, 'w') as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+def append_sheets_to_workbook(workbook_path, sheet_names, rows=()):
+    """
+    在现有工作簿中追加工作表，不加载和重写原有的单元格
+
+    Args:
+        workbook_path: 现有工作簿路径
+        sheet_names: 要追加的工作表名称列表
+        rows: 每个工作表开头写入的行
+
+    先写入同目录下的临时文件，完成后替换原文件，失败时原文件保持不变
+    """
+    fd, temp_path = tempfile.mkstemp(suffix='.xlsx', dir=os.path.dirname(os.path.abspath(workbook_path)))
+    os.close(fd)
+    try:
+        with XlsxBookWriter(temp_path, source=workbook_path) as writer:
+            for sheet_name in sheet_names:
+                writer.add_sheet(sheet_name, rows)
+        shutil.copymode(workbook_path, temp_path)
+        os.replace(temp_path, workbook_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
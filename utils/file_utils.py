@@ -3,34 +3,99 @@ import shutil
 from datetime import datetime
 import logging
 from .log_utils import setup_logger, log_exception, log_operation_start, log_operation_end, log_file_operation
+from .excel_utils import get_xlsx_template, get_workbook_index
+from .docx_utils import build_docx, text_to_paragraphs
 import re
 import json
 import csv
+import codecs
+import collections
+import concurrent.futures
+import itertools
+import threading
+import unicodedata
+import sys
+import errno
 import openpyxl
 import tkinter as tk
 from tkinter import messagebox, simpledialog
 
+try:
+    import fcntl
+except ImportError:
+    # Windows 没有 fcntl，复制模板时不使用 reflink
+    fcntl = None
+
 # 创建文件工具模块的日志记录器
 logger = setup_logger('file_utils', level=logging.DEBUG)
 
+# 应用所在目录：打包版本为可执行文件所在目录，开发版本为项目根目录
+APP_DIR = (os.path.dirname(sys.executable) if getattr(sys, 'frozen', False)
+           else os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 重命名撤销日志的默认目录，不随当前工作目录变化
+RENAME_JOURNAL_DIR = os.path.join(APP_DIR, 'logs', 'rename_journal')
+# 最多保留的撤销日志份数，新日志保留后删除更早的日志
+RENAME_JOURNAL_KEEP = 20
+
+# 生成开销较大、适合多进程并行创建的文件类型
+PROCESS_POOL_FILE_TYPES = ('.xlsx', '.doc', '.docx')
+# 文件数量达到该值时 auto 模式才启用并行
+PARALLEL_MIN_COUNT = 64
+# 创建文件时每批交给执行器的任务数
+CREATE_BATCH_SIZE = 256
+# 批量创建时每处理多少项报告一次进度
+PROGRESS_INTERVAL = 1000
+# 指定文件大小时的空间分配方式
+FILL_MODES = ('sparse', 'fallocate', 'pattern')
+# 文件大小的写法，如 "10"、"1.5K"、"2MB"、"1GiB"
+SIZE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*$', re.IGNORECASE)
+# 文件大小单位对应的字节数
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+# 创建目录树时每棵子树最多保持打开的目录文件描述符层数，更深的目录使用完整路径创建
+DIR_FD_DEPTH_LIMIT = 64
+# 读取文本和 CSV 文件时依次尝试的编码
+TEXT_ENCODINGS = ('utf-8', 'gbk', 'gb2312', 'latin-1')
+
 def create_files(names, target_dir, file_type=".txt", content_template=None, 
-                naming_rule=None, start_value=1, step=1, digits=3):
+                naming_rule=None, start_value=1, step=1, digits=3,
+                parallel="auto", max_workers=None, merge_source=None, merge_sheet=None,
+                template_file=None, progress_callback=None, file_size=None, size_column=None,
+                allocation="sparse"):
     """
     批量创建文件
     
     参数:
-    - names: 文件名列表
+    - names: 文件名列表或惰性生成名称的可迭代对象（如 sequence_names），使用数据源时可为 None
     - target_dir: 目标目录
     - file_type: 文件类型，如 .txt, .doc 等
-    - content_template: 内容模板，可包含变量 ${NAME}, ${ISEQ}
-    - naming_rule: 命名规则，例如 "prefix_$NAME_$ISEQ3"
+    - content_template: 内容模板，可包含变量 ${NAME}, ${ISEQ}, ${COL:列名}
+    - naming_rule: 命名规则，例如 "prefix_$NAME_$ISEQ3"，可包含 ${COL:列名}
     - start_value: 序号起始值
     - step: 序号步长
     - digits: 序号位数
+    - parallel: 并行模式，"auto" 按文件类型和数量自动选择，
+      "process" 多进程，"thread" 多线程，"serial" 顺序执行
+    - max_workers: 并行时的最大工作进程/线程数，默认由执行器决定
+    - merge_source: 邮件合并数据源 (CSV/XLSX)，第一行为表头，之后每行生成一个文件，
+      第一列的值作为 $NAME，各列可通过 ${COL:列名} 引用；数据源逐行流式读取
+    - merge_sheet: 数据源为 XLSX 时的工作表名称，默认为活动工作表
+    - template_file: 模板文件，可以是任意类型；指定后每个文件都是模板的副本，
+      不再使用 content_template，复制时优先使用 reflink 和 copy_file_range
+    - progress_callback: 进度回调，每处理一定数量的文件调用一次，参数为 BatchProgress
+    - file_size: 文件大小，字节数或带单位的字符串（如 "10MB"），指定后按大小生成文件，
+      不再使用 content_template
+    - size_column: 使用数据源时按行指定文件大小的列名，该列为空的行使用 file_size
+    - allocation: 指定大小时的空间分配方式，"sparse" 截断为稀疏文件，
+      "fallocate" 预先分配磁盘空间，"pattern" 写入固定的循环字节序列
+    
+    names 按需逐个读取，不会预先计数，可以是任意长度的迭代器
     
     返回元组 (成功标志, 消息)
     """
-    logger.info(f"开始创建文件，共{len(names)}个，目标目录：{target_dir}")
+    if merge_source:
+        logger.info(f"开始按数据源创建文件，数据源：{merge_source}，目标目录：{target_dir}")
+    else:
+        logger.info(f"开始创建文件，{_describe_count(names)}，目标目录：{target_dir}")
     
     if not os.path.exists(target_dir):
         try:
@@ -46,93 +111,720 @@ def create_files(names, target_dir, file_type=".txt", content_template=None,
         logger.error(error_msg)
         return False, error_msg
     
-    created_count = 0
-    skipped_count = 0
-    error_files = []
+    if template_file:
+        if not os.path.isfile(template_file):
+            error_msg = f"模板文件不存在：{template_file}"
+            logger.error(error_msg)
+            return False, error_msg
+        logger.info(f"使用模板文件：{template_file}")
+        content_template = None
     
-    for i, name in enumerate(names):
-        if not name.strip():
-            logger.warning(f"跳过空文件名，索引：{i+1}")
-            continue
-        
-        seq = start_value + i * step
-        seq_str = str(seq).zfill(digits)
-        
+    sized = file_size is not None or size_column is not None
+    if sized:
+        if template_file:
+            error_msg = "模板文件不能与文件大小同时使用"
+            logger.error(error_msg)
+            return False, error_msg
+        if allocation not in FILL_MODES:
+            error_msg = f"不支持的分配方式：{allocation}"
+            logger.error(error_msg)
+            return False, error_msg
+        if size_column is not None and not merge_source:
+            error_msg = "按列指定文件大小时需要指定数据源"
+            logger.error(error_msg)
+            return False, error_msg
         try:
-            # 处理命名规则
-            if naming_rule:
-                filename = apply_naming_rule(naming_rule, name, seq)
-            else:
-                filename = name
-            
-            # 添加文件扩展名
-            if not filename.endswith(file_type):
-                filename += file_type
-            
-            file_path = os.path.join(target_dir, filename)
-            
-            # 检查文件是否已存在
-            if os.path.exists(file_path):
-                logger.warning(f"文件已存在，跳过：{file_path}")
-                skipped_count += 1
+            default_size = parse_size(file_size) if file_size is not None else None
+        except ValueError as e:
+            logger.error(str(e))
+            return False, str(e)
+        size_desc = f"数据源列 {size_column}" if size_column is not None else str(file_size)
+        logger.info(f"按大小生成文件，大小：{size_desc}，分配方式：{allocation}")
+        content_template = None
+    
+    # 命名规则和内容模板只解析一次，日期在本批次内固定
+    rule = NamingRule(naming_rule, digits=digits) if naming_rule else None
+    template = ContentTemplate(content_template, digits=digits) if content_template else None
+    rule_columns = template_columns = size_columns = lambda row: ()
+    
+    if merge_source:
+        try:
+            rows = iter_table_rows(merge_source, merge_sheet)
+            headers = next(rows, None)
+            if not headers:
+                error_msg = f"数据源为空：{merge_source}"
+                logger.error(error_msg)
+                return False, error_msg
+            if rule:
+                rule_columns = bind_columns(rule.columns, headers)
+            if template:
+                template_columns = bind_columns(template.columns, headers)
+            if size_column is not None:
+                size_columns = bind_columns([size_column], headers)
+        except Exception as e:
+            error_msg = f"读取数据源失败：{str(e)}"
+            logger.error(error_msg)
+            return False, error_msg
+        entries = ((row[0] if row else "", row) for row in rows)
+    else:
+        if (rule and rule.columns) or (template and template.columns):
+            error_msg = "使用 ${COL:列名} 变量时需要指定数据源"
+            logger.error(error_msg)
+            return False, error_msg
+        entries = ((name, ()) for name in names)
+    
+    # 只列出一次目标目录，已存在的文件直接跳过
+    try:
+        existing_names = set(os.listdir(target_dir))
+    except OSError as e:
+        error_msg = f"读取目标目录失败：{str(e)}"
+        logger.error(error_msg)
+        return False, error_msg
+    
+    progress = BatchProgress(progress_callback)
+    # 本批次已经安排创建的文件名，重名时保留第一行，不交给并行批次去竞争
+    planned_names = set()
+    
+    def plan_tasks():
+        """逐个生成 (名称, 文件名, 文件内容)，本批次内重名的文件只保留第一个"""
+        for i, (name, row) in enumerate(entries):
+            if not name.strip():
+                logger.warning(f"跳过空文件名，索引：{i+1}")
                 continue
             
-            # 创建文件并写入内容
-            file_content = ""
-            if content_template:
-                # 替换内容模板中的变量
-                file_content = content_template.replace("${NAME}", name)
-                file_content = file_content.replace("${ISEQ}", seq_str)
-            
-            create_file_with_type(file_path, file_content, file_type)
-            logger.info(f"创建文件成功：{file_path}")
-            created_count += 1
+            seq = start_value + i * step
             
-        except Exception as e:
-            error_msg = f"处理文件 {name} 时出错：{str(e)}"
-            logger.error(error_msg)
-            error_files.append(name)
+            try:
+                # 处理命名规则
+                if rule:
+                    filename = rule.render(name, seq, rule_columns(row))
+                else:
+                    filename = name
+                
+                # 添加文件扩展名
+                if not filename.endswith(file_type):
+                    filename += file_type
+                
+                # 检查文件是否已存在
+                if filename in existing_names:
+                    logger.warning(f"文件已存在，跳过：{os.path.join(target_dir, filename)}")
+                    progress.add_skipped()
+                    continue
+                if filename in planned_names:
+                    logger.warning(f"与本批次中前面的文件重名，跳过：{os.path.join(target_dir, filename)}")
+                    progress.add_skipped()
+                    continue
+                
+                if sized:
+                    # 按大小生成时任务内容为文件的字节数
+                    size_text = size_columns(row)[0] if size_column is not None else ""
+                    file_content = parse_size(size_text) if size_text else default_size
+                    if file_content is None:
+                        raise ValueError("未指定文件大小")
+                else:
+                    # 替换内容模板中的变量
+                    file_content = template.render(name, seq, template_columns(row)) if template else ""
+                
+                planned_names.add(filename)
+                yield name, filename, file_content
+                
+            except Exception as e:
+                error_msg = f"处理文件 {name} 时出错：{str(e)}"
+                logger.error(error_msg)
+                progress.add_failed(name)
     
-    result_msg = f"创建完成。成功：{created_count}个，跳过：{skipped_count}个，失败：{len(error_files)}个"
-    if error_files:
-        result_msg += f"，失败文件：{', '.join(error_files[:5])}"
-        if len(error_files) > 5:
-            result_msg += f" 等{len(error_files)}个"
+    # 按任务顺序汇总结果
+    try:
+        for (name, filename, _), (status, error) in _run_create_file_tasks(
+                target_dir, plan_tasks(), file_type, parallel, max_workers, template_file,
+                allocation if sized else None):
+            file_path = os.path.join(target_dir, filename)
+            if status == "created":
+                logger.info(f"创建文件成功：{file_path}")
+                progress.add_created()
+            elif status == "exists":
+                # 列出目录之后才由其他程序创建的文件
+                logger.warning(f"文件已存在，跳过：{file_path}")
+                progress.add_skipped()
+            else:
+                logger.error(f"处理文件 {name} 时出错：{error}")
+                progress.add_failed(name)
+    except Exception as e:
+        # 数据源读取等中途出错时报告已完成的数量
+        error_msg = f"创建文件时出错：{str(e)}"
+        logger.error(error_msg)
+        return False, f"{error_msg}。已创建：{progress.created}个"
     
+    result_msg = progress.summary("失败文件")
     logger.info(result_msg)
     return True, result_msg
 
+class BatchProgress:
+    """
+    批量创建的进度计数
+
+    只保留前几个失败项用于结果消息，每处理 interval 项记录一次日志并调用回调，
+    处理任意长度的输入时内存占用不变
+    """
+
+    def __init__(self, callback=None, interval=PROGRESS_INTERVAL, sample_size=5):
+        self.callback = callback
+        self.interval = interval
+        self.sample_size = sample_size
+        self.created = 0
+        self.skipped = 0
+        self.failed = 0
+        self.failed_samples = []
+
+    @property
+    def processed(self):
+        return self.created + self.skipped + self.failed
+
+    def add_created(self):
+        self.created += 1
+        self._tick()
+
+    def add_skipped(self):
+        self.skipped += 1
+        self._tick()
+
+    def add_failed(self, name):
+        self.failed += 1
+        if len(self.failed_samples) < self.sample_size:
+            self.failed_samples.append(name)
+        self._tick()
+
+    def _tick(self):
+        if self.processed % self.interval == 0:
+            logger.info(f"已处理{self.processed}个。成功：{self.created}个，跳过：{self.skipped}个，失败：{self.failed}个")
+            if self.callback:
+                self.callback(self)
+
+    def summary(self, failed_label):
+        """生成结果消息，failed_label 为失败项的标签，如 失败文件、失败目录"""
+        result_msg = f"创建完成。成功：{self.created}个，跳过：{self.skipped}个，失败：{self.failed}个"
+        if self.failed:
+            result_msg += f"，{failed_label}：{', '.join(self.failed_samples)}"
+            if self.failed > self.sample_size:
+                result_msg += f" 等{self.failed}个"
+        return result_msg
+
+def sequence_names(count, start_value=1, step=1):
+    """
+    按序号惰性生成名称，用于只按序号批量创建的场景
+
+    第 i 个名称为序号 start_value + i * step 的字符串，与使用相同起始值和步长时
+    命名规则中的 $ISEQ 对应，不会一次性生成名称列表
+
+    参数:
+    - count: 数量
+    - start_value: 序号起始值
+    - step: 序号步长
+    """
+    return map(str, itertools.islice(itertools.count(start_value, step), count))
+
+def parse_size(value):
+    """
+    解析文件大小
+    
+    参数:
+    - value: 字节数，或带单位的字符串，如 "512"、"10KB"、"1.5G"、"2MiB"，单位按 1024 换算
+    
+    返回字节数，格式无效时抛出 ValueError
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        size = value
+    else:
+        match = SIZE_PATTERN.match(str(value))
+        if not match:
+            raise ValueError(f"文件大小格式无效：{value}")
+        size = int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+    if size < 0:
+        raise ValueError(f"文件大小不能为负数：{value}")
+    return size
+
+def _describe_count(items):
+    """返回日志中使用的数量描述，惰性生成的输入不提前计数"""
+    if hasattr(items, '__len__'):
+        return f"共{len(items)}个"
+    return "数量按需生成"
+
+def _escape_format(text):
+    """转义 str.format 中的花括号"""
+    return text.replace('{', '{{').replace('}', '}}')
+
+def bind_columns(columns, headers):
+    """
+    将模板中引用的列名绑定到数据源表头
+
+    参数:
+    - columns: 模板引用的列名列表
+    - headers: 数据源表头
+
+    返回函数，输入一行数据，按 columns 顺序返回对应的值；缺少的单元格为空字符串
+    """
+    index = {}
+    for i, header in enumerate(headers):
+        index.setdefault(header, i)
+    missing = [column for column in columns if column not in index]
+    if missing:
+        raise ValueError(f"数据源中没有列：{', '.join(missing)}")
+    positions = [index[column] for column in columns]
+    return lambda row: tuple(row[i] if i < len(row) else "" for i in positions)
+
+class NamingRule:
+    """
+    预编译的命名规则
+
+    规则只解析一次并转换为格式化字符串，日期变量在创建时固定，
+    同一批次内的预览和执行使用同一个对象即可保证结果一致
+
+    支持的变量:
+    - $NAME: 原始名称
+    - $ISEQ / $ISEQ3: 序号，可指定位数；不指定位数时使用 digits
+    - $YYYY, $MM, $DD: 年、月、日
+    - ${COL:列名}: 数据源中对应列的值，见 bind_columns
+    """
+
+    TOKEN_PATTERN = re.compile(r'\$(NAME|ISEQ(\d*)|YYYY|MM|DD|\{COL:([^}]*)\})')
+
+    def __init__(self, rule, digits=None, now=None):
+        """
+        参数:
+        - rule: 命名规则，例如 "prefix_$NAME_$ISEQ3"
+        - digits: 未指定位数的 $ISEQ 使用的位数，为 None 时不补零
+        - now: 日期变量使用的时间，默认为当前时间
+        """
+        self.rule = rule
+        self.digits = digits
+        self.now = now or datetime.now()
+        self.uses_name = False
+        self.uses_seq = False
+        self.columns = []
+
+        dates = {
+            'YYYY': self.now.strftime('%Y'),
+            'MM': self.now.strftime('%m'),
+            'DD': self.now.strftime('%d'),
+        }
+        parts = []
+        pos = 0
+        for match in self.TOKEN_PATTERN.finditer(rule):
+            parts.append(_escape_format(rule[pos:match.start()]))
+            token = match.group(1)
+            if token == 'NAME':
+                self.uses_name = True
+                parts.append('{0}')
+            elif token.startswith('ISEQ'):
+                self.uses_seq = True
+                width = int(match.group(2)) if match.group(2) else digits
+                parts.append(f'{{1:0{width}d}}' if width else '{1}')
+            elif match.group(3) is not None:
+                parts.append(_column_field(self.columns, match.group(3)))
+            else:
+                parts.append(_escape_format(dates[token]))
+            pos = match.end()
+        parts.append(_escape_format(rule[pos:]))
+        self._format = ''.join(parts).format
+
+    def render(self, name, seq, columns=()):
+        """
+        按规则生成单个名称
+
+        columns 为 self.columns 中各列对应的值
+        """
+        return self._format(name, seq, *columns)
+
+    def iter_names(self, names, start_value=1, step=1):
+        """
+        按顺序惰性生成名称，第 i 个名称使用序号 start_value + i * step
+
+        names 可以是任意可迭代对象，不会一次性生成全部结果
+        """
+        return map(self._format, names, itertools.count(start_value, step))
+
+class ContentTemplate:
+    """
+    预编译的文件内容模板
+
+    支持的变量:
+    - ${NAME}: 原始名称
+    - ${ISEQ}: 序号，按 digits 补零
+    - ${COL:列名}: 数据源中对应列的值，见 bind_columns
+    """
+
+    TOKEN_PATTERN = re.compile(r'\$\{(NAME|ISEQ|COL:([^}]*))\}')
+
+    def __init__(self, template, digits=3):
+        self.template = template
+        self.columns = []
+
+        parts = []
+        pos = 0
+        for match in self.TOKEN_PATTERN.finditer(template):
+            parts.append(_escape_format(template[pos:match.start()]))
+            token = match.group(1)
+            if token == 'NAME':
+                parts.append('{0}')
+            elif token == 'ISEQ':
+                parts.append(f'{{1:0{digits}d}}' if digits else '{1}')
+            else:
+                parts.append(_column_field(self.columns, match.group(2)))
+            pos = match.end()
+        parts.append(_escape_format(template[pos:]))
+        self._format = ''.join(parts).format
+
+    def render(self, name, seq, columns=()):
+        """生成单个文件的内容，columns 为 self.columns 中各列对应的值"""
+        return self._format(name, seq, *columns)
+
+def _column_field(columns, column):
+    """返回列引用对应的格式化字段，列值从第 3 个位置参数开始依次传入"""
+    if column not in columns:
+        columns.append(column)
+    return f'{{{columns.index(column) + 2}}}'
+
 def apply_naming_rule(rule, name, seq):
     """
     应用命名规则
-    
+
+    批量处理时请直接使用 NamingRule，避免每次调用都重新解析规则
+
     参数:
     - rule: 命名规则，例如 "prefix_$NAME_$ISEQ3"
     - name: 原始名称
     - seq: 序号
-    
+
     返回生成的文件名
     """
-    # 替换基本变量
-    result = rule.replace('$NAME', name)
+    return NamingRule(rule).render(name, seq)
+
+class TemplateCloner:
+    """
+    将模板文件复制到已打开的目标文件
+
+    模板文件只打开一次，依次尝试 reflink (FICLONE)、copy_file_range 和缓冲复制，
+    不支持的方式失败一次后不再尝试；缓冲复制时较小的模板只读取一次并缓存在内存中。
+    读取模板时都指定偏移量，同一个实例可供多个线程同时使用
+    """
+
+    # Linux FICLONE ioctl 编号
+    FICLONE = 0x40049409
+    # 缓冲复制时缓存模板内容的大小上限
+    CACHE_LIMIT = 64 * 1024 * 1024
+    # 缓冲复制的块大小
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, template_path):
+        self.template_path = template_path
+        self.fd = os.open(template_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0) | getattr(os, 'O_CLOEXEC', 0))
+        self.size = os.fstat(self.fd).st_size
+        self.use_reflink = fcntl is not None and sys.platform.startswith('linux')
+        self.use_copy_range = hasattr(os, 'copy_file_range')
+        self.data = None
+        self.lock = threading.Lock()
+
+    def copy_to(self, dst_fd):
+        """将模板内容写入空的目标文件"""
+        if self.size == 0:
+            return
+        if self.use_reflink:
+            try:
+                fcntl.ioctl(dst_fd, self.FICLONE, self.fd)
+                return
+            except OSError:
+                self.use_reflink = False
+        if self.use_copy_range:
+            copied = 0
+            try:
+                while copied < self.size:
+                    count = os.copy_file_range(self.fd, dst_fd, self.size - copied, copied)
+                    if count == 0:
+                        break
+                    copied += count
+                if copied == self.size:
+                    return
+            except OSError:
+                # 跨文件系统等不支持的情况
+                if copied:
+                    raise
+            self.use_copy_range = False
+        self._buffered_copy(dst_fd)
+
+    def _buffered_copy(self, dst_fd):
+        if self.data is None and self.size <= self.CACHE_LIMIT:
+            with self.lock:
+                if self.data is None:
+                    self.data = b''.join(self._iter_chunks())
+        chunks = [self.data] if self.data is not None else self._iter_chunks()
+        for chunk in chunks:
+            view = memoryview(chunk)
+            while view:
+                view = view[os.write(dst_fd, view):]
+
+    def _iter_chunks(self):
+        offset = 0
+        while True:
+            chunk = self._read_at(offset)
+            if not chunk:
+                break
+            offset += len(chunk)
+            yield chunk
+
+    def _read_at(self, offset):
+        if hasattr(os, 'pread'):
+            return os.pread(self.fd, self.CHUNK_SIZE, offset)
+        # Windows 没有 pread，定位和读取需要一起完成
+        with self.lock:
+            os.lseek(self.fd, offset, os.SEEK_SET)
+            return os.read(self.fd, self.CHUNK_SIZE)
+
+    def close(self):
+        os.close(self.fd)
+
+class SizedFileWriter:
+    """
+    将已打开的空文件扩展到指定大小
+
+    "sparse" 只截断文件长度，不写入数据；"fallocate" 使用 posix_fallocate 预先分配磁盘空间，
+    平台或文件系统不支持时退回截断；"pattern" 循环写入固定的字节序列，相同大小的文件内容相同
+    """
+
+    # 循环写入的 1MB 字节序列
+    PATTERN_BLOCK = bytes(range(256)) * 4096
+
+    def __init__(self, allocation="sparse"):
+        self.allocation = allocation
+        self.use_fallocate = allocation == "fallocate" and hasattr(os, 'posix_fallocate')
+
+    def write(self, fd, size):
+        """将文件扩展到 size 字节"""
+        if size == 0:
+            return
+        if self.allocation == "pattern":
+            self._write_pattern(fd, size)
+            return
+        if self.use_fallocate:
+            try:
+                os.posix_fallocate(fd, 0, size)
+                return
+            except OSError as e:
+                if e.errno not in (errno.EOPNOTSUPP, errno.ENOSYS, errno.EINVAL):
+                    raise
+                self.use_fallocate = False
+        os.ftruncate(fd, size)
+
+    def _write_pattern(self, fd, size):
+        block = memoryview(self.PATTERN_BLOCK)
+        remaining = size
+        while remaining:
+            view = block[:min(remaining, len(block))]
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+                remaining -= written
+
+def _create_file_batch(job):
+    """
+    创建一批文件的任务函数，可在子进程中执行
+
+    每个文件以 O_CREAT|O_EXCL 打开，已存在时不会覆盖；
+    平台支持时相对于目标目录的文件描述符创建，避免重复解析完整路径
+
+    参数:
+    - job: (目标目录, 文件类型, [(文件名, 文件内容), ...], 模板, 分配方式)，
+      模板不为 None 时每个文件都复制自模板，忽略文件内容：在当前进程中执行时为调用方打开的
+      TemplateCloner，交给子进程时为模板文件路径，每个子进程只打开一次；
+      分配方式不为 None 时文件内容为文件大小，由 SizedFileWriter 生成
+
+    按顺序返回每个文件的 (状态, 错误信息)，状态为 "created"、"exists" 或 "error"
+    """
+    target_dir, file_type, items, template, allocation = job
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0) | getattr(os, 'O_CLOEXEC', 0)
+    dir_fd = None
+    if os.open in os.supports_dir_fd:
+        try:
+            dir_fd = os.open(target_dir, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+        except OSError:
+            dir_fd = None
+
+    results = []
+    cloner = None
+    sizer = SizedFileWriter(allocation) if allocation else None
+    try:
+        if isinstance(template, TemplateCloner):
+            cloner = template
+        elif template:
+            cloner = _process_template_cloner(template)
+        for filename, content in items:
+            try:
+                data = None if cloner or sizer else render_file_content(content, file_type)
+                if dir_fd is not None:
+                    fd = os.open(filename, flags, 0o666, dir_fd=dir_fd)
+                else:
+                    fd = os.open(os.path.join(target_dir, filename), flags, 0o666)
+                with os.fdopen(fd, 'wb') as f:
+                    if cloner:
+                        cloner.copy_to(fd)
+                    elif sizer:
+                        sizer.write(fd, content)
+                    else:
+                        f.write(data)
+                results.append(("created", None))
+            except FileExistsError:
+                results.append(("exists", None))
+            except Exception as e:
+                results.append(("error", str(e)))
+    except OSError as e:
+        # 模板文件无法打开时整批失败
+        results.extend(("error", str(e)) for _ in items[len(results):])
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
+    return results
+
+# 子进程中按路径缓存的模板，进程池只在一次创建任务中使用，随子进程退出关闭
+_process_cloners = {}
+
+def _process_template_cloner(template_file):
+    """返回当前子进程中的模板 TemplateCloner，每个子进程只打开一次模板文件"""
+    cloner = _process_cloners.get(template_file)
+    if cloner is None:
+        cloner = _process_cloners[template_file] = TemplateCloner(template_file)
+    return cloner
+
+def _choose_parallel_mode(file_type, count, parallel, io_only=False):
+    """根据文件类型和数量确定实际使用的执行模式，复制模板或按大小生成时只涉及 I/O，使用多线程"""
+    if parallel != "auto":
+        return parallel
+    if count < PARALLEL_MIN_COUNT:
+        return "serial"
+    if not io_only and file_type.lower() in PROCESS_POOL_FILE_TYPES:
+        # 单核机器上多进程只会增加开销
+        return "process" if (os.cpu_count() or 1) > 1 else "serial"
+    return "thread"
+
+def _run_create_file_tasks(target_dir, tasks, file_type, parallel="auto", max_workers=None, template_file=None,
+                           allocation=None):
+    """
+    执行文件创建任务
+
+    参数:
+    - target_dir: 目标目录
+    - tasks: (名称, 文件名, 文件内容) 的可迭代对象，按需逐批读取
+    - file_type: 文件类型
+    - parallel: 并行模式，见 create_files
+    - max_workers: 最大工作进程/线程数
+    - template_file: 模板文件，见 create_files
+    - allocation: 按大小生成时的分配方式，见 create_files；为 None 时按内容生成
+
+    按任务顺序逐个生成 (任务, (状态, 错误信息))，同时在途的批次数有上限，内存占用不随任务数增长
+    """
+    tasks = iter(tasks)
+    first_batch = list(itertools.islice(tasks, CREATE_BATCH_SIZE))
+    batches = itertools.chain([first_batch], iter(lambda: list(itertools.islice(tasks, CREATE_BATCH_SIZE)), []))
+    mode = _choose_parallel_mode(file_type, len(first_batch), parallel, io_only=bool(template_file or allocation))
+
+    # 模板文件在本次运行中只打开一次，各批次共用
+    cloner = None
+    if template_file:
+        try:
+            cloner = TemplateCloner(template_file)
+        except OSError as e:
+            for batch in batches:
+                for task in batch:
+                    yield task, ("error", str(e))
+            return
+
+    try:
+        def make_job(batch, in_process=False):
+            # 子进程无法共享已打开的模板，只传路径
+            template = template_file if in_process else cloner
+            return (target_dir, file_type, [(f, c) for _, f, c in batch], template, allocation)
+
+        def run_serial(batch, recovering=False):
+            results = _create_file_batch(make_job(batch))
+            if recovering:
+                # 执行器中断的批次可能已有部分文件由中断的工作进程创建；文件名已在计划时去重，
+                # 列出目录时也不存在，这里已存在的文件只能是本次运行创建的，按已创建统计
+                results = [("created", None) if status == "exists" else (status, error) for status, error in results]
+            return zip(batch, results)
+
+        if mode == "serial" or not first_batch:
+            for batch in batches:
+                yield from run_serial(batch)
+            return
+
+        workers = max_workers or min(os.cpu_count() or 1, 61)
+        if mode == "process":
+            try:
+                pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+                logger.info(f"使用多进程创建文件，进程数：{workers}")
+            except OSError as e:
+                # 无法启动子进程时（受限环境等）退回多线程
+                logger.warning(f"多进程创建不可用，改用多线程：{str(e)}")
+                mode = "thread"
+        if mode == "thread":
+            pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+            logger.info(f"使用多线程创建文件，线程数：{workers}")
+
+        broken = False
+
+        def collect(batch, future):
+            """取回一批任务的结果，执行器中断时改为在当前线程执行"""
+            nonlocal broken
+            if future is not None:
+                try:
+                    return zip(batch, future.result())
+                except concurrent.futures.BrokenExecutor as e:
+                    logger.warning(f"并行创建中断，改为顺序执行：{str(e)}")
+                    broken = True
+                # 已提交给中断的执行器的批次重新顺序执行
+                return run_serial(batch, recovering=True)
+            return run_serial(batch)
+
+        with pool:
+            pending = collections.deque()
+            for batch in batches:
+                future = None
+                if not broken:
+                    try:
+                        future = pool.submit(_create_file_batch, make_job(batch, mode == "process"))
+                    except concurrent.futures.BrokenExecutor as e:
+                        logger.warning(f"并行创建中断，改为顺序执行：{str(e)}")
+                        broken = True
+                pending.append((batch, future))
+                # 等待最早的批次完成，限制同时在途的批次数
+                while pending and (broken or len(pending) >= workers * 2):
+                    yield from collect(*pending.popleft())
+            while pending:
+                yield from collect(*pending.popleft())
+    finally:
+        if cloner:
+            cloner.close()
+
+def render_file_content(content, file_type):
+    """
+    按文件类型生成文件的字节内容
+
+    参数:
+    - content: 文件内容
+    - file_type: 文件类型 (.txt, .xlsx 等)
+    """
+    file_type = file_type.lower()
     
-    # 处理序号变量，支持指定位数
-    seq_matches = re.findall(r'\$ISEQ(\d*)', result)
-    for seq_match in seq_matches:
-        if seq_match:
-            seq_digits = int(seq_match)
-            seq_formatted = str(seq).zfill(seq_digits)
-            result = result.replace(f'$ISEQ{seq_match}', seq_formatted)
-        else:
-            result = result.replace('$ISEQ', str(seq))
+    if file_type == '.xlsx':
+        # Excel 文件，基于预先渲染的模板包生成，内容按行写入 A 列
+        return get_xlsx_template().build(content.split('\n') if content else [])
     
-    # 处理日期变量
-    now = datetime.now()
-    result = result.replace('$YYYY', now.strftime('%Y'))
-    result = result.replace('$MM', now.strftime('%m'))
-    result = result.replace('$DD', now.strftime('%d'))
+    if file_type == '.doc' or file_type == '.docx':
+        # Word 文件，使用内置模板生成，每个非空行一个段落
+        return build_docx(text_to_paragraphs(content))
     
-    return result
+    # 文本文件及其他类型，与文本模式写入一样使用系统换行符
+    if os.linesep != '\n':
+        content = content.replace('\n', os.linesep)
+    return content.encode('utf-8')
 
 def create_file_with_type(file_path, content, file_type):
     """
@@ -143,63 +835,135 @@ def create_file_with_type(file_path, content, file_type):
     - content: 文件内容
     - file_type: 文件类型 (.txt, .xlsx 等)
     """
-    file_type = file_type.lower()
-    
-    if file_type in ['.txt', '.md', '.py', '.html', '.css', '.js', '.json', '.csv']:
-        # 文本文件
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-    
-    elif file_type == '.xlsx':
-        # Excel 文件
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        if content:
-            # 如果有内容，按行写入
-            for i, line in enumerate(content.split('\n')):
-                ws.cell(row=i+1, column=1, value=line)
-        wb.save(file_path)
-    
-    elif file_type == '.doc' or file_type == '.docx':
-        try:
-            from docx import Document
-            doc = Document()
-            if content:
-                # 按段落添加内容
-                for para in content.split('\n'):
-                    if para.strip():
-                        doc.add_paragraph(para)
-            doc.save(file_path)
-        except ImportError:
-            # 如果没有python-docx，创建文本文件
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            logger.warning(f"未安装python-docx库，已创建文本文件：{file_path}")
-    
-    else:
-        # 默认创建空文件
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+    data = render_file_content(content, file_type)
+    with open(file_path, 'wb') as f:
+        f.write(data)
+
+class DryRunPlan:
+    """
+    创建文件或目录前的试运行计划
+
+    每个目标目录只用 os.scandir 列出一次，之后按名称查找，逐项标注状态：
+    - "new": 将会新建
+    - "exists": 已存在同类型的同名项，执行时会跳过
+    - "conflict": 已存在不同类型的同名项、大小写不敏感文件系统上仅大小写不同的同名项，
+      或与计划中的前一项重名
+    """
+
+    STATUS_LABELS = {"new": "新建", "exists": "已存在", "conflict": "冲突"}
+
+    def __init__(self, kind="file"):
+        """
+        参数:
+        - kind: 计划创建的类型，"file" 或 "dir"
+        """
+        self.kind = kind
+        self.entries = []
+        self.totals = collections.Counter()
+        # 目录路径 -> (名称 -> 是否为目录, 大小写不敏感时的折叠名称集合)
+        self._listings = {}
+        self._planned = set()
+
+    def _listing(self, dir_path):
+        listing = self._listings.get(dir_path)
+        if listing is None:
+            names = {}
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        try:
+                            names[entry.name] = entry.is_dir()
+                        except OSError:
+                            names[entry.name] = False
+            except OSError:
+                # 目录尚不存在时其中的所有项都是新建
+                pass
+            folded = None
+            if names and _is_case_insensitive_dir(dir_path, names):
+                folded = {_fold_name(name) for name in names}
+            listing = self._listings[dir_path] = (names, folded)
+        return listing
+
+    def add(self, path):
+        """
+        标注一个计划创建的路径，返回其状态
+        """
+        dir_path, name = os.path.split(path)
+        names, folded = self._listing(dir_path)
+        key = os.path.join(dir_path, _fold_name(name)) if folded is not None else path
+        if key in self._planned:
+            status = "conflict"
+        elif name in names:
+            status = "exists" if names[name] == (self.kind == "dir") else "conflict"
+        elif folded is not None and _fold_name(name) in folded:
+            status = "conflict"
+        else:
+            status = "new"
+        self._planned.add(key)
+        self.entries.append((path, status))
+        self.totals[status] += 1
+        return status
+
+    def label(self, status):
+        return self.STATUS_LABELS[status]
+
+    def summary(self):
+        """返回各状态数量的统计信息，例如 新建：3个，已存在：1个，冲突：0个"""
+        return "，".join(f"{self.STATUS_LABELS[status]}：{self.totals[status]}个" for status in self.STATUS_LABELS)
+
+def plan_create(paths, kind="file"):
+    """
+    试运行创建文件或目录，不修改磁盘
+
+    参数:
+    - paths: 计划创建的完整路径的可迭代对象
+    - kind: "file" 或 "dir"
+
+    返回 DryRunPlan，entries 中为每个路径的 (路径, 状态)，totals 为各状态的数量
+    """
+    plan = DryRunPlan(kind)
+    for path in paths:
+        plan.add(path)
+    return plan
 
 def create_dirs(dir_names, parent_dir, structure=None, naming_rule=None, 
-               start_value=1, step=1, digits=3, enable_hierarchy=False, indent_spaces=4):
+               start_value=1, step=1, digits=3, enable_hierarchy=False, indent_spaces=4,
+               progress_callback=None, parallel="auto", max_workers=None, structure_source=None,
+               hierarchy_source=None, hierarchy_sheet=None, level_columns=None):
     """
     批量创建目录
     
     参数:
-    - dir_names: 目录名称列表
+    - dir_names: 目录名称列表或惰性生成名称的可迭代对象（如 sequence_names）
     - parent_dir: 父目录
-    - structure: 子目录结构 (可选)，例如 ["images", "docs", "src"]
+    - structure: 子目录结构 (可选)，例如 ["images", "docs", "src/main"]，会在每个新建的目录下创建
     - naming_rule: 命名规则 (可选)
     - start_value: 序号起始值
     - step: 序号步长
     - digits: 序号位数
     - enable_hierarchy: 是否启用层级结构
     - indent_spaces: 缩进空格数
+    - progress_callback: 进度回调，每处理一定数量的目录调用一次，参数为 BatchProgress
+    - parallel: 层级结构的并行模式，"auto" 按目录数量自动选择，"thread" 多线程创建互不依赖的子树，
+      "serial" 顺序执行
+    - max_workers: 并行时的最大线程数
+    - structure_source: 结构模板目录 (可选)，开始前用 snapshot_dir_structure 记录一次其中的子目录，
+      与 structure 合并后在每个新建的目录下重建
+    - hierarchy_source: 分级数据源 (CSV/XLSX)，第一行为表头，之后每行是一个目录路径，
+      各列依次为各级目录；指定后忽略 dir_names，见 iter_hierarchy_rows
+    - hierarchy_sheet: 分级数据源为 XLSX 时的工作表名称，默认为活动工作表
+    - level_columns: 各级目录对应的列名列表，默认按顺序使用全部列
+    
+    dir_names 按需逐个读取，不会预先计数，可以是任意长度的迭代器；
+    启用层级结构或使用分级数据源时先完整解析为目录树，同一父目录下重名的行只创建一次；
+    分级数据源逐行流式读取，相同的上级路径在树中共享节点，内存占用只与目录数有关
     
     返回元组 (成功标志, 消息)
     """
-    logger.info(f"开始创建目录，共{len(dir_names)}个，父目录：{parent_dir}")
+    if hierarchy_source:
+        logger.info(f"开始按层级数据源创建目录，数据源：{hierarchy_source}，父目录：{parent_dir}")
+    else:
+        logger.info(f"开始创建目录，{_describe_count(dir_names)}，父目录：{parent_dir}")
     
     if not os.path.exists(parent_dir):
         try:
@@ -215,145 +979,421 @@ def create_dirs(dir_names, parent_dir, structure=None, naming_rule=None,
         logger.error(error_msg)
         return False, error_msg
     
-    created_count = 0
-    skipped_count = 0
-    error_dirs = []
-    
-    # 处理层级结构
-    if enable_hierarchy:
-        logger.info("启用层级结构处理，缩进空格数：" + str(indent_spaces))
-        # 构建层级关系
-        dir_tree = []
-        current_path = parent_dir
-        parent_at_level = {0: parent_dir}  # 记录每个层级的父目录路径
-        
-        for i, name in enumerate(dir_names):
-            # 计算当前行的缩进层级
-            original_name = name
-            indent_count = 0
-            while name.startswith(' '):
-                name = name[1:]
-                indent_count += 1
-            
-            # 计算层级
-            level = indent_count // indent_spaces if indent_spaces > 0 else 0
-            
-            # 去除前导空格的目录名
-            clean_name = name.strip()
-            if not clean_name:
-                logger.warning(f"跳过空目录名，索引：{i+1}")
-                continue
-            
-            seq = start_value + i * step
-            seq_str = str(seq).zfill(digits)
-            
+    structure = list(structure or [])
+    if structure_source:
+        try:
+            snapshot = snapshot_dir_structure(structure_source)
+        except OSError as e:
+            error_msg = f"读取结构模板目录失败：{str(e)}"
+            logger.error(error_msg)
+            return False, error_msg
+        logger.info(f"已记录结构模板：{structure_source}，共{len(snapshot)}个子目录")
+        structure.extend(snapshot)
+    # 子目录结构只展开一次，之后在每个目录下按相同的相对路径列表创建
+    structure_paths = _structure_paths(structure)
+    
+    progress = BatchProgress(progress_callback)
+    
+    # 命名规则只解析一次，日期在本批次内固定
+    rule = NamingRule(naming_rule, digits=digits) if naming_rule else None
+    
+    # 处理层级结构：先将缩进文本或分级表格解析为目录树，再按父目录优先的顺序创建
+    if enable_hierarchy or hierarchy_source:
+        if hierarchy_source:
+            logger.info(f"按列读取层级结构：{hierarchy_source}")
+            if rule:
+                logger.warning("按列读取层级结构时不使用命名规则")
             try:
-                # 处理命名规则
-                if naming_rule:
-                    dirname = apply_naming_rule(naming_rule, clean_name, seq)
-                else:
-                    dirname = clean_name
-                
-                # 确定父目录路径
-                if level == 0:
-                    # 顶层目录，父目录是parent_dir
-                    parent_path = parent_dir
-                elif level in parent_at_level:
-                    # 使用该层级的父目录
-                    parent_path = parent_at_level[level]
-                else:
-                    # 层级不连续，使用最近的上级层级作为父目录
-                    found = False
-                    for l in range(level-1, -1, -1):
-                        if l in parent_at_level:
-                            parent_path = parent_at_level[l]
-                            found = True
-                            logger.debug(f"找到不连续层级 {level} 的父目录: {parent_path} (层级 {l})")
-                            break
-                    
-                    if not found:
-                        parent_path = parent_dir
-                        logger.warning(f"未找到层级 {level} 的父目录，使用根目录: {parent_dir}")
-                
-                # 创建完整路径
-                dir_path = os.path.join(parent_path, dirname)
-                
-                # 检查目录是否已存在
-                if os.path.exists(dir_path):
-                    logger.warning(f"目录已存在，跳过：{dir_path}")
-                    skipped_count += 1
-                else:
-                    # 创建目录
-                    os.makedirs(dir_path, exist_ok=True)
-                    logger.info(f"创建目录成功：{dir_path}（层级：{level}）")
-                    created_count += 1
-                
-                # 记录当前目录为下一层级的父目录
-                parent_at_level[level+1] = dir_path
-                
-                # 创建子目录结构（如果有）
-                if structure:
-                    for subdir in structure:
-                        sub_path = os.path.join(dir_path, subdir)
-                        if not os.path.exists(sub_path):
-                            os.makedirs(sub_path, exist_ok=True)
-                            logger.info(f"创建子目录成功：{sub_path}")
-                
+                tree = DirTree().parse_paths(iter_hierarchy_rows(hierarchy_source, hierarchy_sheet, level_columns))
             except Exception as e:
-                error_msg = f"处理目录 {original_name} 时出错：{str(e)}"
+                error_msg = f"读取层级数据源失败：{str(e)}"
                 logger.error(error_msg)
-                error_dirs.append(original_name)
+                return False, error_msg
+        else:
+            logger.info("启用层级结构处理，缩进空格数：" + str(indent_spaces))
+            tree = DirTree(indent_spaces).parse(dir_names, rule, start_value, step)
+        logger.info(f"解析目录树完成，共{tree.size}个目录")
+        for line in tree.duplicates:
+            logger.warning(f"目录重复，跳过：{line.strip()}")
+            progress.add_skipped()
+        for line, error in tree.errors:
+            logger.error(f"处理目录 {line} 时出错：{error}")
+            progress.add_failed(line)
+        
+        for dir_path, status, error in _make_dir_tree(tree, parent_dir, structure_paths, parallel, max_workers):
+            if status == "created":
+                logger.info(f"创建目录成功：{dir_path}")
+                progress.add_created()
+            elif status == "exists":
+                logger.warning(f"目录已存在，跳过：{dir_path}")
+                progress.add_skipped()
+            else:
+                logger.error(f"处理目录 {dir_path} 时出错：{error}")
+                progress.add_failed(os.path.relpath(dir_path, parent_dir))
     else:
-        # 不处理层级结构，直接创建目录
-        for i, name in enumerate(dir_names):
-            if not name.strip():
-                logger.warning(f"跳过空目录名，索引：{i+1}")
-                continue
-            
-            seq = start_value + i * step
-            seq_str = str(seq).zfill(digits)
-            
-            try:
-                # 处理命名规则
-                if naming_rule:
-                    dirname = apply_naming_rule(naming_rule, name, seq)
-                else:
-                    dirname = name
-                
-                dir_path = os.path.join(parent_dir, dirname)
-                
-                # 检查目录是否已存在
-                if os.path.exists(dir_path):
-                    logger.warning(f"目录已存在，跳过：{dir_path}")
-                    skipped_count += 1
+        # 不处理层级结构，直接创建目录；平台支持时相对于父目录的文件描述符创建
+        parent_fd = _open_dir(parent_dir) if _dir_fd_supported() else None
+        try:
+            for i, name in enumerate(dir_names):
+                if not name.strip():
+                    logger.warning(f"跳过空目录名，索引：{i+1}")
                     continue
                 
-                # 创建主目录
-                os.makedirs(dir_path)
-                
-                # 创建子目录结构（如果有）
-                if structure:
-                    for subdir in structure:
-                        os.makedirs(os.path.join(dir_path, subdir), exist_ok=True)
+                seq = start_value + i * step
                 
-                logger.info(f"创建目录成功：{dir_path}")
-                created_count += 1
-                
-            except Exception as e:
-                error_msg = f"处理目录 {name} 时出错：{str(e)}"
-                logger.error(error_msg)
-                error_dirs.append(name)
-    
-    result_msg = f"创建完成。成功：{created_count}个，跳过：{skipped_count}个，失败：{len(error_dirs)}个"
-    if error_dirs:
-        result_msg += f"，失败目录：{', '.join(error_dirs[:5])}"
-        if len(error_dirs) > 5:
-            result_msg += f" 等{len(error_dirs)}个"
+                try:
+                    # 处理命名规则
+                    if rule:
+                        dirname = rule.render(name, seq)
+                    else:
+                        dirname = name
+                    
+                    dir_path = os.path.join(parent_dir, dirname)
+                    
+                    # 创建主目录，已存在时跳过
+                    try:
+                        if parent_fd is not None:
+                            os.mkdir(dirname, dir_fd=parent_fd)
+                        else:
+                            os.makedirs(dir_path)
+                    except FileNotFoundError:
+                        # 名称中包含尚不存在的上级目录
+                        os.makedirs(dir_path)
+                    except FileExistsError:
+                        logger.warning(f"目录已存在，跳过：{dir_path}")
+                        progress.add_skipped()
+                        continue
+                    
+                    # 创建子目录结构（如果有）
+                    if structure_paths:
+                        if parent_fd is not None:
+                            dir_fd = _open_dir(dirname, dir_fd=parent_fd)
+                            try:
+                                _stamp_structure(dir_fd, dir_path, structure_paths)
+                            finally:
+                                os.close(dir_fd)
+                        else:
+                            _stamp_structure(None, dir_path, structure_paths)
+                    
+                    logger.info(f"创建目录成功：{dir_path}")
+                    progress.add_created()
+                    
+                except Exception as e:
+                    error_msg = f"处理目录 {name} 时出错：{str(e)}"
+                    logger.error(error_msg)
+                    progress.add_failed(name)
+        finally:
+            if parent_fd is not None:
+                os.close(parent_fd)
     
+    result_msg = progress.summary("失败目录")
     logger.info(result_msg)
     return True, result_msg
 
-def rename_files(file_paths, find_text, replace_text, case_sensitive=True, whole_word=False, use_regex=False, rename_scope="both"):
+class DirTreeNode:
+    """目录树的节点，子节点按目录名索引"""
+
+    __slots__ = ('name', 'children')
+
+    def __init__(self, name=None):
+        self.name = name
+        self.children = {}
+
+    def iter_paths(self, parent_path):
+        """按父目录优先的顺序生成所有下级目录的路径"""
+        stack = [(parent_path, self)]
+        while stack:
+            path, node = stack.pop()
+            for child in reversed(list(node.children.values())):
+                child_path = os.path.join(path, child.name)
+                yield child_path
+                stack.append((child_path, child))
+
+class DirTree:
+    """
+    由缩进文本解析出的目录树
+
+    每行行首的空格数按 indent_spaces 换算为层级，父目录为之前最近一个层级更浅的行，
+    层级不连续时同样挂在该行之下；同一父目录下重名的行合并为一个节点
+    """
+
+    def __init__(self, indent_spaces=4):
+        self.indent_spaces = indent_spaces
+        self.root = DirTreeNode()
+        self.size = 0
+        # 与已有节点重名的行
+        self.duplicates = []
+        # 无法生成目录名的行及错误信息
+        self.errors = []
+
+    def parse(self, lines, rule=None, start_value=1, step=1):
+        """
+        解析缩进文本
+
+        参数:
+        - lines: 文本行的可迭代对象
+        - rule: NamingRule，为 None 时直接使用去除缩进后的名称
+        - start_value: 序号起始值，序号按行号计算，空行同样占用序号
+        - step: 序号步长
+
+        返回自身
+        """
+        stack = [(-1, self.root)]
+        for i, line in enumerate(lines):
+            name = line.lstrip(' ')
+            clean_name = name.strip()
+            if not clean_name:
+                logger.warning(f"跳过空目录名，索引：{i+1}")
+                continue
+
+            indent_count = len(line) - len(name)
+            level = indent_count // self.indent_spaces if self.indent_spaces > 0 else 0
+
+            try:
+                dirname = rule.render(clean_name, start_value + i * step) if rule else clean_name
+            except Exception as e:
+                self.errors.append((clean_name, str(e)))
+                continue
+
+            while stack[-1][0] >= level:
+                stack.pop()
+            parent = stack[-1][1]
+            node = parent.children.get(dirname)
+            if node is None:
+                node = parent.children[dirname] = DirTreeNode(dirname)
+                self.size += 1
+            else:
+                self.duplicates.append(line)
+            stack.append((level, node))
+        return self
+
+    def add_path(self, parts):
+        """
+        按路径逐级插入目录，共享前缀的目录只保留一个节点
+
+        返回是否新增了节点
+        """
+        node = self.root
+        added = False
+        for part in parts:
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = DirTreeNode(part)
+                self.size += 1
+                added = True
+            node = child
+        return added
+
+    def parse_paths(self, paths):
+        """
+        由目录路径构建目录树
+
+        参数:
+        - paths: 各级目录名称序列的可迭代对象，如 ("项目A", "设计", "图纸")
+
+        完全重复的路径记入 duplicates，含空名称或路径分隔符的路径记入 errors；返回自身
+        """
+        for parts in paths:
+            label = "/".join(parts)
+            if any(not part or part in ('.', '..') or '/' in part or '\\' in part for part in parts):
+                self.errors.append((label, "目录名为空或包含路径分隔符"))
+                continue
+            if not self.add_path(parts):
+                self.duplicates.append(label)
+        return self
+
+def snapshot_dir_structure(source_dir):
+    """
+    记录已有目录下的所有子目录，作为 create_dirs 的子目录结构模板
+
+    参数:
+    - source_dir: 源目录
+
+    使用 os.scandir 逐层遍历，只记录目录名，不跟随符号链接；
+    返回按父目录优先排列的相对路径列表，可直接作为 create_dirs 的 structure 参数
+    """
+    paths = []
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(source_dir, rel_dir)) as entries:
+            names = sorted(entry.name for entry in entries if entry.is_dir(follow_symlinks=False))
+        for name in names:
+            paths.append(os.path.join(rel_dir, name) if rel_dir else name)
+        # 逆序入栈，使同级目录按名称顺序展开
+        stack.extend(reversed(paths[len(paths) - len(names):]))
+    return paths
+
+def _structure_paths(structure):
+    """
+    将子目录结构展开为相对路径列表
+
+    参数:
+    - structure: 子目录名称列表，可包含多级路径，如 ["src/main", "docs"]
+
+    返回按父目录优先排列、去重后的相对路径列表，可依次直接创建
+    """
+    paths = []
+    seen = set()
+    for entry in structure or ():
+        parts = [part for part in re.split(r'[\\/]+', entry.strip()) if part]
+        for depth in range(1, len(parts) + 1):
+            rel_path = os.path.join(*parts[:depth])
+            if rel_path not in seen:
+                seen.add(rel_path)
+                paths.append(rel_path)
+    return paths
+
+def _dir_fd_supported():
+    return os.mkdir in os.supports_dir_fd and os.open in os.supports_dir_fd
+
+def _open_dir(path, dir_fd=None):
+    return os.open(path, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0) | getattr(os, 'O_CLOEXEC', 0), dir_fd=dir_fd)
+
+def _stamp_structure(dir_fd, dir_path, structure_paths):
+    """
+    在目录下按预先展开的相对路径列表创建子目录结构，已存在的子目录直接跳过
+
+    dir_fd 不为 None 时相对于该目录的文件描述符创建，否则使用完整路径
+    """
+    if dir_fd is None:
+        for rel_path in structure_paths:
+            os.makedirs(os.path.join(dir_path, rel_path), exist_ok=True)
+        return
+    for rel_path in structure_paths:
+        try:
+            os.mkdir(rel_path, dir_fd=dir_fd)
+        except FileExistsError:
+            pass
+
+def _make_tree_dir(node, parent_fd, parent_path, structure_paths, open_fd):
+    """
+    创建单个目录及其子目录结构
+
+    parent_fd 不为 None 时相对于父目录的文件描述符创建，否则使用完整路径
+
+    返回 (路径, 状态, 错误信息, 目录的文件描述符)，open_fd 为 True 且创建成功时打开目录供下级使用
+    """
+    dir_path = os.path.join(parent_path, node.name)
+    use_fd = parent_fd is not None
+    target = node.name if use_fd else dir_path
+    try:
+        try:
+            os.mkdir(target, dir_fd=parent_fd)
+            status = "created"
+        except FileExistsError:
+            status = "exists"
+        if not use_fd:
+            _stamp_structure(None, dir_path, structure_paths)
+            return dir_path, status, None, None
+        if not (open_fd or structure_paths):
+            return dir_path, status, None, None
+        fd = _open_dir(target, dir_fd=parent_fd)
+        try:
+            _stamp_structure(fd, dir_path, structure_paths)
+        except OSError:
+            os.close(fd)
+            raise
+        if not open_fd:
+            os.close(fd)
+            fd = None
+        return dir_path, status, None, fd
+    except OSError as e:
+        return dir_path, "error", str(e), None
+
+def _make_subtree(node, parent_fd, parent_path, structure_paths):
+    """
+    按父目录优先的顺序创建一棵子树，可在线程中执行
+
+    使用显式栈遍历，层级很深时也不会超出递归深度；超过 DIR_FD_DEPTH_LIMIT 层的目录
+    改用完整路径创建，打开的目录文件描述符数量有上限
+
+    返回每个目录的 (路径, 状态, 错误信息)，目录创建失败时其下级目录都记为失败
+    """
+    results = []
+    # 栈中的整数是需要在整棵子树处理完后关闭的目录文件描述符
+    stack = [(node, parent_fd, parent_path, 0)]
+    try:
+        while stack:
+            entry = stack.pop()
+            if isinstance(entry, int):
+                os.close(entry)
+                continue
+            node, parent_fd, parent_path, depth = entry
+            open_fd = bool(node.children) and parent_fd is not None and depth < DIR_FD_DEPTH_LIMIT
+            dir_path, status, error, fd = _make_tree_dir(node, parent_fd, parent_path, structure_paths, open_fd)
+            results.append((dir_path, status, error))
+            if status == "error":
+                results.extend((path, "error", "上级目录创建失败") for path in node.iter_paths(dir_path))
+                continue
+            if fd is not None:
+                stack.append(fd)
+            stack.extend((child, fd, dir_path, depth + 1) for child in reversed(list(node.children.values())))
+    finally:
+        for entry in stack:
+            if isinstance(entry, int):
+                os.close(entry)
+    return results
+
+def _make_dir_tree(tree, parent_dir, structure_paths=(), parallel="auto", max_workers=None):
+    """
+    创建目录树
+
+    先在当前线程逐层创建上层目录，直到待创建的子树足够分给各个线程，
+    再并行创建这些互不依赖的子树；每个目录只调用一次 mkdir，不再逐个检查是否存在
+
+    按层级顺序生成每个目录的 (路径, 状态, 错误信息)，状态为 "created"、"exists" 或 "error"
+    """
+    mode = parallel
+    if mode == "auto":
+        mode = "thread" if tree.size >= PARALLEL_MIN_COUNT else "serial"
+    elif mode == "process":
+        # 目录的文件描述符不能跨进程共享，使用多线程
+        mode = "thread"
+    workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+
+    opened = []
+    try:
+        root_fd = None
+        if _dir_fd_supported():
+            root_fd = _open_dir(parent_dir)
+            opened.append(root_fd)
+
+        frontier = [(child, root_fd, parent_dir) for child in tree.root.children.values()]
+        if mode != "serial":
+            # 逐层展开，直到待创建的子树数量足够并行
+            while frontier and len(frontier) < workers * 4:
+                next_frontier = []
+                for node, parent_fd, parent_path in frontier:
+                    dir_path, status, error, fd = _make_tree_dir(
+                        node, parent_fd, parent_path, structure_paths, bool(node.children) and parent_fd is not None)
+                    yield dir_path, status, error
+                    if status == "error":
+                        for path in node.iter_paths(dir_path):
+                            yield path, "error", "上级目录创建失败"
+                        continue
+                    if fd is not None:
+                        opened.append(fd)
+                    next_frontier.extend((child, fd, dir_path) for child in node.children.values())
+                frontier = next_frontier
+
+        if mode == "serial" or len(frontier) < 2:
+            for node, parent_fd, parent_path in frontier:
+                yield from _make_subtree(node, parent_fd, parent_path, structure_paths)
+            return
+
+        logger.info(f"使用多线程创建目录树，线程数：{workers}，子树数：{len(frontier)}")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_make_subtree, node, parent_fd, parent_path, structure_paths)
+                       for node, parent_fd, parent_path in frontier]
+            for future in futures:
+                yield from future.result()
+    finally:
+        for fd in opened:
+            os.close(fd)
+
+def rename_files(file_paths, find_text, replace_text, case_sensitive=True, whole_word=False, use_regex=False, rename_scope="both",
+                 journal_dir=RENAME_JOURNAL_DIR):
     """
     批量重命名文件或文件夹
     
@@ -365,6 +1405,7 @@ def rename_files(file_paths, find_text, replace_text, case_sensitive=True, whole
     - whole_word: 是否全词匹配
     - use_regex: 是否使用正则表达式
     - rename_scope: 重命名范围，可选值："name_only"(仅文件名)，"ext_only"(仅扩展名，文件夹忽略此选项)，"both"(文件名和扩展名)
+    - journal_dir: 撤销日志目录，为 None 时不写撤销日志
     
     返回:
     - 成功重命名的项目数量
@@ -378,6 +1419,9 @@ def rename_files(file_paths, find_text, replace_text, case_sensitive=True, whole
     
     name_mapping = {}  # 用于存储文件名映射 {原路径: 新名称}
     
+    # 编译重命名规则，只构造一次
+    renamer = make_renamer(find_text, replace_text, case_sensitive, whole_word, use_regex, rename_scope)
+    
     # 生成文件名映射
     for file_path in file_paths:
         if not os.path.exists(file_path):
@@ -388,145 +1432,25 @@ def rename_files(file_paths, find_text, replace_text, case_sensitive=True, whole
         # 判断是文件还是文件夹
         is_dir = os.path.isdir(file_path)
         file_name = os.path.basename(file_path)
-        new_name = file_name  # 默认不变
+        new_name = renamer(file_name, is_dir)
         
-        if is_dir:
-            # 处理文件夹名称（对文件夹忽略扩展名设置）
-            if rename_scope == "ext_only":
-                # 对于文件夹，如果只替换扩展名则跳过
-                logger.debug(f"文件夹不支持仅替换扩展名，跳过：{file_path}")
-                continue
-            
-            # 替换文件夹名称
-            if not use_regex:
-                if case_sensitive:
-                    if whole_word:
-                        import re
-                        folder_pattern = r'\b' + re.escape(find_text) + r'\b'
-                        new_name = re.sub(folder_pattern, replace_text, file_name)
-                    else:
-                        new_name = file_name.replace(find_text, replace_text)
-                else:
-                    if whole_word:
-                        import re
-                        folder_pattern = r'\b' + re.escape(find_text) + r'\b'
-                        new_name = re.sub(folder_pattern, replace_text, file_name, flags=re.IGNORECASE)
-                    else:
-                        new_name = _replace_case_insensitive(file_name, find_text, replace_text)
-            else:
-                # 使用正则表达式
-                import re
-                flags = 0 if case_sensitive else re.IGNORECASE
-                new_name = re.sub(find_text, replace_text, file_name, flags=flags)
-        else:
-            # 处理文件
-            # 分离文件名和扩展名
-            name_part, ext_part = os.path.splitext(file_name)
-            
-            # 根据应用范围确定要替换的部分
-            if rename_scope == "name_only":
-                # 只替换文件名部分
-                if not use_regex:
-                    if case_sensitive:
-                        if whole_word:
-                            # 全词匹配需要考虑边界
-                            import re
-                            name_pattern = r'\b' + re.escape(find_text) + r'\b'
-                            new_name_part = re.sub(name_pattern, replace_text, name_part)
-                        else:
-                            new_name_part = name_part.replace(find_text, replace_text)
-                    else:
-                        if whole_word:
-                            import re
-                            name_pattern = r'\b' + re.escape(find_text) + r'\b'
-                            new_name_part = re.sub(name_pattern, replace_text, name_part, flags=re.IGNORECASE)
-                        else:
-                            # 不区分大小写的替换
-                            new_name_part = _replace_case_insensitive(name_part, find_text, replace_text)
-                else:
-                    # 使用正则表达式
-                    import re
-                    flags = 0 if case_sensitive else re.IGNORECASE
-                    new_name_part = re.sub(find_text, replace_text, name_part, flags=flags)
-                
-                new_name = new_name_part + ext_part
-            
-            elif rename_scope == "ext_only":
-                # 只替换扩展名部分（不包括点）
-                ext_to_replace = ext_part[1:] if ext_part else ""
-                
-                if not use_regex:
-                    if case_sensitive:
-                        if whole_word:
-                            import re
-                            ext_pattern = r'\b' + re.escape(find_text) + r'\b'
-                            new_ext = re.sub(ext_pattern, replace_text, ext_to_replace)
-                        else:
-                            new_ext = ext_to_replace.replace(find_text, replace_text)
-                    else:
-                        if whole_word:
-                            import re
-                            ext_pattern = r'\b' + re.escape(find_text) + r'\b'
-                            new_ext = re.sub(ext_pattern, replace_text, ext_to_replace, flags=re.IGNORECASE)
-                        else:
-                            new_ext = _replace_case_insensitive(ext_to_replace, find_text, replace_text)
-                else:
-                    # 使用正则表达式
-                    import re
-                    flags = 0 if case_sensitive else re.IGNORECASE
-                    new_ext = re.sub(find_text, replace_text, ext_to_replace, flags=flags)
-                
-                new_name = name_part + ("." + new_ext if new_ext else "")
-            
-            else:  # "both"
-                # 替换整个文件名
-                if not use_regex:
-                    if case_sensitive:
-                        if whole_word:
-                            import re
-                            filename_pattern = r'\b' + re.escape(find_text) + r'\b'
-                            new_name = re.sub(filename_pattern, replace_text, file_name)
-                        else:
-                            new_name = file_name.replace(find_text, replace_text)
-                    else:
-                        if whole_word:
-                            import re
-                            filename_pattern = r'\b' + re.escape(find_text) + r'\b'
-                            new_name = re.sub(filename_pattern, replace_text, file_name, flags=re.IGNORECASE)
-                        else:
-                            new_name = _replace_case_insensitive(file_name, find_text, replace_text)
-                else:
-                    # 使用正则表达式
-                    import re
-                    flags = 0 if case_sensitive else re.IGNORECASE
-                    new_name = re.sub(find_text, replace_text, file_name, flags=flags)
+        if new_name is None:
+            # 对于文件夹，如果只替换扩展名则跳过
+            logger.debug(f"文件夹不支持仅替换扩展名，跳过：{file_path}")
+            continue
         
         # 如果文件名发生了变化，则添加到映射中
         if new_name != file_name:
             name_mapping[file_path] = new_name
     
-    # 执行重命名操作
-    for file_path, new_name in name_mapping.items():
-        file_dir = os.path.dirname(file_path)
-        new_path = os.path.join(file_dir, new_name)
-        
-        try:
-            # 检查新路径是否已存在且不是自身
-            if os.path.exists(new_path) and os.path.normpath(new_path) != os.path.normpath(file_path):
-                logger.warning(f"目标路径已存在，跳过：{new_path}")
-                skipped_count += 1
-                continue
-            
-            # 重命名文件或文件夹
-            shutil.move(file_path, new_path)
-            item_type = "文件夹" if os.path.isdir(new_path) else "文件"
-            logger.info(f"重命名{item_type}成功：{file_path} -> {new_path}")
-            renamed_count += 1
-            
-        except Exception as e:
-            error_msg = f"处理路径 {file_path} 时出错：{str(e)}"
-            logger.error(error_msg)
-            error_files.append(file_path)
+    # 执行重命名操作（交给防冲突执行器统一处理）
+    plan = [(os.path.dirname(file_path), os.path.basename(file_path), new_name)
+            for file_path, new_name in name_mapping.items()]
+    journal_path = new_rename_journal_path(journal_dir) if journal_dir else None
+    result = execute_rename_plan(plan, journal_path)
+    renamed_count += result["renamed"]
+    skipped_count += result["skipped"]
+    error_files.extend(result["errors"])
     
     result_msg = f"重命名完成。成功：{renamed_count}项，跳过：{skipped_count}项，失败：{len(error_files)}项"
     if error_files:
@@ -537,6 +1461,48 @@ def rename_files(file_paths, find_text, replace_text, case_sensitive=True, whole
     logger.info(result_msg)
     return renamed_count
 
+def make_renamer(find_text, replace_text, case_sensitive=True, whole_word=False, use_regex=False, rename_scope="both"):
+    """
+    根据重命名参数构造新名称计算函数，正则只编译一次
+
+    参数同 rename_files
+
+    返回函数 renamer(file_name, is_dir)，返回新名称；
+    文件夹在仅替换扩展名时不适用，返回 None
+    """
+    flags = 0 if case_sensitive else re.IGNORECASE
+    if use_regex:
+        pattern = re.compile(find_text, flags)
+        replace = lambda text: pattern.sub(replace_text, text)
+    elif whole_word:
+        # 全词匹配需要考虑边界
+        pattern = re.compile(r'\b' + re.escape(find_text) + r'\b', flags)
+        replace = lambda text: pattern.sub(replace_text, text)
+    elif case_sensitive:
+        replace = lambda text: text.replace(find_text, replace_text)
+    else:
+        replace = lambda text: _replace_case_insensitive(text, find_text, replace_text)
+    
+    def renamer(file_name, is_dir):
+        if is_dir:
+            # 文件夹忽略扩展名设置
+            if rename_scope == "ext_only":
+                return None
+            return replace(file_name)
+        
+        # 分离文件名和扩展名
+        name_part, ext_part = os.path.splitext(file_name)
+        if rename_scope == "name_only":
+            return replace(name_part) + ext_part
+        elif rename_scope == "ext_only":
+            # 只替换扩展名部分（不包括点）
+            new_ext = replace(ext_part[1:] if ext_part else "")
+            return name_part + ("." + new_ext if new_ext else "")
+        else:  # "both"
+            return replace(file_name)
+    
+    return renamer
+
 def _replace_case_insensitive(text, find, replace):
     """不区分大小写的文本替换"""
     index = 0
@@ -560,6 +1526,602 @@ def _replace_case_insensitive(text, find, replace):
     
     return result
 
+def execute_rename_plan(plan, journal_path=None, listings=None):
+    """
+    按重命名计划执行重命名（防冲突执行器）
+
+    每个目录只列举一次，冲突判断在内存中完成；计划内互相占用的名称
+    （如 a->b、b->a）先改为临时名称再改为最终名称。
+
+    参数:
+    - plan: 重命名计划，(目录, 原名称, 新名称) 三元组的可迭代对象
+    - journal_path: 撤销日志路径 (可选)，每完成一步立即写入，中途失败也可回滚；
+      日志保留后删除同目录中超出 RENAME_JOURNAL_KEEP 份的旧日志
+    - listings: 调用方已列举的目录内容 (可选)，{目录: 名称集合}，其中的目录不再重复列举
+
+    返回字典:
+    - renamed: 成功重命名的数量
+    - skipped: 跳过的数量
+    - errors: 失败项的原路径列表
+    - applied: 实际完成的 (目录, 原名称, 新名称) 列表，按执行顺序
+    """
+    result = {"renamed": 0, "skipped": 0, "errors": [], "applied": []}
+
+    # 按目录分组，保持计划顺序
+    plan_by_dir = {}
+    for dir_path, old_name, new_name in plan:
+        plan_by_dir.setdefault(dir_path, []).append((old_name, new_name))
+
+    journal = None
+    if journal_path:
+        os.makedirs(os.path.dirname(journal_path) or os.curdir, exist_ok=True)
+        journal = open(journal_path, 'w', encoding='utf-8', buffering=1)
+        journal.write(json.dumps({"journal": "rename", "version": 1,
+                                  "created": datetime.now().isoformat(timespec='seconds')},
+                                 ensure_ascii=False) + "\n")
+
+    try:
+        for dir_path, items in plan_by_dir.items():
+            _execute_dir_rename_plan(dir_path, items, result, journal, (listings or {}).get(dir_path))
+    finally:
+        if journal:
+            journal.close()
+            if not result["applied"]:
+                # 没有实际执行任何步骤，不保留空日志
+                os.remove(journal_path)
+            else:
+                # 新日志保留之后才清理旧日志，未执行任何步骤时不会误删仍可撤销的日志
+                prune_rename_journals(os.path.dirname(journal_path) or os.curdir)
+
+    return result
+
+def _fold_name(name):
+    """大小写不敏感文件系统上用于比较的名称：NFC 规范化后再 casefold"""
+    return unicodedata.normalize('NFC', name).casefold()
+
+def _is_equivalent_name(old_name, new_name):
+    """判断两个名称是否只有大小写或 Unicode 规范化形式（NFC/NFD）的差异"""
+    return old_name != new_name and _fold_name(old_name) == _fold_name(new_name)
+
+def _is_case_insensitive_dir(dir_path, names):
+    """
+    探测目录所在文件系统是否大小写不敏感
+
+    取一个含字母的现有名称，检查其大小写互换后的名称是否也能访问到，
+    目录中没有可用名称时按平台默认值判断
+    """
+    for name in names:
+        swapped = name.swapcase()
+        if swapped == name:
+            continue
+        if swapped in names:
+            # 两种大小写同时存在，说明文件系统区分大小写
+            return False
+        return os.path.lexists(os.path.join(dir_path, swapped))
+    # Windows 和 macOS 的默认文件系统都不区分大小写
+    return os.name == 'nt' or sys.platform == 'darwin'
+
+def _rename_no_replace(src, dst):
+    """
+    重命名但不覆盖已存在的目标，目标已存在时抛出 FileExistsError
+
+    只用于列举目录时目标名称被占用、执行时应已空出的情况。Windows 上 os.rename 本身不会覆盖目标；
+    POSIX 上先硬链接到新名称再删除原名称，目标已存在时链接失败。目录或文件系统不支持硬链接时
+    无法原子地检查，退回为重命名前再检查一次目标
+    """
+    if os.name != 'nt':
+        try:
+            os.link(src, dst, follow_symlinks=False)
+        except (OSError, NotImplementedError) as e:
+            if getattr(e, 'errno', None) == errno.EEXIST:
+                raise
+            logger.debug(f"无法通过硬链接重命名，改为检查后重命名：{src}，{str(e)}")
+            if os.path.lexists(dst):
+                raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), dst)
+        else:
+            os.unlink(src)
+            return
+    os.rename(src, dst)
+
+def _execute_dir_rename_plan(dir_path, items, result, journal=None, names=None):
+    """执行单个目录内的重命名计划，结果累加到 result 中；names 为已列举的目录内容，为 None 时重新列举"""
+    list_dir = dir_path or os.curdir
+    if names is None:
+        try:
+            names = os.listdir(list_dir)
+        except OSError as e:
+            logger.error(f"无法读取目录 {list_dir}：{str(e)}")
+            result["errors"].extend(os.path.join(dir_path, old) for old, _ in items)
+            return
+
+    # 大小写不敏感的挂载点（SMB、FAT/exFAT 等）上按折叠后的名称判断占用
+    if _is_case_insensitive_dir(list_dir, names if isinstance(names, set) else set(names)):
+        key = _fold_name
+    else:
+        key = str
+    occupied = {key(name) for name in names}
+
+    if journal:
+        journal.write(json.dumps({"dir": dir_path}, ensure_ascii=False) + "\n")
+
+    sources = {key(old) for old, _ in items}
+    claimed = set()
+    seen_sources = set()
+    direct = []
+    deferred = []
+
+    for old_name, new_name in items:
+        old_path = os.path.join(dir_path, old_name)
+        if key(old_name) in seen_sources:
+            logger.warning(f"重复的重命名项，跳过：{old_path}")
+            result["skipped"] += 1
+            continue
+        seen_sources.add(key(old_name))
+
+        if key(old_name) not in occupied:
+            logger.warning(f"路径不存在，跳过：{old_path}")
+            result["skipped"] += 1
+            continue
+        if not new_name or new_name in (os.curdir, os.pardir) or os.sep in new_name or (os.altsep and os.altsep in new_name):
+            logger.error(f"新名称无效：{old_path} -> {new_name!r}")
+            result["errors"].append(old_path)
+            continue
+        if new_name == old_name:
+            continue
+        new_key = key(new_name)
+        if new_key in claimed:
+            logger.warning(f"多个项目重命名为同一名称，跳过：{os.path.join(dir_path, new_name)}")
+            result["skipped"] += 1
+            continue
+        if new_key in occupied and new_key not in sources:
+            logger.warning(f"目标路径已存在，跳过：{os.path.join(dir_path, new_name)}")
+            result["skipped"] += 1
+            continue
+
+        claimed.add(new_key)
+        if new_key in sources or _is_equivalent_name(old_name, new_name):
+            # 目标名称当前被计划中的项目占用，或只改变大小写/规范化形式，
+            # 需要经由临时名称分两步完成
+            deferred.append((old_name, new_name))
+        else:
+            direct.append((old_name, new_name))
+
+    def do_rename(old_name, new_name, seen=False):
+        # 列举时未被占用的目标直接重命名；列举时被占用的目标（计划内的原名称）不能覆盖
+        rename = _rename_no_replace if seen else os.rename
+        rename(os.path.join(dir_path, old_name), os.path.join(dir_path, new_name))
+        occupied.discard(key(old_name))
+        occupied.add(key(new_name))
+        result["applied"].append((dir_path, old_name, new_name))
+        if journal:
+            journal.write(json.dumps([old_name, new_name], ensure_ascii=False) + "\n")
+
+    def record_error(old_name, e):
+        old_path = os.path.join(dir_path, old_name)
+        logger.error(f"处理路径 {old_path} 时出错：{str(e)}")
+        result["errors"].append(old_path)
+
+    # 第一步：被占用目标的项目先改为临时名称
+    staged = []
+    for index, (old_name, new_name) in enumerate(deferred):
+        temp_name = f".~rename_{os.getpid()}_{index}"
+        while key(temp_name) in occupied:
+            temp_name += "_"
+        try:
+            do_rename(old_name, temp_name)
+            staged.append((old_name, temp_name, new_name))
+        except Exception as e:
+            record_error(old_name, e)
+
+    # 第二步：目标空闲的项目直接重命名
+    for old_name, new_name in direct:
+        try:
+            do_rename(old_name, new_name)
+            logger.info(f"重命名成功：{os.path.join(dir_path, old_name)} -> {os.path.join(dir_path, new_name)}")
+            result["renamed"] += 1
+        except FileExistsError:
+            # 列举目录之后目标被其他程序创建（Windows 上 os.rename 不会覆盖已存在的目标）
+            logger.warning(f"目标路径已存在，跳过：{os.path.join(dir_path, new_name)}")
+            result["skipped"] += 1
+        except Exception as e:
+            record_error(old_name, e)
+
+    # 第三步：临时名称改为最终名称，目标仍被占用时还原
+    for old_name, temp_name, new_name in staged:
+        try:
+            if key(new_name) in occupied:
+                logger.warning(f"目标路径仍被占用，跳过：{os.path.join(dir_path, new_name)}")
+                do_rename(temp_name, old_name, seen=True)
+                result["skipped"] += 1
+                continue
+            try:
+                do_rename(temp_name, new_name, seen=True)
+            except FileExistsError:
+                logger.warning(f"目标路径已存在，跳过：{os.path.join(dir_path, new_name)}")
+                do_rename(temp_name, old_name, seen=True)
+                result["skipped"] += 1
+                continue
+            logger.info(f"重命名成功：{os.path.join(dir_path, old_name)} -> {os.path.join(dir_path, new_name)}")
+            result["renamed"] += 1
+        except Exception as e:
+            record_error(old_name, e)
+
+def new_rename_journal_path(journal_dir=RENAME_JOURNAL_DIR):
+    """生成一个新的撤销日志文件路径"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    return os.path.join(journal_dir, f"rename_{timestamp}.jsonl")
+
+def _list_rename_journals(journal_dir):
+    """按时间先后返回目录中的撤销日志文件名"""
+    try:
+        return sorted(entry.name for entry in os.scandir(journal_dir)
+                      if entry.name.startswith("rename_") and entry.name.endswith(".jsonl"))
+    except OSError:
+        return []
+
+def prune_rename_journals(journal_dir=RENAME_JOURNAL_DIR, keep=RENAME_JOURNAL_KEEP):
+    """只保留最近的 keep 份撤销日志"""
+    journals = _list_rename_journals(journal_dir)
+    for name in journals[:max(len(journals) - keep, 0)]:
+        try:
+            os.remove(os.path.join(journal_dir, name))
+            logger.info(f"删除过期的撤销日志：{name}")
+        except OSError as e:
+            logger.warning(f"删除过期的撤销日志失败：{name}，{str(e)}")
+
+def find_latest_rename_journal(journal_dir=RENAME_JOURNAL_DIR):
+    """返回最近一次重命名的撤销日志路径，不存在时返回 None"""
+    journals = _list_rename_journals(journal_dir)
+    if not journals:
+        return None
+    return os.path.join(journal_dir, journals[-1])
+
+def read_rename_journal(journal_path):
+    """
+    读取撤销日志
+
+    逐条生成已执行的 (目录, 原名称, 新名称)，末尾不完整的行会被忽略
+    """
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        dir_path = None
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 程序中断时最后一行可能只写了一半
+                logger.warning(f"撤销日志中存在不完整的记录，已忽略：{line.strip()}")
+                continue
+            if isinstance(record, dict):
+                if "dir" in record:
+                    dir_path = record["dir"]
+                continue
+            old_name, new_name = record
+            yield dir_path, old_name, new_name
+
+def rollback_rename_journal(journal_path=None, journal_dir=RENAME_JOURNAL_DIR):
+    """
+    按撤销日志回滚一次批量重命名
+
+    日志中的链式步骤（包括临时名称）先按目录折叠为 当前名称->原始名称，
+    再交给 execute_rename_plan 一次性执行，因此中途失败的批次也能完整回滚。
+    全部还原成功后删除该日志；有失败项时保留日志，可再次执行回滚。
+
+    参数:
+    - journal_path: 撤销日志路径，默认使用 journal_dir 中最近的一份
+    - journal_dir: 撤销日志目录
+
+    返回元组 (成功标志, 消息)
+    """
+    if journal_path is None:
+        journal_path = find_latest_rename_journal(journal_dir)
+    if not journal_path or not os.path.exists(journal_path):
+        error_msg = "没有可撤销的重命名记录"
+        logger.warning(error_msg)
+        return False, error_msg
+
+    log_operation_start(logger, "撤销重命名", {"撤销日志": journal_path})
+
+    # 折叠链式步骤：{目录: {当前名称: 原始名称}}
+    origins = {}
+    try:
+        for dir_path, old_name, new_name in read_rename_journal(journal_path):
+            dir_origins = origins.setdefault(dir_path, {})
+            dir_origins[new_name] = dir_origins.pop(old_name, old_name)
+    except Exception as e:
+        log_exception(logger, e, "读取撤销日志")
+        return False, f"读取撤销日志失败：{str(e)}"
+
+    plan = [(dir_path, current, original)
+            for dir_path, dir_origins in origins.items()
+            for current, original in dir_origins.items()
+            if current != original]
+
+    result = execute_rename_plan(plan)
+    if not result["errors"]:
+        # 已完成回滚，删除日志，避免重复撤销
+        os.remove(journal_path)
+
+    result_msg = f"撤销完成。还原：{result['renamed']}项，跳过：{result['skipped']}项，失败：{len(result['errors'])}项"
+    if result["errors"]:
+        result_msg += f"，失败项：{', '.join([os.path.basename(f) for f in result['errors'][:5]])}"
+        if len(result["errors"]) > 5:
+            result_msg += f" 等{len(result['errors'])}个"
+
+    log_operation_end(logger, "撤销重命名", "成功" if not result["errors"] else "部分成功",
+                      result["renamed"], len(result["errors"]))
+    return True, result_msg
+
+def _detect_text_encoding(file_path, encodings=TEXT_ENCODINGS, sample_size=65536):
+    """根据文件开头的样本检测文本编码，utf-8 时返回 utf-8-sig 以去除BOM"""
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+
+    for encoding in encodings:
+        try:
+            # 样本末尾可能截断多字节字符，使用增量解码器避免误判
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+        except UnicodeDecodeError:
+            continue
+        return 'utf-8-sig' if encoding == 'utf-8' else encoding
+
+    return encodings[-1]
+
+def _iter_text_file(file_path, read=iter, newline=None, encodings=TEXT_ENCODINGS):
+    """
+    按检测到的编码流式读取文本文件
+
+    参数:
+    - file_path: 文件路径
+    - read: 将打开的文件对象转换为迭代器的函数，默认逐行读取，也可以传入 csv.reader
+    - newline: 传给 open 的 newline 参数
+    - encodings: 候选编码
+
+    编码只根据文件开头检测，读到后面出现解码错误时从头改用下一个候选编码重新读取，
+    跳过已经生成过的项，保证每一项只生成一次
+    """
+    detected = _detect_text_encoding(file_path, encodings)
+    start = encodings.index('utf-8' if detected == 'utf-8-sig' else detected)
+    produced = 0
+    for encoding in encodings[start:]:
+        if encoding == 'utf-8':
+            encoding = 'utf-8-sig'
+        try:
+            with open(file_path, 'r', encoding=encoding, newline=newline) as f:
+                for index, item in enumerate(read(f)):
+                    if index >= produced:
+                        produced += 1
+                        yield item
+            return
+        except UnicodeDecodeError as e:
+            logger.warning(f"使用{encoding}编码读取到第{produced + 1}项时失败，改用下一个编码重新读取：{file_path}，{e}")
+    raise UnicodeDecodeError(encodings[-1], b'', 0, 1, f"无法识别文件编码：{file_path}")
+
+def format_cell_value(value):
+    """
+    格式化单元格值，处理数字格式
+
+    将浮点数转换为整数(如果可能)，移除.0后缀
+    """
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def iter_names_from_file(file_path, import_type=None, column_index=0, skip_header=False):
+    """
+    流式读取名称文件 (TXT/CSV/XLSX/XLS)
+
+    参数:
+    - file_path: 文件路径
+    - import_type: 文件类型，如 .txt, .csv，默认按扩展名判断
+    - column_index: CSV/Excel 中名称所在列，从 0 开始
+    - skip_header: 是否跳过第一行表头
+
+    逐个生成去除首尾空白后的非空名称，不会一次性读入整个文件
+    """
+    import_type = (import_type or os.path.splitext(file_path)[1]).lower()
+    start_row = 2 if skip_header else 1
+
+    if import_type == '.txt':
+        for line in itertools.islice(_iter_text_file(file_path), start_row - 1, None):
+            name = line.strip()
+            if name:
+                yield name
+
+    elif import_type == '.csv':
+        for row in itertools.islice(_iter_text_file(file_path, csv.reader, newline=''), start_row - 1, None):
+            if len(row) > column_index:
+                name = row[column_index].strip()
+                if name:
+                    yield name
+
+    elif import_type in ('.xlsx', '.xlsm'):
+        wb = openpyxl.load_workbook(file_path, read_only=True)
+        try:
+            ws = wb.active
+            for row in ws.iter_rows(min_row=start_row, min_col=column_index + 1,
+                                    max_col=column_index + 1, values_only=True):
+                if row and row[0] is not None:
+                    name = format_cell_value(row[0]).strip()
+                    if name:
+                        yield name
+        finally:
+            wb.close()
+
+    elif import_type == '.xls':
+        # 由 excel_utils 读取并缓存工作簿，整列一次取出
+        index = get_workbook_index(file_path)
+        for _, value in index.iter_column(index.sheet_names[0], column_index + 1, min_row=start_row):
+            name = format_cell_value(value).strip()
+            if name:
+                yield name
+
+    else:
+        raise ValueError(f"不支持的文件类型：{import_type}")
+
+def iter_table_rows(file_path, sheet_name=None, max_col=None):
+    """
+    流式读取表格文件 (CSV/XLSX/XLS) 的每一行
+
+    参数:
+    - file_path: 文件路径
+    - sheet_name: Excel 工作表名称，默认为活动工作表（XLS 为第一个工作表）
+    - max_col: 最多读取的列数，默认读取全部列
+
+    逐行生成去除首尾空白的字符串列表，空单元格为空字符串；其他文件类型抛出 ValueError
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+
+    if ext in ('.xlsx', '.xlsm'):
+        wb = openpyxl.load_workbook(file_path, read_only=True)
+        try:
+            ws = wb[sheet_name] if sheet_name else wb.active
+            for row in ws.iter_rows(max_col=max_col, values_only=True):
+                yield ["" if value is None else format_cell_value(value).strip() for value in row]
+        finally:
+            wb.close()
+    elif ext == '.xls':
+        index = get_workbook_index(file_path)
+        for row in index.iter_rows(sheet_name or index.sheet_names[0]):
+            yield ["" if value is None else format_cell_value(value).strip() for value in row[:max_col]]
+    elif ext == '.csv':
+        for row in _iter_text_file(file_path, csv.reader, newline=''):
+            yield [value.strip() for value in row[:max_col]]
+    else:
+        raise ValueError(f"不支持的文件类型：{ext}")
+
+def iter_hierarchy_rows(file_path, sheet_name=None, level_columns=None):
+    """
+    流式读取按列分级的表格 (CSV/XLSX)，每行生成一个目录路径
+
+    参数:
+    - file_path: 文件路径，第一行为表头
+    - sheet_name: XLSX 工作表名称，默认为活动工作表
+    - level_columns: 各级目录对应的列名列表，默认按顺序使用全部列
+
+    逐行生成各级目录名称的元组；最后一个非空单元格之后的列忽略，
+    开头连续的空单元格沿用上一行同级的名称（适用于合并单元格导出的表格），
+    某一级给出名称后更深层级不再沿用上一行，全空的行跳过
+    """
+    rows = iter_table_rows(file_path, sheet_name)
+    headers = next(rows, None)
+    if headers is None:
+        return
+    levels = bind_columns(level_columns, headers) if level_columns else tuple
+    previous = ()
+    for row in rows:
+        cells = levels(row)
+        depth = len(cells)
+        while depth and not cells[depth - 1]:
+            depth -= 1
+        if not depth:
+            continue
+        parts = []
+        inherit = True
+        for level, cell in enumerate(cells[:depth]):
+            if cell:
+                inherit = False
+            elif inherit and level < len(previous):
+                # 只有开头连续的空单元格属于上一行的上级目录
+                cell = previous[level]
+            parts.append(cell)
+        parts = tuple(parts)
+        previous = parts
+        yield parts
+
+def iter_rename_mapping(mapping_path, skip_header=False, sheet_name=None):
+    """
+    流式读取重命名映射文件 (CSV/XLSX)
+
+    参数:
+    - mapping_path: 映射文件路径，每行为 原名称,新名称
+    - skip_header: 是否跳过第一行表头
+    - sheet_name: XLSX 工作表名称，默认为活动工作表
+
+    逐行生成 (行号, 原名称, 新名称)
+    """
+    for line_no, row in enumerate(iter_table_rows(mapping_path, sheet_name, max_col=2), 1):
+        if skip_header and line_no == 1:
+            continue
+        old_name = row[0] if len(row) > 0 else ""
+        new_name = row[1] if len(row) > 1 else ""
+        yield line_no, old_name, new_name
+
+def rename_from_mapping(mapping_path, target_dir, skip_header=False, sheet_name=None,
+                        journal_dir=RENAME_JOURNAL_DIR):
+    """
+    按映射文件批量重命名目录中的文件或文件夹
+
+    目标目录只列举一次并建立名称字典，映射文件逐行流式读取后与字典做哈希连接，
+    匹配到的项目交给 execute_rename_plan 执行。
+
+    参数:
+    - mapping_path: 映射文件路径 (CSV/XLSX)，每行为 原名称,新名称
+    - target_dir: 要重命名的项目所在目录
+    - skip_header: 是否跳过映射文件第一行表头
+    - sheet_name: XLSX 工作表名称，默认为活动工作表
+    - journal_dir: 撤销日志目录，为 None 时不写撤销日志
+
+    返回元组 (成功标志, 消息)
+    """
+    log_operation_start(logger, "映射文件重命名", {
+        "映射文件": mapping_path,
+        "目标目录": target_dir,
+        "跳过表头": skip_header
+    })
+
+    if not os.path.isdir(target_dir):
+        error_msg = f"目标路径不是目录：{target_dir}"
+        logger.error(error_msg)
+        return False, error_msg
+
+    try:
+        with os.scandir(target_dir) as it:
+            names = {entry.name for entry in it}
+    except OSError as e:
+        log_exception(logger, e, "读取目标目录")
+        return False, f"读取目标目录失败：{str(e)}"
+
+    plan = []
+    unmatched_rows = []
+    row_count = 0
+
+    try:
+        for line_no, old_name, new_name in iter_rename_mapping(mapping_path, skip_header, sheet_name):
+            if not old_name and not new_name:
+                continue
+            row_count += 1
+            if old_name not in names or not new_name:
+                unmatched_rows.append((line_no, old_name))
+                continue
+            if new_name != old_name:
+                plan.append((target_dir, old_name, new_name))
+    except Exception as e:
+        log_exception(logger, e, "读取映射文件")
+        return False, f"读取映射文件失败：{str(e)}"
+
+    logger.info(f"映射文件共{row_count}行，匹配{row_count - len(unmatched_rows)}行，未匹配{len(unmatched_rows)}行")
+    for line_no, old_name in unmatched_rows[:20]:
+        logger.warning(f"映射第{line_no}行未匹配：{old_name}")
+
+    # 复用上面的列举结果，目标目录不再重复读取
+    result = execute_rename_plan(plan, new_rename_journal_path(journal_dir) if journal_dir else None,
+                                 listings={target_dir: names})
+
+    result_msg = (f"重命名完成。成功：{result['renamed']}项，跳过：{result['skipped']}项，"
+                  f"失败：{len(result['errors'])}项，未匹配：{len(unmatched_rows)}行")
+    if unmatched_rows:
+        result_msg += f"，未匹配行：{', '.join(str(line_no) for line_no, _ in unmatched_rows[:5])}"
+        if len(unmatched_rows) > 5:
+            result_msg += f" 等{len(unmatched_rows)}行"
+    if result["errors"]:
+        result_msg += f"，失败项：{', '.join([os.path.basename(f) for f in result['errors'][:5]])}"
+        if len(result["errors"]) > 5:
+            result_msg += f" 等{len(result['errors'])}个"
+
+    log_operation_end(logger, "映射文件重命名", "成功" if not result["errors"] else "部分成功",
+                      result["renamed"], len(result["errors"]))
+    return True, result_msg
+
 def show_conflict_dialog(file_path, target_path):
     """
     显示文件冲突对话框